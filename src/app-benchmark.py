@@ -0,0 +1,787 @@
+"""
+app-benchmark.py
+
+Performance benchmarks for the TARS-AI voice pipeline.
+
+Each sub-command replays audio through one stage of the pipeline and reports the
+CPU cost per second of audio, so changes can be compared on the target board.
+
+Usage:
+    python app-benchmark.py vad [--wav FILE] [--seconds 60] [--threads 1] [--json OUT]
+    python app-benchmark.py wake-gate [--wav FILE] [--seconds 60] [--keyphrase "hey tar"] [--json OUT]
+    python app-benchmark.py wakeword WAV_OR_DIR [...] [--engines pocketsphinx] [--sensitivity 6 8 10] [--json OUT]
+    python app-benchmark.py whisper-stream --wav FILE [--model tiny] [--interval-ms 500] [--json OUT]
+    python app-benchmark.py stt WAV_OR_DIR [...] [--backends vosk faster-whisper:tiny silero] [--json OUT]
+    python app-benchmark.py tts-effects [--wav FILE] [--seconds 30] [--sentence-s 3] [--block-ms 20] [--json OUT]
+"""
+
+# === Standard Libraries ===
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+os.chdir(BASE_DIR)
+sys.path.insert(0, BASE_DIR)
+
+# === Helper Functions ===
+def load_benchmark_audio(path=None, seconds=60.0, sample_rate=16000):
+    """
+    Load a mono int16 benchmark signal.
+
+    Parameters:
+    - path (str): WAV/FLAC file to replay. A synthetic voiced signal is generated if None.
+    - seconds (float): Length of the synthetic signal.
+    - sample_rate (int): Required output sample rate.
+
+    Returns:
+    - np.ndarray: int16 samples at `sample_rate`.
+    """
+    if path:
+        from modules.module_audioio import read_audio_file
+        return read_audio_file(path, sample_rate)
+
+    # Alternating one-second voiced bursts (harmonic buzz with syllable-rate
+    # modulation) and background noise.
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    voiced = sum(np.sin(2 * np.pi * 120 * k * t) / k for k in range(1, 12))
+    voiced *= 0.5 * (1 + np.sin(2 * np.pi * 4 * t))
+    gate = (np.floor(t) % 2 == 0).astype(np.float32)
+    signal = 0.2 * voiced * gate + 0.01 * rng.standard_normal(t.size)
+    return np.clip(signal * 32767, -32768, 32767).astype(np.int16)
+
+
+def iter_blocks(audio, block_size):
+    """Split audio into consecutive full blocks, like the live capture loop."""
+    for start in range(0, audio.size - block_size + 1, block_size):
+        yield audio[start:start + block_size]
+
+
+def measure_cpu(func):
+    """
+    Run `func` and return (result, process CPU seconds, wall seconds).
+    """
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    result = func()
+    return result, time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+
+def print_table(title, rows, columns):
+    """Print a list of dicts as an aligned table."""
+    print(f"\n{title}")
+    widths = [max(len(col), *(len(f"{row.get(col, '')}") for row in rows)) for col in columns]
+    print("  ".join(col.ljust(width) for col, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(f"{row.get(col, '')}".ljust(width) for col, width in zip(columns, widths)))
+
+
+def write_json(path, payload):
+    """Write machine-readable results if requested."""
+    if path:
+        with open(path, "w") as f:
+            json.dump(payload, f, indent=2)
+        print(f"\nResults written to {path}")
+
+# === Benchmarks ===
+def benchmark_vad(args):
+    """
+    Compare streaming Silero VAD against the per-block get_speech_timestamps path
+    for each runtime, reporting CPU milliseconds per second of audio.
+    """
+    import torch
+    from silero_vad import get_speech_timestamps
+    from modules.module_vad import load_silero_vad_model, StreamingSileroVAD
+
+    torch.set_num_threads(args.threads)
+    sample_rate = 16000
+    audio = load_benchmark_audio(args.wav, args.seconds, sample_rate)
+    audio_seconds = audio.size / sample_rate
+    blocks = list(iter_blocks(audio, 4000))
+
+    rows = []
+    for runtime in ("torchscript", "onnx"):
+        try:
+            model = load_silero_vad_model(runtime)
+        except Exception as e:
+            print(f"Skipping {runtime}: {e}")
+            continue
+
+        vad = StreamingSileroVAD(model=model, runtime=runtime, sample_rate=sample_rate, threshold=0.3)
+
+        def run_streaming():
+            vad.reset()
+            return sum(len(vad.process(block)) for block in blocks)
+
+        def run_per_block():
+            detected = 0
+            for block in blocks:
+                if hasattr(model, "reset_states"):
+                    model.reset_states()
+                tensor = torch.from_numpy(block.astype(np.float32) / 32768.0)
+                detected += len(get_speech_timestamps(
+                    tensor, model, sampling_rate=sample_rate, threshold=0.3, min_speech_duration_ms=100
+                ) or [])
+            return detected
+
+        for mode, func in (("streaming", run_streaming), ("per-block", run_per_block)):
+            events, cpu, wall = measure_cpu(func)
+            rows.append({
+                "runtime": runtime,
+                "mode": mode,
+                "cpu_ms_per_audio_s": f"{1000 * cpu / audio_seconds:.2f}",
+                "rtf": f"{wall / audio_seconds:.4f}",
+                "events": events,
+            })
+
+    print_table(f"Silero VAD ({audio_seconds:.0f}s of audio, {args.threads} thread(s))", rows,
+                ["runtime", "mode", "cpu_ms_per_audio_s", "rtf", "events"])
+    write_json(args.json, {"benchmark": "vad", "audio_seconds": audio_seconds, "results": rows})
+
+def benchmark_wake_gate(args):
+    """
+    Replay idle room noise and a speech-like signal through pocketsphinx keyword
+    spotting with and without the energy gate, reporting CPU per second of audio.
+    """
+    from modules.module_vad import EnergyGate
+    from modules.module_wakeword import PocketSphinxWakeWord
+
+    sample_rate = 16000
+    block = sample_rate // 10
+    preroll = int(sample_rate * args.preroll_ms / 1000)
+    rng = np.random.default_rng(1)
+    signals = {
+        "idle": np.clip(0.01 * 32767 * rng.standard_normal(int(args.seconds * sample_rate)),
+                        -32768, 32767).astype(np.int16),
+        "speech": load_benchmark_audio(args.wav, args.seconds, sample_rate),
+    }
+    engine = PocketSphinxWakeWord(args.keyphrase, sensitivity=8)
+    engine.load()
+
+    rows = []
+    for signal_name, audio in signals.items():
+        audio_seconds = audio.size / sample_rate
+        for gated in (False, True):
+            gate = EnergyGate(sample_rate, margin=args.margin) if gated else None
+
+            def run():
+                # Same control flow as STTManager._detect_wake_word, on an array instead of the ring
+                spotted = 0
+                detections = 0
+                spotting = gate is None
+                engine.reset()
+                for start in range(0, audio.size - block + 1, block):
+                    data = audio[start:start + block]
+                    if gate is not None:
+                        voiced = gate.process(data)
+                        if not spotting:
+                            if not voiced:
+                                continue
+                            spotting = True
+                            data = audio[max(0, start - preroll):start + block]
+                        elif not voiced:
+                            spotting = False
+                            engine.reset()
+                            continue
+                    spotted += data.size
+                    detections += len(engine.process(data))
+                return spotted, detections
+
+            (spotted, detections), cpu, wall = measure_cpu(run)
+            rows.append({
+                "signal": signal_name,
+                "gate": "on" if gated else "off",
+                "cpu_ms_per_audio_s": f"{1000 * cpu / audio_seconds:.2f}",
+                "spotted_ratio": f"{spotted / audio.size:.2f}",
+                "detections": detections,
+            })
+
+    print_table(f"Wake word idle CPU ({args.seconds:.0f}s per signal, keyphrase '{args.keyphrase}')", rows,
+                ["signal", "gate", "cpu_ms_per_audio_s", "spotted_ratio", "detections"])
+    write_json(args.json, {"benchmark": "wake-gate", "results": rows})
+
+def find_wav_files(paths, extensions=(".wav",)):
+    """Expand files and directories into a sorted list of audio files."""
+    wavs = []
+    for path in paths:
+        if os.path.isdir(path):
+            wavs.extend(os.path.join(path, name) for name in sorted(os.listdir(path))
+                        if name.lower().endswith(extensions))
+        else:
+            wavs.append(path)
+    return wavs
+
+
+def find_labeled_audio(paths):
+    """
+    Collect WAV files and their keyword labels.
+
+    A file `name.wav` is labeled by an optional `name.json` holding
+    {"keyword_ends": [seconds, ...]}. Files without labels are negatives.
+
+    Returns:
+    - list: (wav path, list of keyword end times in seconds).
+    """
+    labeled = []
+    for wav in find_wav_files(paths):
+        label_path = os.path.splitext(wav)[0] + ".json"
+        keyword_ends = []
+        if os.path.exists(label_path):
+            with open(label_path) as f:
+                keyword_ends = sorted(float(t) for t in json.load(f).get("keyword_ends", []))
+        labeled.append((wav, keyword_ends))
+    return labeled
+
+
+def score_detections(detections, keyword_ends, early_s=0.2, late_s=1.5):
+    """
+    Match detection times to labeled keyword ends. A detection counts for a keyword
+    from `early_s` before its labeled end (label slack) to `late_s` after it.
+
+    Returns:
+    - tuple: (latencies of matched detections in seconds, never negative; number of false accepts).
+    """
+    unmatched = list(keyword_ends)
+    latencies = []
+    false_accepts = 0
+    for t in detections:
+        match = next((end for end in unmatched if end - early_s <= t <= end + late_s), None)
+        if match is None:
+            false_accepts += 1
+        else:
+            unmatched.remove(match)
+            # Inside the label slack the keyword is effectively over; no negative latency
+            latencies.append(max(0.0, t - match))
+    return latencies, false_accepts
+
+
+def benchmark_wakeword(args):
+    """
+    Replay labeled WAV files through each wake word engine and sensitivity,
+    reporting recall, latency after the keyword ends, false accepts per hour and
+    CPU per second of audio.
+    """
+    from modules.module_wakeword import WAKE_WORD_ENGINES
+
+    sample_rate = 16000
+    block = int(sample_rate * args.block_ms / 1000)
+    files = [(wav, ends, load_benchmark_audio(wav, sample_rate=sample_rate))
+             for wav, ends in find_labeled_audio(args.paths)]
+    if not files:
+        print("No WAV files found.")
+        return
+    audio_seconds = sum(audio.size for _, _, audio in files) / sample_rate
+    keywords = sum(len(ends) for _, ends, _ in files)
+
+    rows = []
+    for engine_name in args.engines:
+        engine_class = WAKE_WORD_ENGINES.get(engine_name)
+        if engine_class is None:
+            print(f"Skipping unknown engine {engine_name}")
+            continue
+        for sensitivity in args.sensitivity:
+            engine = engine_class(args.keyphrase, sensitivity=sensitivity)
+            try:
+                engine.load()
+            except Exception as e:
+                print(f"Skipping {engine_name}: {e}")
+                break
+
+            def run():
+                latencies, false_accepts = [], 0
+                for _, keyword_ends, audio in files:
+                    engine.reset()
+                    detections = []
+                    for start in range(0, audio.size - block + 1, block):
+                        for event in engine.process(audio[start:start + block]):
+                            detections.append(event["sample"] / sample_rate)
+                    file_latencies, file_false = score_detections(detections, keyword_ends)
+                    latencies.extend(file_latencies)
+                    false_accepts += file_false
+                return latencies, false_accepts
+
+            (latencies, false_accepts), cpu, _ = measure_cpu(run)
+            engine.close()
+            latency_ms = np.array(latencies) * 1000
+            rows.append({
+                "engine": engine_name,
+                "sensitivity": sensitivity,
+                "recall": f"{len(latencies) / keywords:.2f}" if keywords else "-",
+                "latency_p50_ms": f"{np.percentile(latency_ms, 50):.0f}" if latencies else "-",
+                "latency_p95_ms": f"{np.percentile(latency_ms, 95):.0f}" if latencies else "-",
+                "false_accepts": false_accepts,
+                "fa_per_hour": f"{false_accepts * 3600 / audio_seconds:.2f}",
+                "cpu_ms_per_audio_s": f"{1000 * cpu / audio_seconds:.2f}",
+            })
+
+    print_table(f"Wake word engines ({len(files)} files, {audio_seconds / 60:.1f} min, {keywords} keywords, "
+                f"{args.block_ms} ms blocks)", rows,
+                ["engine", "sensitivity", "recall", "latency_p50_ms", "latency_p95_ms",
+                 "false_accepts", "fa_per_hour", "cpu_ms_per_audio_s"])
+    write_json(args.json, {"benchmark": "wakeword", "audio_seconds": audio_seconds,
+                           "keywords": keywords, "results": rows})
+
+def benchmark_whisper_stream(args):
+    """
+    Compare the endpoint-to-final-text gap of batch faster-whisper with streaming
+    local-agreement transcription on the same utterance.
+
+    The streaming run feeds the file in 20 ms frames and decodes synchronously
+    every interval, i.e. it assumes the decoder keeps up with real time; the
+    reported gap is the finalize() call made at the endpoint.
+    """
+    from modules.module_audiobuffer import UtteranceBuffer
+    from modules.module_sttbackends import FasterWhisperBackend
+    from modules.module_sttstream import StreamingTranscription
+
+    sample_rate = 16000
+    audio = load_benchmark_audio(args.wav, sample_rate=sample_rate)
+    audio_seconds = audio.size / sample_rate
+    utterance = UtteranceBuffer(audio.size)
+
+    # Model paths are relative to src/modules, as in the app
+    os.chdir(os.path.join(BASE_DIR, "modules"))
+    backend = FasterWhisperBackend({"STT": {"whisper_model": args.model}}, sample_rate=sample_rate)
+    if not backend.load():
+        return
+    backend.decode_words(np.zeros(sample_rate, dtype=np.float32))  # warm up
+
+    rows = []
+    for run in range(args.runs):
+        utterance.reset()
+        utterance.append(audio)
+        start = time.perf_counter()
+        message = backend.transcribe(utterance)
+        batch_gap = time.perf_counter() - start
+        rows.append({"mode": "batch", "run": run, "gap_ms": f"{1000 * batch_gap:.0f}",
+                     "decodes": 1, "text": json.loads(message)["text"] if message else ""})
+
+        stream = StreamingTranscription(backend, sample_rate=sample_rate, interval_ms=args.interval_ms)
+        utterance.reset()
+        stream.start(utterance, background=False)
+        frame = sample_rate // 50
+        cpu_start = time.process_time()
+        for block in iter_blocks(audio, frame):
+            utterance.append(block)
+            stream.update()
+        stream_cpu = time.process_time() - cpu_start
+        start = time.perf_counter()
+        message = stream.finalize()
+        stream_gap = time.perf_counter() - start
+        rows.append({"mode": "streaming", "run": run, "gap_ms": f"{1000 * stream_gap:.0f}",
+                     "decodes": stream.decodes, "rtf_while_speaking": f"{stream_cpu / audio_seconds:.2f}",
+                     "text": json.loads(message)["text"] if message else ""})
+
+    print_table(f"faster-whisper {args.model}: endpoint to final text ({audio_seconds:.1f}s utterance, "
+                f"{args.interval_ms} ms interval)", rows,
+                ["mode", "run", "gap_ms", "decodes", "rtf_while_speaking", "text"])
+    write_json(args.json, {"benchmark": "whisper-stream", "audio_seconds": audio_seconds, "results": rows})
+
+def find_transcribed_audio(paths):
+    """
+    Collect utterance recordings and their reference transcripts.
+
+    A file `name.wav` (or `name.flac`) is labeled by `name.txt`, or by a "text"
+    field in `name.json`. Files without a transcript are skipped.
+
+    Returns:
+    - list: (audio path, reference text).
+    """
+    labeled = []
+    for wav in find_wav_files(paths, (".wav", ".flac")):
+        stem = os.path.splitext(wav)[0]
+        text = None
+        if os.path.exists(stem + ".txt"):
+            with open(stem + ".txt") as f:
+                text = f.read().strip()
+        elif os.path.exists(stem + ".json"):
+            with open(stem + ".json") as f:
+                text = json.load(f).get("text")
+        if text is None:
+            print(f"Skipping {wav}: no transcript")
+            continue
+        labeled.append((wav, text))
+    return labeled
+
+
+def normalize_words(text):
+    """Lower-case words without punctuation, for WER scoring."""
+    return re.sub(r"[^\w' ]", " ", text.lower()).split()
+
+
+def word_errors(reference, hypothesis):
+    """
+    Word-level edit distance between two transcripts.
+
+    Returns:
+    - tuple: (substitutions + deletions + insertions, number of reference words).
+    """
+    ref = normalize_words(reference)
+    hyp = normalize_words(hypothesis)
+    row = list(range(len(hyp) + 1))
+    for i, ref_word in enumerate(ref, 1):
+        diagonal, row[0] = row[0], i
+        for j, hyp_word in enumerate(hyp, 1):
+            diagonal, row[j] = row[j], min(row[j] + 1, row[j - 1] + 1, diagonal + (ref_word != hyp_word))
+    return row[-1], len(ref)
+
+
+def git_revision():
+    """Short commit hash of the tree being benchmarked, or None outside git."""
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                                capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def parse_stt_spec(spec, args):
+    """
+    Turn a backend spec into the [STT] settings it is built from.
+
+    Specs are "vosk[:model]", "faster-whisper[:size[:compute_type]]", "silero"
+    and "external" (which posts to --external-url).
+
+    Returns:
+    - dict: STT configuration for the backend.
+    """
+    processor, _, options = spec.partition(":")
+    stt = {
+        "stt_processor": processor,
+        "vosk_model": args.vosk_model,
+        "whisper_model": "tiny",
+        "whisper_compute_type": "int8",
+        "external_url": args.external_url,
+        "vad_method": args.vad,
+    }
+    if options and processor == "vosk":
+        stt["vosk_model"] = options
+    elif options:
+        model, _, compute_type = options.partition(":")
+        stt["whisper_model"] = model or "tiny"
+        stt["whisper_compute_type"] = compute_type or "int8"
+    return stt
+
+
+def run_stt_backend(spec, args, files):
+    """
+    Load one STT backend and replay every utterance through it the way
+    STTManager._capture_utterance and _transcribe_audio do: 16 kHz frames into
+    the endpointer (with the model VAD unless the engine is vosk), the noise
+    floor derived threshold, and a transcribe (or streaming finalize) at the
+    endpoint. Runs in its own process so the peak RSS belongs to this backend.
+
+    Returns:
+    - dict: {"row": summary, "utterances": per-file results}, or {"error": reason}.
+    """
+    from modules.module_audiobuffer import UtteranceBuffer
+    from modules.module_startup import peak_rss_mb
+    from modules.module_sttbackends import STT_BACKENDS, create_vad_backend
+    from modules.module_sttstream import StreamingTranscription
+    from modules.module_vad import Endpointer, NoiseFloorTracker
+
+    sample_rate = 16000
+    silence_margin = 3.5  # STTManager defaults
+    amp_gain = 4.0
+
+    # Model paths are relative to src/modules, as in the app
+    os.chdir(os.path.join(BASE_DIR, "modules"))
+    config = {"STT": parse_stt_spec(spec, args)}
+    backend_class = STT_BACKENDS.get(config["STT"]["stt_processor"])
+    if backend_class is None:
+        return {"error": "unknown backend"}
+    backend = backend_class(config, sample_rate=sample_rate, amp_gain=amp_gain)
+    load_start = time.perf_counter()
+    if not backend.load():
+        return {"error": "failed to load"}
+    load_seconds = time.perf_counter() - load_start
+
+    # vosk is endpointed on energy alone, as in the app
+    vad = None
+    if config["STT"]["stt_processor"] != "vosk":
+        vad = getattr(create_vad_backend(config, sample_rate=sample_rate), "streaming_vad", None)
+    stream = None
+    if args.streaming and backend.supports_streaming:
+        stream = StreamingTranscription(backend, sample_rate=sample_rate, interval_ms=args.interval_ms)
+
+    max_ms = 25000  # STTManager.MAX_RECORDING_FRAMES at 16 kHz
+    endpointer = Endpointer(sample_rate, frame_ms=args.frame_ms, speech_ms=args.speech_ms,
+                            hangover_ms=args.hangover_ms, timeout_ms=args.timeout_ms, max_ms=max_ms)
+    utterance = UtteranceBuffer(sample_rate * max_ms // 1000 + endpointer.frame)
+
+    # Decode one second of silence first, untimed
+    utterance.append(np.zeros(sample_rate, dtype=np.int16))
+    try:
+        backend.transcribe(utterance)
+    except Exception:
+        pass
+
+    utterances = []
+    for wav, reference in files:
+        audio = load_benchmark_audio(wav, sample_rate=sample_rate)
+        # The live noise tracker has been running long before the user speaks; prime it on the recording
+        tracker = NoiseFloorTracker(block_s=0.1)
+        for block in iter_blocks(audio, sample_rate // 10):
+            tracker.update_block(block)
+        silence_threshold = (tracker.level if tracker.ready else 10) * silence_margin
+
+        endpointer.reset()
+        endpointer.threshold = silence_threshold * silence_margin / amp_gain
+        if vad is not None:
+            vad.reset()
+        utterance.reset()
+        if stream is not None:
+            stream.start(utterance, background=False)
+
+        # Trailing silence lets the hangover run out when the recording stops right after the speech
+        tail = np.zeros(sample_rate * (args.hangover_ms + 500) // 1000, dtype=np.int16)
+        decode_seconds = 0.0
+        result = None
+        for block in iter_blocks(np.concatenate((audio, tail)), endpointer.frame):
+            data = block.reshape(-1, 1)
+            model_speech = vad.is_speech(data) if vad is not None else None
+            result = endpointer.process(data, model_speech)
+            utterance.append(data)
+            if stream is not None and endpointer.detected_speech:
+                start = time.perf_counter()
+                stream.update()
+                decode_seconds += time.perf_counter() - start
+            if result is not None:
+                break
+
+        text, gap = "", None
+        if endpointer.detected_speech:
+            start = time.perf_counter()
+            if stream is not None:
+                message = stream.finalize()
+            else:
+                message = backend.transcribe(utterance, silence_threshold / 32768.0)
+            gap = time.perf_counter() - start
+            decode_seconds += gap
+            text = json.loads(message)["text"] if message else ""
+        errors, words = word_errors(reference, text)
+        utterances.append({
+            "file": os.path.basename(wav),
+            "reference": reference,
+            "text": text,
+            "endpoint": result,
+            "audio_s": utterance.length / sample_rate,
+            "decode_s": decode_seconds,
+            "gap_ms": 1000 * gap if gap is not None else None,
+            "errors": errors,
+            "words": words,
+        })
+
+    gaps = np.array([u["gap_ms"] for u in utterances if u["gap_ms"] is not None])
+    audio_seconds = sum(u["audio_s"] for u in utterances)
+    words = sum(u["words"] for u in utterances)
+    row = {
+        "backend": spec,
+        "mode": "streaming" if stream is not None else "batch",
+        "wer": f"{sum(u['errors'] for u in utterances) / words:.3f}" if words else "-",
+        "rtf": f"{sum(u['decode_s'] for u in utterances) / audio_seconds:.3f}" if audio_seconds else "-",
+        "latency_p50_ms": f"{np.percentile(gaps, 50):.0f}" if gaps.size else "-",
+        "latency_p95_ms": f"{np.percentile(gaps, 95):.0f}" if gaps.size else "-",
+        "missed": sum(1 for u in utterances if u["gap_ms"] is None),
+        "peak_rss_mb": f"{peak_rss_mb():.0f}",
+        "load_s": f"{load_seconds:.1f}",
+    }
+    return {"row": row, "utterances": utterances}
+
+
+def benchmark_stt(args):
+    """
+    Replay labeled utterances through each STT backend, reporting WER, real-time
+    factor, endpoint-to-text latency and peak RSS.
+
+    Latency is the wall time from the endpoint to the final text, measured after
+    the utterance has been fed; the real-time factor counts all decoding time
+    (including streaming updates) per second of captured audio.
+    """
+    files = find_transcribed_audio(args.paths)
+    if not files:
+        print("No transcribed audio found.")
+        return
+
+    # A fresh process per backend keeps peak RSS and imports from leaking between engines
+    context = multiprocessing.get_context("spawn")
+    rows, utterances = [], {}
+    for spec in args.backends:
+        with context.Pool(1) as pool:
+            outcome = pool.apply(run_stt_backend, (spec, args, files))
+        if "error" in outcome:
+            print(f"Skipping {spec}: {outcome['error']}")
+            continue
+        rows.append(outcome["row"])
+        utterances[spec] = outcome["utterances"]
+    if not rows:
+        print("No backend could be loaded.")
+        return
+
+    print_table(f"STT backends ({len(files)} utterances, {args.vad} VAD, {args.hangover_ms} ms hangover)", rows,
+                ["backend", "mode", "wer", "rtf", "latency_p50_ms", "latency_p95_ms",
+                 "missed", "peak_rss_mb", "load_s"])
+    write_json(args.json, {
+        "benchmark": "stt",
+        "commit": git_revision(),
+        "settings": {key: getattr(args, key) for key in
+                     ("vad", "frame_ms", "speech_ms", "hangover_ms", "timeout_ms", "streaming", "interval_ms")},
+        "results": rows,
+        "utterances": utterances,
+    })
+
+def pydub_tars_effects(audio):
+    """
+    The original pydub TARS effects chain, kept as the benchmark baseline.
+    """
+    sample_rate = audio.frame_rate
+    lower_rate = int(sample_rate * 0.88)
+    audio = audio._spawn(audio.raw_data, overrides={"frame_rate": lower_rate})
+    audio = audio.set_frame_rate(sample_rate)
+    audio = audio.speedup(playback_speed=1.42)
+    echo1 = audio + 2
+    echo2 = echo1 - 1
+    audio = audio.overlay(echo1, position=3)
+    return audio.overlay(echo2, position=6)
+
+
+def benchmark_tts_effects(args):
+    """
+    Compare the pydub TARS effects with the numpy chain, one sentence at a time
+    and streamed in blocks, reporting CPU milliseconds per second of input audio.
+    """
+    from modules.module_ttseffects import TARSEffects, apply_tars_effects
+
+    sample_rate = args.sample_rate
+    audio = load_benchmark_audio(args.wav, args.seconds, sample_rate)
+    audio_seconds = audio.size / sample_rate
+    sentence = int(args.sentence_s * sample_rate)
+    sentences = [audio[start:start + sentence] for start in range(0, audio.size, sentence)]
+    block = int(sample_rate * args.block_ms / 1000)
+
+    def run_numpy():
+        return sum(apply_tars_effects(samples, sample_rate).size for samples in sentences)
+
+    def run_streaming():
+        effects = TARSEffects(sample_rate)
+        produced = 0
+        for samples in sentences:
+            for start in range(0, samples.size, block):
+                produced += effects.process(samples[start:start + block]).size
+            produced += effects.flush().size
+        return produced
+
+    modes = [("numpy", run_numpy), (f"numpy {args.block_ms} ms blocks", run_streaming)]
+    try:
+        from pydub import AudioSegment
+
+        def run_pydub():
+            produced = 0
+            for samples in sentences:
+                segment = AudioSegment(samples.tobytes(), frame_rate=sample_rate, sample_width=2, channels=1)
+                produced += len(pydub_tars_effects(segment).raw_data) // 2
+            return produced
+
+        modes.insert(0, ("pydub", run_pydub))
+    except ImportError:
+        print("pydub is not installed; skipping the baseline.")
+
+    rows = []
+    for mode, func in modes:
+        best = None
+        for _ in range(args.runs):
+            produced, cpu, wall = measure_cpu(func)
+            best = (produced, cpu, wall) if best is None or cpu < best[1] else best
+        produced, cpu, wall = best
+        rows.append({
+            "mode": mode,
+            "cpu_ms_per_audio_s": f"{1000 * cpu / audio_seconds:.2f}",
+            "ms_per_sentence": f"{1000 * wall / len(sentences):.1f}",
+            "rtf": f"{wall / audio_seconds:.4f}",
+            "output_s": f"{produced / sample_rate:.2f}",
+        })
+    baseline = float(rows[0]["cpu_ms_per_audio_s"]) if rows[0]["mode"] == "pydub" else None
+    for row in rows:
+        row["speedup"] = f"{baseline / float(row['cpu_ms_per_audio_s']):.1f}x" if baseline else "-"
+
+    print_table(f"TARS effects ({audio_seconds:.0f}s of audio in {len(sentences)} sentences at {sample_rate} Hz, "
+                f"best of {args.runs})", rows,
+                ["mode", "cpu_ms_per_audio_s", "ms_per_sentence", "rtf", "output_s", "speedup"])
+    write_json(args.json, {"benchmark": "tts-effects", "commit": git_revision(), "audio_seconds": audio_seconds,
+                           "results": rows})
+
+# === Main Application Logic ===
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="TARS-AI voice pipeline benchmarks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    vad_parser = subparsers.add_parser("vad", help="Silero VAD CPU cost per runtime")
+    vad_parser.add_argument("--wav", help="Audio file to replay (synthetic signal if omitted)")
+    vad_parser.add_argument("--seconds", type=float, default=60.0, help="Length of the synthetic signal")
+    vad_parser.add_argument("--threads", type=int, default=1, help="Torch intra-op threads")
+    vad_parser.add_argument("--json", help="Write results to this JSON file")
+    vad_parser.set_defaults(func=benchmark_vad)
+
+    gate_parser = subparsers.add_parser("wake-gate", help="Wake word CPU with and without the energy gate")
+    gate_parser.add_argument("--wav", help="Speech audio to replay (synthetic signal if omitted)")
+    gate_parser.add_argument("--seconds", type=float, default=60.0, help="Length of the synthetic signals")
+    gate_parser.add_argument("--keyphrase", default="hey tar", help="Wake word to spot")
+    gate_parser.add_argument("--margin", type=float, default=2.0, help="Gate margin over the noise floor")
+    gate_parser.add_argument("--preroll-ms", type=int, default=300, help="Audio replayed when the gate opens")
+    gate_parser.add_argument("--json", help="Write results to this JSON file")
+    gate_parser.set_defaults(func=benchmark_wake_gate)
+
+    wake_parser = subparsers.add_parser("wakeword", help="Wake word engines on labeled WAV files")
+    wake_parser.add_argument("paths", nargs="+", help="WAV files or directories (labels in name.json)")
+    wake_parser.add_argument("--engines", nargs="+", default=["pocketsphinx"], help="Engines to compare")
+    wake_parser.add_argument("--sensitivity", nargs="+", type=int, default=[8], help="Sensitivities to sweep")
+    wake_parser.add_argument("--keyphrase", default="hey tar", help="Wake word to spot")
+    wake_parser.add_argument("--block-ms", type=int, default=20, help="Block size fed to the engine")
+    wake_parser.add_argument("--json", help="Write results to this JSON file")
+    wake_parser.set_defaults(func=benchmark_wakeword)
+
+    stream_parser = subparsers.add_parser("whisper-stream", help="Streaming vs batch faster-whisper latency")
+    stream_parser.add_argument("--wav", required=True, help="Utterance to transcribe")
+    stream_parser.add_argument("--model", default="tiny", help="Whisper model size")
+    stream_parser.add_argument("--interval-ms", type=int, default=500, help="Streaming re-decode interval")
+    stream_parser.add_argument("--runs", type=int, default=3, help="Repetitions")
+    stream_parser.add_argument("--json", help="Write results to this JSON file")
+    stream_parser.set_defaults(func=benchmark_whisper_stream)
+
+    stt_parser = subparsers.add_parser("stt", help="STT backends on transcribed utterances")
+    stt_parser.add_argument("paths", nargs="+", help="WAV/FLAC files or directories (transcripts in name.txt)")
+    stt_parser.add_argument("--backends", nargs="+", default=["vosk", "faster-whisper:tiny"],
+                            help="Backend specs, e.g. vosk faster-whisper:base:int8 silero external")
+    stt_parser.add_argument("--vosk-model", default="vosk-model-small-en-us-0.15", help="Vosk model folder in stt/")
+    stt_parser.add_argument("--external-url", default="http://127.0.0.1:5678", help="Server for the external backend")
+    stt_parser.add_argument("--vad", default="rms", choices=["rms", "silero"], help="Endpointing VAD")
+    stt_parser.add_argument("--frame-ms", type=int, default=20, help="Endpointer frame length")
+    stt_parser.add_argument("--speech-ms", type=int, default=100, help="Speech needed to start an utterance")
+    stt_parser.add_argument("--hangover-ms", type=int, default=700, help="Silence that ends an utterance")
+    stt_parser.add_argument("--timeout-ms", type=int, default=4000, help="Wait for speech before giving up")
+    stt_parser.add_argument("--streaming", action="store_true", help="Use streaming transcription where supported")
+    stt_parser.add_argument("--interval-ms", type=int, default=500, help="Streaming re-decode interval")
+    stt_parser.add_argument("--json", help="Write results to this JSON file")
+    stt_parser.set_defaults(func=benchmark_stt)
+
+    effects_parser = subparsers.add_parser("tts-effects", help="TARS voice effects: pydub vs numpy")
+    effects_parser.add_argument("--wav", help="Speech audio to process (synthetic signal if omitted)")
+    effects_parser.add_argument("--seconds", type=float, default=30.0, help="Length of the synthetic signal")
+    effects_parser.add_argument("--sample-rate", type=int, default=22050, help="Sample rate (espeak uses 22050)")
+    effects_parser.add_argument("--sentence-s", type=float, default=3.0, help="Length of each processed sentence")
+    effects_parser.add_argument("--block-ms", type=int, default=20, help="Block size for the streaming run")
+    effects_parser.add_argument("--runs", type=int, default=3, help="Repetitions (best is reported)")
+    effects_parser.add_argument("--json", help="Write results to this JSON file")
+    effects_parser.set_defaults(func=benchmark_tts_effects)
+
+    args = parser.parse_args()
+    args.func(args)
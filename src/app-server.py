@@ -1,18 +1,32 @@
 """
 Flask Server for TARS-AI Application.
 This script provides a Flask-based API server to handle image captioning
-and audio transcription tasks using whisper models.
+and audio transcription tasks using whisper models. Audio can be uploaded as
+one WAV file or streamed while it is being captured.
+
+Each model sits behind its own request queue served by worker threads that
+batch requests arriving within a few milliseconds of each other. A full queue
+answers 503 with Retry-After, and /metrics reports per-endpoint latency and
+queue depth.
 """
 
+import argparse
+import functools
+import time
 from flask import Flask, request, jsonify
 from transformers import BlipProcessor, BlipForConditionalGeneration
 from PIL import Image
 import torch
 import traceback
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, decode_audio
 from flask_cors import CORS
 from io import BytesIO
 from datetime import datetime
+import json
+import numpy as np
+
+from modules.module_modelqueue import LatencyStats, ModelQueue, QueueFull
+from modules.module_sttstream import StreamingTranscription
 
 # Initialize Flask app and enable CORS
 app = Flask(__name__)
@@ -66,26 +80,181 @@ def initialize_blip_model():
 def initialize_whisper_model(
     model_size="large-v3", 
     device=torch.device("cuda" if torch.cuda.is_available() else "cpu"),
-    compute_type="int8_float8"  # Use "float16" or "int8" for optimization
+    compute_type="int8_float8",  # Use "float16" or "int8" for optimization
+    num_workers=1
 ):
     """Load Whisper model for audio transcription using faster-whisper."""
     try:
         return WhisperModel(
             model_size,
             device=device,
-            compute_type=compute_type
+            compute_type=compute_type,
+            num_workers=num_workers  # One per queue worker, so they can decode concurrently
         )
     except Exception as e:
         print("Error initializing Whisper model:", traceback.format_exc())
         raise e
 
+class StreamBuffer:
+    """Growing int16 buffer for a streamed upload (the part of UtteranceBuffer StreamingTranscription reads)."""
+
+    def __init__(self, capacity=16000 * 10):
+        self._pcm = np.zeros(capacity, dtype=np.int16)
+        self.length = 0
+
+    @property
+    def pcm(self):
+        return self._pcm[:self.length]
+
+    def append(self, block):
+        if self.length + block.size > self._pcm.size:
+            # Reallocate; views handed out earlier keep the old array alive
+            grown = np.zeros(max(self._pcm.size * 2, self.length + block.size), dtype=np.int16)
+            grown[:self.length] = self._pcm[:self.length]
+            self._pcm = grown
+        self._pcm[self.length:self.length + block.size] = block
+        self.length += block.size
+
+
+class WhisperWords:
+    """decode_words() for StreamingTranscription, run through the Whisper queue."""
+
+    def __init__(self, beam_size=1):
+        self.beam_size = beam_size
+
+    def decode_words(self, audio, prompt=None):
+        return whisper_queue.submit(("words", audio, prompt, self.beam_size))
+
+
 # Initialize models globally within the main block
 blip_processor = None
 blip_model = None
 whisper_model = None
+blip_queue = None
+whisper_queue = None
+endpoint_stats = {}
+
+# Batch handlers (run on the queue worker threads)
+def caption_batch(images):
+    """Caption a batch of RGB images with one generate() call."""
+    inputs = blip_processor(images=images, return_tensors="pt").to(device)
+    with torch.no_grad():
+        outputs = blip_model.generate(**inputs, max_new_tokens=100, num_beams=3)
+    return [blip_processor.decode(output, skip_special_tokens=True) for output in outputs]
+
+def whisper_batch(jobs):
+    """
+    Run a micro-batch of Whisper jobs: ("transcribe", audio) utterances are
+    decoded together, ("words", audio, prompt, beam_size) streaming decodes one by one.
+    """
+    results = [None] * len(jobs)
+    utterances = []
+    for index, job in enumerate(jobs):
+        if job[0] == "transcribe":
+            utterances.append(index)
+            continue
+        try:
+            _, audio, prompt, beam_size = job
+            segments, _ = whisper_model.transcribe(
+                audio, beam_size=beam_size, word_timestamps=True,
+                initial_prompt=prompt, condition_on_previous_text=False
+            )
+            results[index] = [(word.start, word.end, word.word) for segment in segments for word in (segment.words or [])]
+        except Exception as e:
+            results[index] = e
+
+    if utterances:
+        audios = [jobs[index][1] for index in utterances]
+        try:
+            transcriptions = transcribe_batched(audios)
+        except Exception:
+            print("Batched decode failed, decoding one by one:", traceback.format_exc())
+            transcriptions = []
+            for audio in audios:
+                try:
+                    transcriptions.append(transcribe_single(audio))
+                except Exception as e:
+                    transcriptions.append(e)
+        for index, transcription in zip(utterances, transcriptions):
+            results[index] = transcription
+    return results
+
+def transcribe_single(audio, beam_size=5):
+    """Transcribe one utterance the way /save_audio always has."""
+    segments, _ = whisper_model.transcribe(audio, beam_size=beam_size)
+    return [
+        {"text": segment.text, "start": segment.start, "end": segment.end}
+        for segment in segments
+    ]
+
+def transcribe_batched(audios, beam_size=5, sample_rate=16000):
+    """
+    Decode several utterances of up to 30 s in one CTranslate2 batch: the mel
+    features are stacked, encoded once, and every utterance is decoded in the
+    same generate() call. Each result is a single segment covering the utterance.
+    """
+    max_samples = 30 * sample_rate
+    if len(audios) == 1 or any(audio.size > max_samples for audio in audios):
+        return [transcribe_single(audio, beam_size) for audio in audios]
+
+    import ctranslate2
+    from faster_whisper.tokenizer import Tokenizer
+
+    extractor = whisper_model.feature_extractor
+    frames = extractor.nb_max_frames
+    features = []
+    for audio in audios:
+        mel = extractor(audio)[:, :frames]
+        features.append(np.pad(mel, ((0, 0), (0, frames - mel.shape[1]))))
+    encoded = whisper_model.model.encode(
+        ctranslate2.StorageView.from_array(np.ascontiguousarray(np.stack(features), dtype=np.float32))
+    )
+
+    multilingual = whisper_model.model.is_multilingual
+    if multilingual:
+        # Top language token per utterance, e.g. "<|en|>" -> "en"
+        languages = [detected[0][0][2:-2] for detected in whisper_model.model.detect_language(encoded)]
+    else:
+        languages = [None] * len(audios)
+    tokenizers = [
+        Tokenizer(whisper_model.hf_tokenizer, multilingual, task="transcribe", language=language)
+        for language in languages
+    ]
+    prompts = [tokenizer.sot_sequence + [tokenizer.no_timestamps] for tokenizer in tokenizers]
+    results = whisper_model.model.generate(
+        encoded, prompts, beam_size=beam_size, max_length=448, suppress_blank=True, suppress_tokens=[-1]
+    )
+
+    transcriptions = []
+    for audio, tokenizer, result in zip(audios, tokenizers, results):
+        text = tokenizer.decode(result.sequences_ids[0]).strip()
+        transcriptions.append([{"text": text, "start": 0.0, "end": audio.size / sample_rate}] if text else [])
+    return transcriptions
+
+# Admission control and metrics
+def tracked(name):
+    """Record latency and status for an endpoint and turn QueueFull into 503 + Retry-After."""
+    stats = endpoint_stats.setdefault(name, LatencyStats())
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            started = time.monotonic()
+            try:
+                response = view(*args, **kwargs)
+            except QueueFull as e:
+                stats.reject()
+                busy = jsonify({"error": str(e), "retry_after": e.retry_after})
+                return busy, 503, {"Retry-After": str(e.retry_after)}
+            status = response[1] if isinstance(response, tuple) else 200
+            stats.record(time.monotonic() - started, error=status >= 500)
+            return response
+        return wrapper
+    return decorator
 
 # Routes
 @app.route('/caption', methods=['POST'])
+@tracked('caption')
 def caption_image():
     """Endpoint to generate a caption for an uploaded image."""
     try:
@@ -110,12 +279,12 @@ def caption_image():
 
         #print(f"DEBUG: Image format: {image.format}, Size: {image.size}, Mode: {image.mode}")
 
-        # Process the image with BLIP
-        inputs = blip_processor(image, return_tensors="pt").to(device)
-        outputs = blip_model.generate(**inputs, max_new_tokens=100, num_beams=3)
-        caption = blip_processor.decode(outputs[0], skip_special_tokens=True)
+        # Process the image with BLIP (batched with other requests in flight)
+        caption = blip_queue.submit(image)
 
         return jsonify({"caption": caption})
+    except QueueFull:
+        raise
     except Exception as e:
         print("Error occurred during caption generation:", traceback.format_exc())
         return jsonify({"error": str(e)}), 500
@@ -123,6 +292,7 @@ def caption_image():
 
 
 @app.route('/save_audio', methods=['POST'])
+@tracked('save_audio')
 def save_audio():
     """Endpoint to transcribe uploaded audio using Whisper."""
     #print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Accessed")
@@ -133,28 +303,108 @@ def save_audio():
         audio_blob = request.files['audio']
         audio_bytes = BytesIO(audio_blob.read())
 
-        segments, _ = whisper_model.transcribe(audio_bytes, beam_size=5)
-
-        transcription = [
-            {"text": segment.text, "start": segment.start, "end": segment.end}
-            for segment in segments
-        ]
+        # Decode the file on this thread; the queue workers only run the model
+        whisper_queue.admit()
+        audio = decode_audio(audio_bytes, sampling_rate=16000)
+        transcription = whisper_queue.submit(("transcribe", audio))
         
         print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Transcription: {transcription}")
         return jsonify({"transcription": transcription})
+    except QueueFull:
+        raise
     except Exception as e:
         print("Error occurred during audio transcription:", traceback.format_exc())
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/stream_audio', methods=['POST'])
+@tracked('stream_audio')
+def stream_audio():
+    """
+    Endpoint to transcribe audio streamed while it is being captured.
+
+    The body is raw mono int16 PCM at `rate` Hz (query parameter, default 16000),
+    sent with chunked transfer encoding; the end of the body marks the end of the
+    stream. The audio is re-decoded as it arrives with greedy search and words
+    are committed once two decodes agree. At the end only the audio after the
+    last committed word is decoded again, with beam_size=5 like /save_audio;
+    "tail_ms" in the response is how long that took.
+    """
+    try:
+        sample_rate = request.args.get('rate', 16000, type=int)
+        interval_ms = request.args.get('interval_ms', 500, type=int)
+        whisper_queue.admit()  # Refuse before reading the body
+        decoder = WhisperWords()
+        buffer = StreamBuffer(sample_rate * 10)
+        stream = StreamingTranscription(decoder, sample_rate=sample_rate, interval_ms=interval_ms)
+        stream.start(buffer)
+
+        leftover = b""
+        while True:
+            chunk = request.stream.read(4096)
+            if not chunk:
+                break
+            data = leftover + chunk
+            usable = len(data) - len(data) % 2
+            leftover = data[usable:]
+            buffer.append(np.frombuffer(data[:usable], dtype=np.int16))
+            stream.notify()
+
+        end_of_stream = datetime.now()
+        decoder.beam_size = 5  # Only used for the uncommitted tail
+        message = stream.finalize()
+        text = json.loads(message)["text"] if message else ""
+        tail_ms = (datetime.now() - end_of_stream).total_seconds() * 1000
+
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Streamed transcription "
+              f"({buffer.length / sample_rate:.1f}s, {stream.decodes} decodes, {tail_ms:.0f} ms after end): {text}")
+        return jsonify({
+            "text": text,
+            "transcription": [{"text": text, "start": 0.0, "end": buffer.length / sample_rate}] if text else [],
+            "decodes": stream.decodes,
+            "tail_ms": tail_ms,
+        })
+    except QueueFull:
+        raise
+    except Exception as e:
+        print("Error occurred during streamed transcription:", traceback.format_exc())
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Per-endpoint request counts and latency percentiles, and per-model queue depth and batching."""
+    return jsonify({
+        "endpoints": {name: stats.snapshot() for name, stats in endpoint_stats.items()},
+        "queues": {model_queue.name: model_queue.metrics() for model_queue in (blip_queue, whisper_queue) if model_queue},
+    })
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="TARS-AI captioning and transcription server")
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--whisper-model", default="tiny", help="Whisper model size")
+    parser.add_argument("--workers", type=int, default=1, help="Worker threads per model")
+    parser.add_argument("--batch-ms", type=int, default=10, help="How long to collect requests into one batch")
+    parser.add_argument("--max-batch", type=int, default=8, help="Largest batch per model call")
+    parser.add_argument("--max-queue", type=int, default=32, help="Queued requests per model before answering 503")
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
     try:
+        args = parse_args()
         blip_processor, blip_model = initialize_blip_model()
         whisper_model = initialize_whisper_model(
-            model_size="tiny", 
+            model_size=args.whisper_model,
             device="cuda" if torch.cuda.is_available() else "cpu", 
-            compute_type="int8_float16" if torch.cuda.is_available() else "int8"
+            compute_type="int8_float16" if torch.cuda.is_available() else "int8",
+            num_workers=args.workers
         )
-        app.run(host='0.0.0.0', port=5678)
+        queue_settings = dict(workers=args.workers, max_batch=args.max_batch,
+                              max_wait_ms=args.batch_ms, max_depth=args.max_queue)
+        blip_queue = ModelQueue("blip", caption_batch, **queue_settings)
+        whisper_queue = ModelQueue("whisper", whisper_batch, **queue_settings)
+        app.run(host='0.0.0.0', port=args.port, threaded=True)
     except Exception as e:
         print("Critical error during initialization:", traceback.format_exc())
\ No newline at end of file
@@ -20,15 +20,6 @@ from datetime import datetime
 
 # === Custom Modules ===
 from modules.module_config import load_config
-from modules.module_character import CharacterManager
-from modules.module_memory import MemoryManager
-from modules.module_stt import STTManager
-from modules.module_tts import update_tts_settings
-from modules.module_btcontroller import *
-from modules.module_main import initialize_managers, wake_word_callback, utterance_callback, post_utterance_callback, start_bt_controller_thread, start_discord_bot, process_discord_message_callback
-from modules.module_vision import initialize_blip
-from modules.module_llm import initialize_manager_llm
-import modules.module_chatui
 
 # === Constants and Globals ===
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -62,21 +53,59 @@ def start_discord_in_thread():
 
 # === Main Application Logic ===
 if __name__ == "__main__":
+    # === Custom Modules ===
+    # Imported here rather than at the top: the STT worker process re-imports this
+    # file (as __mp_main__) when it is spawned and needs none of them
+    from modules.module_character import CharacterManager
+    from modules.module_memory import MemoryManager
+    from modules.module_stt import STTManager, ConversationState
+    from modules.module_sttworker import STTWorkerClient
+    from modules.module_startup import report_startup
+    from modules.module_audioio import get_audio_sink
+    from modules.module_tts import update_tts_settings, prerender_tts
+    from modules.module_ttscache import get_tts_cache
+    from modules.module_btcontroller import *
+    from modules.module_main import initialize_managers, wake_word_callback, utterance_callback, partial_utterance_callback, post_utterance_callback, barge_in_callback, start_bt_controller_thread, start_discord_bot, process_discord_message_callback
+    from modules.module_vision import initialize_blip, warm_blip
+    from modules.module_warmup import register_warmup, start_warmup
+    from modules.module_llm import initialize_manager_llm
+    import modules.module_chatui
+
     # Perform initial setup
     init_app()
 
     # Create a shutdown event for global threads
     shutdown_event = threading.Event()
 
-    # Initialize CharacterManager, MemoryManager
-    char_manager = CharacterManager(config=CONFIG)
-    memory_manager = MemoryManager(config=CONFIG, char_name=char_manager.char_name, char_greeting=char_manager.char_greeting)
-   
-    # Initialize STTManager
-    stt_manager = STTManager(config=CONFIG, shutdown_event=shutdown_event)
+    # Initialize STTManager (wake word, VAD and STT models are registered for warmup),
+    # or a worker process running it so STT inference has its own interpreter
+    if CONFIG['STT']['stt_process']:
+        stt_manager = STTWorkerClient(config=CONFIG, shutdown_event=shutdown_event)
+    else:
+        stt_manager = STTManager(config=CONFIG, shutdown_event=shutdown_event)
     stt_manager.set_wake_word_callback(wake_word_callback)
     stt_manager.set_utterance_callback(utterance_callback)
     stt_manager.set_post_utterance_callback(post_utterance_callback)
+    stt_manager.set_barge_in_callback(barge_in_callback)
+    stt_manager.set_partial_callback(partial_utterance_callback)
+
+    # Initilize BLIP to speed up initial image capture
+    if not CONFIG['VISION']['server_hosted']:
+        register_warmup("blip", initialize_blip, warm_blip, priority=20)
+
+    # Render the canned lines into the TTS cache so wake responses play instantly
+    canned_phrases = STTManager.WAKE_WORD_RESPONSES + ["processing, processing, processing"]
+    register_warmup("tts-cache", get_tts_cache, lambda: prerender_tts(canned_phrases, CONFIG['TTS']['ttsoption']), priority=12)
+
+    # Load models in parallel threads; each feature starts as soon as its own models are warm
+    start_warmup()
+
+    # Initialize CharacterManager, MemoryManager
+    char_manager = CharacterManager(config=CONFIG)
+    memory_manager = MemoryManager(config=CONFIG, char_name=char_manager.char_name, char_greeting=char_manager.char_greeting)
+
+    # Per-import time and memory, so cold-start regressions are visible
+    report_startup()
 
     #DISCORD Callback
     if CONFIG['DISCORD']['enabled'] == 'True':
@@ -96,11 +125,7 @@ if __name__ == "__main__":
         queue_message(f"LOAD: ChatUI starting on port 5012...")
         flask_thread = threading.Thread(target=modules.module_chatui.start_flask_app, daemon=True)
         flask_thread.start()
-    
-    # Initilize BLIP to speed up initial image capture
-    if CONFIG['VISION']['server_hosted'] != "True":
-        initialize_blip()
-    
+
     try:
         queue_message(f"LOAD: TARS-AI v1.03a running.")
         # Start the STT thread
@@ -108,6 +133,10 @@ if __name__ == "__main__":
 
         while not shutdown_event.is_set():
             time.sleep(0.1) # Sleep to reduce CPU usage
+            # A replayed recording is done once it has been heard and answered
+            if stt_manager.mic.finished() and stt_manager.state == ConversationState.SLEEPING:
+                queue_message(f"INFO: Audio source finished, shutting down.")
+                shutdown_event.set()
 
     except KeyboardInterrupt:
         queue_message(f"INFO: Stopping all threads and shutting down executor...")
@@ -116,5 +145,6 @@ if __name__ == "__main__":
 
     finally:
         stt_manager.stop()
+        get_audio_sink().close()
         bt_controller_thread.join()
         queue_message(f"INFO: All threads and executor stopped gracefully.")
\ No newline at end of file
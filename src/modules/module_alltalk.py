@@ -1,11 +1,11 @@
 import requests
 import io
-import re
 import asyncio
 import wave
 
 from modules.module_config import load_config
 from modules.module_messageQue import queue_message
+from modules.module_ttschunker import chunk_text
 
 CONFIG = load_config()
 
@@ -19,8 +19,8 @@ async def generate_chunks(text):
     Yields:
     - str: Sentence chunks for processing.
     """
-    # Split text at sentence boundaries (handles period + space)
-    chunks = re.split(r'(?<=\.)\s', text)
+    # Split text into chunks for synthesis
+    chunks = chunk_text(text)  # Short first chunk, then balanced sentences
     
     for chunk in chunks:
         chunk = chunk.strip()
@@ -0,0 +1,371 @@
+"""
+module_audiobuffer.py
+
+Shared microphone capture for TARS-AI.
+
+A single long-lived audio source (the microphone, or a recording being replayed) feeds an int16 ring buffer. Consumers (wake word,
+VAD, transcription) each hold their own read cursor into the ring, so the audio
+device is opened exactly once and no stage ever drops samples while another one
+is being set up. The ring can live in shared memory so a process other than the
+one capturing can read the same audio without copying it.
+"""
+
+# === Standard Libraries ===
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+from modules.module_messageQue import queue_message
+from modules.module_audioio import AudioSource, MicrophoneSource
+
+
+class AudioRingBuffer:
+    """
+    Single-writer, multi-reader int16 ring buffer.
+
+    The writer never waits on readers: it copies the block into the ring and then
+    publishes the new absolute write position. Readers keep their own absolute
+    cursor and detect overruns by comparing it with the write position.
+    """
+
+    def __init__(self, capacity: int, data: Optional[np.ndarray] = None, position: Optional[np.ndarray] = None):
+        """
+        Args:
+            capacity (int): Number of samples held by the ring.
+            data (np.ndarray): Optional pre-allocated int16 storage (e.g. shared memory).
+            position (np.ndarray): Optional pre-allocated int64[1] holding the write position.
+        """
+        self.capacity = int(capacity)
+        self._data = data if data is not None else np.zeros(self.capacity, dtype=np.int16)
+        self._pos = position if position is not None else np.zeros(1, dtype=np.int64)
+        self._cond = threading.Condition()
+
+    @property
+    def write_position(self) -> int:
+        """Total number of samples ever written to the ring."""
+        return int(self._pos[0])
+
+    def write(self, block: np.ndarray):
+        """
+        Append a block of samples. Blocks larger than the ring keep only their tail.
+        """
+        block = np.asarray(block, dtype=np.int16).reshape(-1)
+        if block.size > self.capacity:
+            block = block[-self.capacity:]
+        n = block.size
+        if n == 0:
+            return
+
+        pos = int(self._pos[0])
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = block[:first]
+        if first < n:
+            self._data[:n - first] = block[first:]
+        self._pos[0] = pos + n
+
+        # Wake up waiting readers without ever blocking the capture thread.
+        if self._cond.acquire(blocking=False):
+            try:
+                self._cond.notify_all()
+            finally:
+                self._cond.release()
+
+    def read_at(self, position: int, n: int) -> np.ndarray:
+        """
+        Copy `n` samples starting at absolute `position`. The caller must make sure
+        the range is still inside the ring.
+        """
+        start = position % self.capacity
+        first = min(n, self.capacity - start)
+        if first == n:
+            return self._data[start:start + n].copy()
+        return np.concatenate((self._data[start:], self._data[:n - first]))
+
+    def wait_for(self, position: int, timeout: float) -> bool:
+        """
+        Block until the write position reaches `position` or `timeout` expires.
+        """
+        deadline = time.monotonic() + timeout
+        while int(self._pos[0]) < position:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            with self._cond:
+                # Short waits so a notification lost to the non-blocking writer only costs a few ms.
+                self._cond.wait(min(remaining, 0.02))
+        return True
+
+
+class SharedAudioRing(AudioRingBuffer):
+    """
+    AudioRingBuffer in multiprocessing.shared_memory.
+
+    The block holds the write position, the capture clock used by
+    MicrophoneBroker.time_of() and the samples. One process creates it and
+    writes; others attach by name and read. Readers in another process do not get
+    the writer's notifications and poll every 20 ms instead.
+    """
+
+    _HEADER_BYTES = 24  # int64 write position + float64 (clock position, clock time)
+
+    def __init__(self, capacity: int, name: Optional[str] = None):
+        """
+        Args:
+            capacity (int): Number of samples held by the ring.
+            name (str): Shared memory block to attach to; a new one is created if None.
+        """
+        from multiprocessing import shared_memory
+
+        capacity = int(capacity)
+        self.owner = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=self._HEADER_BYTES + capacity * 2)
+        position = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf, offset=0)
+        self.clock = np.ndarray((2,), dtype=np.float64, buffer=self.shm.buf, offset=8)
+        data = np.ndarray((capacity,), dtype=np.int16, buffer=self.shm.buf, offset=self._HEADER_BYTES)
+        if self.owner:
+            position[0] = 0
+            self.clock[:] = (0, time.monotonic())
+        super().__init__(capacity, data, position)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def close(self):
+        """Detach from the block. The ring must not be used afterwards."""
+        # The numpy views must go before the mapping can be closed
+        self._data = self._pos = self.clock = None
+        self.shm.close()
+
+    def unlink(self):
+        """Free the block once no process needs it any more."""
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class RingReader:
+    """
+    Read cursor into an AudioRingBuffer.
+    """
+
+    def __init__(self, ring: AudioRingBuffer, name: str, position: int):
+        self.ring = ring
+        self.name = name
+        self.position = position
+        self.overruns = 0
+
+    def available(self) -> int:
+        """Number of samples ready to be read without blocking."""
+        return self.ring.write_position - self.position
+
+    def seek(self, position: int):
+        """Move the cursor to an absolute position, clamped to what is still in the ring."""
+        oldest = max(0, self.ring.write_position - self.ring.capacity)
+        self.position = max(oldest, min(position, self.ring.write_position))
+
+    def seek_latest(self, preroll: int = 0):
+        """Move the cursor to the newest audio, keeping `preroll` samples of history."""
+        self.seek(self.ring.write_position - preroll)
+
+    def read(self, n: int, timeout: float = 2.0) -> Optional[np.ndarray]:
+        """
+        Read exactly `n` samples, blocking until they are captured.
+
+        Returns:
+            np.ndarray or None: Samples shaped (n, 1) like sounddevice, or None on timeout.
+        """
+        if not self.ring.wait_for(self.position + n, timeout):
+            return None
+
+        oldest = self.ring.write_position - self.ring.capacity
+        if self.position < oldest:
+            # Reader fell too far behind; skip to the oldest sample still available.
+            self.overruns += 1
+            queue_message(f"WARNING: Audio reader '{self.name}' overrun, skipped {oldest - self.position} samples.")
+            self.position = oldest
+
+        data = self.ring.read_at(self.position, n)
+        self.position += n
+        return data.reshape(-1, 1)
+
+
+class MicrophoneBroker:
+    """
+    Owns the one audio source used by the whole voice pipeline.
+    """
+
+    def __init__(self, sample_rate: int, ring_seconds: float = 30.0, blocksize: int = 0,
+                 source: Optional[AudioSource] = None, shared: bool = False):
+        """
+        Args:
+            sample_rate (int): Capture sample rate.
+            ring_seconds (float): Seconds of audio history kept in the ring.
+            blocksize (int): PortAudio block size (0 lets the host choose).
+            source (AudioSource): Where audio comes from; the default microphone if None.
+            shared (bool): Keep the ring in shared memory so other processes can read it.
+        """
+        self.sample_rate = sample_rate
+        self.source = source if source is not None else MicrophoneSource(sample_rate, blocksize)
+        # _clock holds (write position, monotonic time) of the last block
+        if shared:
+            self.ring = SharedAudioRing(int(sample_rate * ring_seconds))
+            self._clock = self.ring.clock
+        else:
+            self.ring = AudioRingBuffer(int(sample_rate * ring_seconds))
+            self._clock = np.array([0, time.monotonic()], dtype=np.float64)
+        self._started = False
+        self._lock = threading.Lock()
+
+    @property
+    def input_overflows(self) -> int:
+        return self.source.overflows
+
+    def start(self):
+        """Start the source once; subsequent calls are no-ops."""
+        with self._lock:
+            if self._started:
+                return
+            self.source.start(self._on_block)
+            self._started = True
+            queue_message(f"INFO: Microphone broker started at {self.sample_rate} Hz ({self.source.name}).")
+
+    def stop(self):
+        """Stop the source."""
+        with self._lock:
+            if not self._started:
+                return
+            try:
+                self.source.stop()
+            finally:
+                self._started = False
+
+    def finished(self) -> bool:
+        """True once a replayed recording has been delivered completely (never for a live mic)."""
+        return self.source.finished.is_set()
+
+    def _on_block(self, block: np.ndarray):
+        self.ring.write(block)
+        self._clock[1] = time.monotonic()
+        self._clock[0] = self.ring.write_position
+
+    def subscribe(self, name: str, preroll: float = 0.0) -> RingReader:
+        """
+        Create a read cursor positioned at the newest audio.
+
+        Args:
+            name (str): Consumer name used in diagnostics.
+            preroll (float): Seconds of already-captured history to include.
+        """
+        reader = RingReader(self.ring, name, self.ring.write_position)
+        reader.seek_latest(int(preroll * self.sample_rate))
+        return reader
+
+    def position(self) -> int:
+        """Current absolute write position."""
+        return self.ring.write_position
+
+    def time_of(self, position: int) -> float:
+        """
+        Estimate the time.monotonic() at which the sample at `position` was delivered,
+        extrapolated from the most recent callback.
+        """
+        clock_position, clock_time = self._clock
+        return float(clock_time - (clock_position - position) / self.sample_rate)
+
+
+class UtteranceBuffer:
+    """
+    Preallocated buffer an utterance is captured into.
+
+    The int16 and float32 storage is allocated once and reused for every turn, so
+    capturing and converting an utterance never allocates a full-size copy.
+    """
+
+    def __init__(self, max_samples: int):
+        """
+        Args:
+            max_samples (int): Longest utterance the buffer can hold.
+        """
+        self._pcm = np.zeros(max_samples, dtype=np.int16)
+        self._float = np.zeros(max_samples, dtype=np.float32)
+        self.length = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._pcm.size
+
+    @property
+    def pcm(self) -> np.ndarray:
+        """int16 view of the captured samples."""
+        return self._pcm[:self.length]
+
+    def reset(self):
+        """Forget the previous utterance without releasing the storage."""
+        self.length = 0
+
+    def append(self, block: np.ndarray) -> int:
+        """
+        Copy a captured block in place.
+
+        Returns:
+            int: Number of samples stored (less than the block when the buffer is full).
+        """
+        block = block.reshape(-1)
+        n = min(block.size, self.capacity - self.length)
+        self._pcm[self.length:self.length + n] = block[:n]
+        self.length += n
+        return n
+
+    def as_float32(self, trim_threshold: Optional[float] = None, sample_rate: int = 16000,
+                   frame_ms: int = 20, pad_ms: int = 150) -> np.ndarray:
+        """
+        Convert the utterance to float32 in [-1, 1) and optionally trim silence.
+
+        Args:
+            trim_threshold (float): RMS (on the float scale) below which leading and
+                trailing frames are treated as silence. No trimming if None.
+            sample_rate (int): Sample rate of the captured audio.
+            frame_ms (int): Frame length used for the trimming decision.
+            pad_ms (int): Audio kept on either side of the detected speech.
+
+        Returns:
+            np.ndarray: A view into the reusable float32 storage.
+        """
+        n = self.length
+        audio = self._float[:n]
+        np.multiply(self._pcm[:n], 1.0 / 32768.0, out=audio, casting="unsafe")
+        if trim_threshold is None or n == 0:
+            return audio
+
+        start, end = self.trim_bounds(audio, trim_threshold, sample_rate, frame_ms, pad_ms)
+        return audio[start:end]
+
+    @staticmethod
+    def trim_bounds(audio: np.ndarray, threshold: float, sample_rate: int,
+                    frame_ms: int = 20, pad_ms: int = 150):
+        """
+        Find the sample range spanning the first to last frame above `threshold`.
+
+        Returns:
+            tuple: (start, end) sample indices; the whole range if nothing is loud.
+        """
+        frame = max(1, int(sample_rate * frame_ms / 1000))
+        usable = audio.size - audio.size % frame
+        if usable == 0:
+            return 0, audio.size
+
+        frames = audio[:usable].reshape(-1, frame)
+        energy = np.einsum("ij,ij->i", frames, frames) / frame
+        loud = np.flatnonzero(energy > threshold * threshold)
+        if loud.size == 0:
+            return 0, audio.size
+
+        pad = int(sample_rate * pad_ms / 1000)
+        start = max(0, loud[0] * frame - pad)
+        end = min(audio.size, (loud[-1] + 1) * frame + pad)
+        return start, end
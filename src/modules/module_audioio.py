@@ -0,0 +1,602 @@
+"""
+module_audioio.py
+
+Audio sources and sinks for TARS-AI.
+
+The voice pipeline captures from an AudioSource and plays through an AudioSink
+instead of calling sounddevice directly. Besides the live microphone and
+speaker there are file and in-memory sources, paced at real time or faster,
+and WAV and null sinks, so the whole STT -> LLM -> TTS loop can be replayed from
+recordings on a machine without any audio hardware. Selected in the optional
+[AUDIO] section of config.ini.
+
+Every sink keeps a short level envelope of what it played, the reference used to
+tell TARS's own voice apart from the user talking over it, and can be
+interrupted mid-playback. The speaker sink plays through one persistent
+PlaybackEngine stream, with beeps mixed on top as cues.
+"""
+
+# === Standard Libraries ===
+import os
+import threading
+import time
+import wave
+from collections import deque
+from typing import Callable, Optional
+
+import numpy as np
+
+from modules.module_messageQue import queue_message
+from modules.module_config import load_config
+from modules.module_resampler import resample
+from modules.module_playback import PlaybackEngine
+
+BlockCallback = Callable[[np.ndarray], None]  # Receives one 1-D int16 block
+
+_active_source = None
+_sink = None
+_sink_lock = threading.Lock()
+
+
+# === Helper Functions ===
+def read_audio_file(path: str, sample_rate: int) -> np.ndarray:
+    """
+    Load a WAV or FLAC file as mono int16 at `sample_rate`.
+
+    Parameters:
+    - path (str): Audio file to read.
+    - sample_rate (int): Required output sample rate.
+
+    Returns:
+    - np.ndarray: int16 samples.
+    """
+    try:
+        import soundfile as sf
+        audio, file_rate = sf.read(path, dtype="float32", always_2d=True)
+    except ImportError:
+        # Plain WAV still works without libsndfile
+        with wave.open(path, "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError(f"{path}: only 16-bit WAV can be read without soundfile")
+            file_rate = wav.getframerate()
+            frames = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+            audio = frames.reshape(-1, wav.getnchannels()).astype(np.float32) / 32768.0
+
+    audio = audio.mean(axis=1)
+    if file_rate != sample_rate:
+        audio = resample(audio, file_rate, sample_rate)
+    return np.clip(audio * 32768.0, -32768, 32767).astype(np.int16)
+
+
+def _to_int16_mono(data: np.ndarray) -> np.ndarray:
+    """Mix to mono and convert float (-1..1) or integer samples to int16."""
+    data = np.asarray(data)
+    scale = 32768.0 if data.dtype.kind == "f" else 1.0
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    return np.clip(data * scale, -32768, 32767).astype(np.int16)
+
+
+# === Sources ===
+class AudioSource:
+    """
+    Delivers consecutive blocks of mono int16 audio to a callback.
+
+    A source is started once by MicrophoneBroker and runs until stop(). `finished`
+    is set by sources that replay a recording once all of it has been delivered.
+    """
+
+    name = "base"
+
+    def __init__(self, sample_rate: int, blocksize: int = 0):
+        """
+        Args:
+            sample_rate (int): Sample rate of the delivered blocks.
+            blocksize (int): Samples per block (0 lets the source choose).
+        """
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.overflows = 0
+        self.finished = threading.Event()
+
+    def start(self, callback: BlockCallback):
+        raise NotImplementedError
+
+    def stop(self):
+        pass
+
+
+class MicrophoneSource(AudioSource):
+    """
+    Live capture from the default input device.
+    """
+
+    name = "mic"
+
+    def __init__(self, sample_rate: int, blocksize: int = 0):
+        super().__init__(sample_rate, blocksize)
+        self._stream = None
+        self._callback = None
+
+    def start(self, callback: BlockCallback):
+        import sounddevice as sd
+        self._callback = callback
+        self._stream = sd.InputStream(
+            samplerate=self.sample_rate,
+            channels=1,
+            dtype="int16",
+            blocksize=self.blocksize,
+            callback=self._on_input,
+        )
+        self._stream.start()
+
+    def _on_input(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        self._callback(indata[:, 0])
+
+    def stop(self):
+        if self._stream is None:
+            return
+        try:
+            self._stream.stop()
+            self._stream.close()
+        finally:
+            self._stream = None
+
+
+class ArraySource(AudioSource):
+    """
+    Replays an in-memory recording from a thread, paced like a microphone.
+
+    After the recording (and `tail_s` of silence) has been delivered, `finished`
+    is set and the source keeps producing silence, as a quiet room would. Audio
+    passed to mix() is added on top, which is how the loopback sink lets the
+    pipeline hear its own playback.
+    """
+
+    name = "array"
+
+    def __init__(self, audio: np.ndarray, sample_rate: int, speed: float = 1.0, loop: bool = False,
+                 block_ms: int = 20, tail_s: float = 2.0):
+        """
+        Args:
+            audio (np.ndarray): int16 samples at `sample_rate`.
+            sample_rate (int): Sample rate of the recording.
+            speed (float): Playback speed relative to real time; 0 delivers as fast as possible.
+            loop (bool): Start over at the end instead of finishing.
+            block_ms (int): Block length in milliseconds.
+            tail_s (float): Silence delivered after the recording before `finished` is set.
+        """
+        super().__init__(sample_rate, int(sample_rate * block_ms / 1000))
+        self.audio = np.asarray(audio, dtype=np.int16).reshape(-1)
+        self.speed = speed
+        self.loop = loop
+        self.tail = int(sample_rate * tail_s)
+        self.position = 0
+        self._mix = np.zeros(0, dtype=np.float32)
+        self._mix_lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self, callback: BlockCallback):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(callback,), name=f"{self.name}Source", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def mix(self, audio: np.ndarray):
+        """Add int16 audio at `sample_rate` to the blocks about to be delivered."""
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        with self._mix_lock:
+            self._mix = np.concatenate((self._mix, audio))
+
+    def _next_block(self) -> np.ndarray:
+        n = self.blocksize
+        block = np.zeros(n, dtype=np.float32)
+        if self.loop and self.position >= self.audio.size:
+            self.position = 0
+        chunk = self.audio[self.position:self.position + n]
+        block[:chunk.size] = chunk
+        self.position += n
+
+        with self._mix_lock:
+            if self._mix.size:
+                mixed = self._mix[:n]
+                block[:mixed.size] += mixed
+                self._mix = self._mix[n:]
+        return np.clip(block, -32768, 32767).astype(np.int16)
+
+    def _run(self, callback: BlockCallback):
+        interval = self.blocksize / self.sample_rate / self.speed if self.speed > 0 else 0.0
+        next_time = time.monotonic()
+        while not self._stop.is_set():
+            callback(self._next_block())
+            if not self.loop and self.position >= self.audio.size + self.tail and not self.finished.is_set():
+                self.finished.set()
+                queue_message(f"INFO: Audio source '{self.name}' finished.")
+            if interval:
+                next_time += interval
+                delay = next_time - time.monotonic()
+                if delay > 0:
+                    self._stop.wait(delay)
+                else:
+                    next_time = time.monotonic()
+            elif self.finished.is_set():
+                # Nothing left to hurry through; idle at real time
+                interval = self.blocksize / self.sample_rate
+
+
+class FileSource(ArraySource):
+    """
+    Replays a WAV or FLAC file as if it were being captured live.
+    """
+
+    name = "file"
+
+    def __init__(self, path: str, sample_rate: int, **kwargs):
+        """
+        Args:
+            path (str): Recording to replay; resampled to `sample_rate` on load.
+            sample_rate (int): Sample rate of the delivered blocks.
+            **kwargs: speed, loop, block_ms and tail_s as for ArraySource.
+        """
+        self.path = path
+        super().__init__(read_audio_file(path, sample_rate), sample_rate, **kwargs)
+
+
+# === Sinks ===
+class PlaybackReference:
+    """
+    Level envelope of recently played audio, timestamped with when it was played.
+    """
+
+    def __init__(self, frame_ms: int = 20, history_s: float = 5.0):
+        """
+        Args:
+            frame_ms (int): Resolution of the envelope.
+            history_s (float): How much playback is remembered.
+        """
+        self.frame_s = frame_ms / 1000
+        self._frames = deque(maxlen=int(history_s / self.frame_s))  # (monotonic time, rms)
+        self._lock = threading.Lock()
+        self.listener: Optional[Callable[[list], None]] = None  # Also receives every new frame
+
+    def add(self, data: np.ndarray, sample_rate: int, start_time: Optional[float] = None):
+        """
+        Record audio that starts playing at `start_time` (now if None).
+        """
+        samples = _to_int16_mono(data).astype(np.float32)
+        frame = max(1, int(sample_rate * self.frame_s))
+        usable = samples.size - samples.size % frame
+        if usable == 0:
+            return
+        levels = np.sqrt(np.mean(samples[:usable].reshape(-1, frame) ** 2, axis=1))
+        start_time = time.monotonic() if start_time is None else start_time
+        self.extend([(start_time + index * self.frame_s, float(level)) for index, level in enumerate(levels)])
+
+    def extend(self, frames: list):
+        """
+        Record (monotonic time, rms) frames, e.g. forwarded from another process;
+        time.monotonic() is system-wide, so the timestamps stay comparable.
+        """
+        with self._lock:
+            self._frames.extend(frames)
+        if self.listener is not None:
+            self.listener(frames)
+
+    def level(self, at: float, window_s: float = 0.4) -> float:
+        """
+        Loudest playback in the `window_s` before `at`, covering the unknown delay
+        between writing audio and hearing it back on the microphone.
+
+        Returns:
+            float: RMS on the int16 scale, 0.0 if nothing was played.
+        """
+        with self._lock:
+            levels = [level for played, level in self._frames if at - window_s <= played <= at]
+        return max(levels, default=0.0)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
+
+
+class _SinkStream:
+    """Write-only stream handed out by AudioSink.open_stream()."""
+
+    def __init__(self, sink, sample_rate: int):
+        self.sink = sink
+        self.sample_rate = sample_rate
+
+    def write(self, data: np.ndarray):
+        self.sink.play(data, self.sample_rate)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.sink.drain()
+        return False
+
+
+class AudioSink:
+    """
+    Destination for played audio.
+
+    play() blocks until the audio has been played (or, for offline sinks, taken);
+    open_stream() returns a context manager with write() for chunked playback.
+    play_cue() plays a short sound such as a beep, and drain() waits for the end
+    of a reply. interrupt() cuts playback short and drops everything played until resume().
+    """
+
+    name = "base"
+
+    def __init__(self, realtime: bool = False):
+        """
+        Args:
+            realtime (bool): Offline sinks sleep for the duration of the audio, so
+                turn timing matches playback on a speaker.
+        """
+        self.realtime = realtime
+        self.samples_played = 0
+        self.seconds_played = 0.0
+        self.reference = PlaybackReference()
+        self._interrupted = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def interrupted(self) -> bool:
+        return self._interrupted.is_set()
+
+    def interrupt(self):
+        """Stop the audio being played now and ignore further audio until resume()."""
+        self._interrupted.set()
+        self._abort()
+
+    def resume(self):
+        """Accept audio again after interrupt()."""
+        self._interrupted.clear()
+
+    def play(self, data: np.ndarray, sample_rate: int):
+        """
+        Play float (-1..1) or int16 audio, mono or (frames, channels).
+        """
+        if self.interrupted:
+            return
+        data = np.asarray(data)
+        frames = data.shape[0] if data.ndim else 0
+        with self._lock:
+            self.reference.add(data, sample_rate)
+            self._write(data, sample_rate)
+            self.samples_played += frames
+            self.seconds_played += frames / sample_rate
+        if self.realtime and frames:
+            self._interrupted.wait(frames / sample_rate)
+
+    def play_cue(self, data: np.ndarray, sample_rate: int):
+        """
+        Play a short UI sound and return once it has been heard.
+        """
+        self.play(data, sample_rate)
+
+    def drain(self):
+        """Wait until everything passed to play() has been heard."""
+        pass
+
+    def stats(self) -> dict:
+        return {"seconds_played": round(self.seconds_played, 3)}
+
+    def _abort(self):
+        pass
+
+    def _write(self, data: np.ndarray, sample_rate: int):
+        pass
+
+    def open_stream(self, sample_rate: int, channels: int = 1):
+        return _SinkStream(self, sample_rate)
+
+    def close(self):
+        pass
+
+
+class SpeakerSink(AudioSink):
+    """
+    Default output device, through one PlaybackEngine stream that stays open.
+
+    play() queues the audio and returns shortly before it has been heard, so the
+    next sentence is already queued when this one ends and there is no gap.
+    """
+
+    name = "speaker"
+
+    def __init__(self, sample_rate: int = 22050, lead_s: float = 0.1):
+        """
+        Args:
+            sample_rate (int): Output stream rate (piper voices are 22050 Hz).
+            lead_s (float): How long before the end of its audio play() returns.
+        """
+        super().__init__()
+        self.lead = int(sample_rate * lead_s)
+        self.engine = PlaybackEngine(sample_rate, reference=self.reference)
+
+    def play(self, data: np.ndarray, sample_rate: int):
+        if self.interrupted:
+            return
+        data = np.asarray(data)
+        end = self.engine.write(data, sample_rate)
+        self.samples_played += len(data)
+        self.seconds_played += len(data) / sample_rate
+        self.engine.wait_until(end - self.lead, self._interrupted)
+
+    def play_cue(self, data: np.ndarray, sample_rate: int):
+        heard = self.engine.play_cue(data, sample_rate)
+        delay = heard - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def drain(self):
+        self.engine.drain(self._interrupted)
+
+    def stats(self) -> dict:
+        return {**super().stats(), **self.engine.stats()}
+
+    def _abort(self):
+        self.engine.flush()
+
+    def close(self):
+        self.engine.close()
+
+
+class NullSink(AudioSink):
+    """
+    Discards audio and only counts how much was played.
+    """
+
+    name = "null"
+
+
+class WavSink(AudioSink):
+    """
+    Appends everything played to one mono 16-bit WAV file.
+    """
+
+    name = "wav"
+
+    def __init__(self, path: str, sample_rate: int = 22050, realtime: bool = False):
+        """
+        Args:
+            path (str): Output file, overwritten on first write.
+            sample_rate (int): File sample rate; played audio is resampled to it.
+            realtime (bool): See AudioSink.
+        """
+        super().__init__(realtime)
+        self.path = path
+        self.sample_rate = sample_rate
+        self._wav = None
+
+    def _write(self, data: np.ndarray, sample_rate: int):
+        samples = _to_int16_mono(data)
+        if sample_rate != self.sample_rate:
+            samples = np.clip(resample(samples, sample_rate, self.sample_rate), -32768, 32767).astype(np.int16)
+        if self._wav is None:
+            self._wav = wave.open(self.path, "wb")
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(self.sample_rate)
+        # writeframes() patches the header every time, so the file is valid at any point
+        self._wav.writeframes(samples.tobytes())
+
+    def close(self):
+        with self._lock:
+            if self._wav is not None:
+                self._wav.close()
+                self._wav = None
+
+
+class LoopbackSink(AudioSink):
+    """
+    Mixes played audio back into an ArraySource, as if a microphone picked up the speaker.
+    """
+
+    name = "loopback"
+
+    def __init__(self, source: ArraySource, realtime: bool = True):
+        """
+        Args:
+            source (ArraySource): Source whose blocks the playback is added to.
+            realtime (bool): See AudioSink; normally on so playback overlaps capture as it would live.
+        """
+        super().__init__(realtime)
+        self.source = source
+
+    def _write(self, data: np.ndarray, sample_rate: int):
+        samples = _to_int16_mono(data)
+        if sample_rate != self.source.sample_rate:
+            samples = resample(samples, sample_rate, self.source.sample_rate)
+        self.source.mix(samples)
+
+
+# === Factories ===
+def _resolve_path(config, path: str) -> str:
+    """Paths in config.ini are relative to src/."""
+    return path if os.path.isabs(path) else os.path.join(config["BASE_DIR"], path)
+
+
+def create_audio_source(config, sample_rate: int, blocksize: int = 0) -> AudioSource:
+    """
+    Build the capture source selected by `source` in [AUDIO].
+
+    Parameters:
+    - config (dict): Configuration dictionary.
+    - sample_rate (int): Sample rate the pipeline captures at.
+    - blocksize (int): Block size for the live microphone.
+
+    Returns:
+    - AudioSource: The source; not started yet.
+    """
+    global _active_source
+    audio_config = config["AUDIO"]
+    source_name = audio_config["source"]
+
+    if source_name == "file":
+        source = FileSource(
+            _resolve_path(config, audio_config["source_file"]),
+            sample_rate,
+            speed=audio_config["source_speed"],
+            loop=audio_config["source_loop"],
+        )
+        queue_message(f"INFO: Replaying {source.path} ({source.audio.size / sample_rate:.1f}s) "
+                      f"at {audio_config['source_speed']}x.")
+    else:
+        if source_name != "mic":
+            queue_message(f"WARNING: Unknown audio source '{source_name}', using mic.")
+        source = MicrophoneSource(sample_rate, blocksize)
+
+    _active_source = source
+    return source
+
+
+def set_audio_sink(sink: AudioSink):
+    """
+    Use `sink` instead of the one selected in [AUDIO] (e.g. in a worker process
+    whose playback goes through the main process).
+    """
+    global _sink
+    with _sink_lock:
+        _sink = sink
+
+
+def get_audio_sink() -> AudioSink:
+    """
+    Shared playback sink selected by `sink` in [AUDIO], created on first use.
+
+    Returns:
+    - AudioSink: The sink used for beeps and speech.
+    """
+    global _sink
+    with _sink_lock:
+        if _sink is not None:
+            return _sink
+
+        config = load_config()
+        audio_config = config["AUDIO"]
+        sink_name = audio_config["sink"]
+        realtime = audio_config["sink_realtime"]
+        if sink_name == "wav":
+            _sink = WavSink(_resolve_path(config, audio_config["sink_file"]), realtime=realtime)
+        elif sink_name == "null":
+            _sink = NullSink(realtime=realtime)
+        elif sink_name == "loopback" and isinstance(_active_source, ArraySource):
+            _sink = LoopbackSink(_active_source)
+        else:
+            if sink_name != "speaker":
+                queue_message(f"WARNING: Audio sink '{sink_name}' is not available, using speaker.")
+            _sink = SpeakerSink(audio_config["playback_rate"])
+        queue_message(f"INFO: Audio sink '{_sink.name}' selected.")
+        return _sink
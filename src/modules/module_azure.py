@@ -1,8 +1,8 @@
 import io
-import re
 import asyncio
 import azure.cognitiveservices.speech as speechsdk
 from modules.module_config import load_config
+from modules.module_ttschunker import chunk_text
 
 
 CONFIG = load_config()
@@ -89,8 +89,8 @@ async def text_to_speech_with_pipelining_azure(text: str):
     if not CONFIG['TTS']['azure_api_key'] or not CONFIG['TTS']['azure_region']:
         raise ValueError("Azure API key and region must be provided for the 'azure' TTS option.")
 
-    # Split text into chunks based on sentence endings (adjust regex as needed)
-    chunks = re.split(r'(?<=\.)\s', text)
+    # Split text into chunks for synthesis
+    chunks = chunk_text(text)  # Short first chunk, then balanced sentences
 
     # Schedule synthesis for all non-empty chunks concurrently.
     tasks = []
@@ -295,6 +295,12 @@ def stop_talking_endpoint():
     #queue_message("DEBUG: Talking mode disabled.")
     return Response("stopped", status=200)
 
+@flask_app.route('/stt_partial', methods=['POST'])
+def stt_partial_endpoint():
+    data = request.get_json(silent=True) or {}
+    socketio.emit('user_partial', {'message': data.get('message', ''), 'final': data.get('final', False)})
+    return Response("ok", status=200)
+
 @flask_app.route('/process_llm', methods=['POST'])
 def receive_user_message():
     global latest_text_to_read, CHARACTER_DIR, img_nottalking_open, img_nottalking_closed, img_talking_open, img_talking_closed
@@ -44,6 +44,16 @@ class TTSConfig:
     # Server specific settings
     ttsurl: Optional[str] = None
 
+    # Synthesized sentences buffered ahead of playback
+    lookahead: int = 2
+
+    # Cache of synthesized phrases
+    cache: bool = True
+    cache_dir: str = "tts/cache"
+    cache_memory_mb: float = 16.0
+    cache_disk_mb: float = 200.0
+    cache_max_chars: int = 200
+
     def __getitem__(self, key):
         """Enable dictionary-like access for backward compatibility"""
         return getattr(self, key)
@@ -80,7 +90,13 @@ class TTSConfig:
             elevenlabs_api_key=config_dict.get('elevenlabs_api_key'),
             voice_id=config_dict.get('voice_id'),
             model_id=config_dict.get('model_id'),
-            ttsurl=config_dict.get('ttsurl')
+            ttsurl=config_dict.get('ttsurl'),
+            lookahead=config_dict.get('lookahead', 2),
+            cache=config_dict.get('cache', True),
+            cache_dir=config_dict.get('cache_dir', "tts/cache"),
+            cache_memory_mb=config_dict.get('cache_memory_mb', 16.0),
+            cache_disk_mb=config_dict.get('cache_disk_mb', 200.0),
+            cache_max_chars=config_dict.get('cache_max_chars', 200)
         )
 
 def load_config():
@@ -148,10 +164,44 @@ def load_config():
             "stt_processor": config['STT']['stt_processor'],
             "external_url": config['STT']['external_url'],
             "whisper_model": config['STT']['whisper_model'],
+            "whisper_compute_type": config.get('STT', 'whisper_compute_type', fallback='int8'),
             "vosk_model": config['STT']['vosk_model'],
             "use_indicators": config.getboolean('STT', 'use_indicators'),
             "vad_method": config['STT']['vad_method'],
+            "vad_enabled": config['STT']['vad_method'] == 'silero',
+            "vad_runtime": config.get('STT', 'vad_runtime', fallback='torchscript'),
             "speechdelay": int(config['STT']['speechdelay']),
+            "frame_ms": config.getint('STT', 'frame_ms', fallback=20),
+            "speech_ms": config.getint('STT', 'speech_ms', fallback=100),
+            "hangover_ms": config.getint('STT', 'hangover_ms', fallback=int(config['STT']['speechdelay']) * 100),
+            "listen_timeout_ms": config.getint('STT', 'listen_timeout_ms', fallback=4000),
+            "early_endpoint": config.getboolean('STT', 'early_endpoint', fallback=False),
+            "early_hangover_ms": config.getint('STT', 'early_hangover_ms', fallback=300),
+            "external_streaming": config.getboolean('STT', 'external_streaming', fallback=True),
+            "stt_streaming": config.getboolean('STT', 'stt_streaming', fallback=False),
+            "stream_interval_ms": config.getint('STT', 'stream_interval_ms', fallback=500),
+            "stt_cascade": config.getboolean('STT', 'stt_cascade', fallback=False),
+            "cascade_target": config.get('STT', 'cascade_target', fallback='small'),
+            "cascade_logprob": config.getfloat('STT', 'cascade_logprob', fallback=-0.8),
+            "cascade_no_speech": config.getfloat('STT', 'cascade_no_speech', fallback=0.6),
+            "preroll_ms": config.getint('STT', 'preroll_ms', fallback=300),
+            "wake_engine": config.get('STT', 'wake_engine', fallback='pocketsphinx'),
+            "wake_gate": config.getboolean('STT', 'wake_gate', fallback=True),
+            "wake_gate_margin": config.getfloat('STT', 'wake_gate_margin', fallback=2.0),
+            "stt_process": config.getboolean('STT', 'stt_process', fallback=False),
+            "barge_in": config.getboolean('STT', 'barge_in', fallback=False),
+            "barge_in_ms": config.getint('STT', 'barge_in_ms', fallback=200),
+            "barge_in_margin": config.getfloat('STT', 'barge_in_margin', fallback=2.0),
+        },
+        "AUDIO": {
+            "source": config.get('AUDIO', 'source', fallback='mic'),
+            "source_file": config.get('AUDIO', 'source_file', fallback=''),
+            "source_speed": config.getfloat('AUDIO', 'source_speed', fallback=1.0),
+            "source_loop": config.getboolean('AUDIO', 'source_loop', fallback=False),
+            "sink": config.get('AUDIO', 'sink', fallback='speaker'),
+            "sink_file": config.get('AUDIO', 'sink_file', fallback='output.wav'),
+            "sink_realtime": config.getboolean('AUDIO', 'sink_realtime', fallback=False),
+            "playback_rate": config.getint('AUDIO', 'playback_rate', fallback=22050),
         },
         "CHAR": {
             "character_card_path": config['CHAR']['character_card_path'],
@@ -172,6 +222,10 @@ def load_config():
             "seed": int(config['LLM']['seed']),
             "systemprompt": config['LLM']['systemprompt'],
             "instructionprompt": config['LLM']['instructionprompt'],
+            "speculative": config.getboolean('LLM', 'speculative', fallback=False),
+            "speculative_llm": config.getboolean('LLM', 'speculative_llm', fallback=False),
+            "speculative_similarity": config.getfloat('LLM', 'speculative_similarity', fallback=0.9),
+            "speculative_stable_ms": config.getint('LLM', 'speculative_stable_ms', fallback=300),
         },
         "VISION": {
             "server_hosted": config.getboolean('VISION', 'server_hosted'),
@@ -196,6 +250,12 @@ def load_config():
             "is_talking_override": config.getboolean('TTS', 'is_talking_override'),
             "is_talking": config.getboolean('TTS', 'is_talking'),
             "global_timer_paused": config.getboolean('TTS', 'global_timer_paused'),
+            "lookahead": config.getint('TTS', 'lookahead', fallback=2),
+            "cache": config.getboolean('TTS', 'cache', fallback=True),
+            "cache_dir": config.get('TTS', 'cache_dir', fallback='tts/cache'),
+            "cache_memory_mb": config.getfloat('TTS', 'cache_memory_mb', fallback=16.0),
+            "cache_disk_mb": config.getfloat('TTS', 'cache_disk_mb', fallback=200.0),
+            "cache_max_chars": config.getint('TTS', 'cache_max_chars', fallback=200),
         }),
         "CHATUI": {
             "enabled": config['CHATUI']['enabled'],
@@ -1,11 +1,11 @@
 import io
-import re
 import asyncio
 import wave
 from modules.module_config import load_config
 from elevenlabs.client import ElevenLabs
 
 from modules.module_messageQue import queue_message
+from modules.module_ttschunker import chunk_text
 
 CONFIG = load_config()
 
@@ -61,7 +61,7 @@ async def text_to_speech_with_pipelining_elevenlabs(text):
     - BytesIO: Processed audio chunks as they're generated.
     """
     # ✅ Split text into sentences before sending to ElevenLabs
-    chunks = re.split(r'(?<=\.)\s', text)  # Split at sentence boundaries
+    chunks = chunk_text(text)  # Short first chunk, then balanced sentences
 
     # ✅ Process each sentence separately
     for chunk in chunks:
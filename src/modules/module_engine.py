@@ -34,6 +34,7 @@ import os
 import joblib
 from datetime import datetime
 import threading
+import asyncio
 
 # === Custom Modules ===
 from modules.module_websearch import search_google, search_google_news
@@ -41,7 +42,7 @@ from modules.module_vision import describe_camera_view
 from modules.module_stablediffusion import generate_image
 from modules.module_volume import handle_volume_command
 from modules.module_homeassistant import send_prompt_to_homeassistant
-from modules.module_tts import generate_tts_audio
+from modules.module_tts import play_audio_chunks
 from modules.module_config import load_config, update_character_setting
 from modules.module_messageQue import queue_message
 
@@ -244,13 +245,16 @@ def call_function(module_name, *args, **kwargs):
     except Exception as e:
         queue_message(f"[DEBUG] Error while executing {module_name}: {e}")
 
-def check_for_module(user_input):
+def check_for_module(user_input, prediction=None):
     """
     Determines the appropriate module to handle the user's input and invokes it.
+    A (class, probability) prediction already made for this input, e.g. speculatively
+    on a partial transcript, skips the classification.
     """
-    predicted_class, probability = predict_class(user_input)
+    predicted_class, probability = prediction if prediction is not None else predict_class(user_input)
     if not predicted_class:
         return "None"
+    announce_tool(predicted_class, probability)
     
     # Call the function associated with the predicted class
     return call_function(predicted_class, user_input)
@@ -265,6 +269,15 @@ def predict_class(user_input):
         return predict_class_llm(user_input)
     return
 
+def announce_tool(predicted_class, probability):
+    """
+    Log the tool about to run and say "processing" before it runs.
+    Kept out of the classifiers so they can run on partial transcripts.
+    """
+    formatted_probability = "{:.2f}%".format(probability * 100)
+    queue_message(f"TOOL: Using Tool {predicted_class} ({formatted_probability})")
+    asyncio.run(play_audio_chunks("processing, processing, processing", CONFIG['TTS']['ttsoption'], CONFIG['TTS']['lookahead']))
+
 def predict_class_nb(user_input):
     """
     Predicts the class and its confidence score for a given user input.
@@ -288,11 +301,6 @@ def predict_class_nb(user_input):
     if max_probability < 0.75:
         return None, max_probability
 
-    # Format the value as a percentage with 2 decimal places
-    formatted_probability = "{:.2f}%".format(max_probability * 100)
-    queue_message(f"TOOL: Using Tool {predicted_class} ({formatted_probability})")
-    generate_tts_audio("processing, processing, processing", CONFIG['TTS']['ttsoption'], CONFIG['TTS']['azure_api_key'], CONFIG['TTS']['azure_region'], CONFIG['TTS']['ttsurl'], CONFIG['TTS']['toggle_charvoice'], CONFIG['TTS']['tts_voice'])
-
     return predicted_class, max_probability
 
 def predict_class_llm(user_input):
@@ -365,11 +373,6 @@ def predict_class_llm(user_input):
             queue_message(f"[INFO] Confidence too low ({max_probability:.2f}). Tool not used.")
             return None, max_probability
 
-        # Announce the decision via TTS (optional)
-        formatted_probability = f"{max_probability * 100:.2f}%"
-        queue_message(f"TOOL: Using Tool {predicted_class} ({formatted_probability})")
-        generate_tts_audio("processing, processing, processing", CONFIG['TTS']['ttsoption'], CONFIG['TTS']['azure_api_key'], CONFIG['TTS']['azure_region'], CONFIG['TTS']['ttsurl'], CONFIG['TTS']['toggle_charvoice'], CONFIG['TTS']['tts_voice'])
-
         return predicted_class, max_probability
 
     except json.JSONDecodeError as e:
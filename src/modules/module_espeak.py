@@ -2,30 +2,11 @@ import io
 import os
 import wave
 import subprocess
-import re
-from pydub import AudioSegment
+import numpy as np
 
 from modules.module_messageQue import queue_message
-
-def apply_tars_effects(audio):
-    """
-    Apply TARS-like effects: pitch change, speed up, reverb, and echo.
-    """
-    sample_rate = audio.frame_rate  # Get the actual sample rate
-    lower_rate = int(sample_rate * 0.88)
-    audio = audio._spawn(audio.raw_data, overrides={"frame_rate": lower_rate})
-    audio = audio.set_frame_rate(sample_rate)
-    audio = audio.speedup(playback_speed=1.42)
-    
-    # Apply echo and reverb
-    reverb_decay = -2
-    delay_ms = 3
-    echo1 = audio - reverb_decay
-    echo2 = echo1 - 1
-    audio = audio.overlay(echo1, position=delay_ms)
-    audio = audio.overlay(echo2, position=delay_ms * 2)  # Fixed the delay overlap
-    
-    return audio
+from modules.module_ttschunker import chunk_text
+from modules.module_ttseffects import apply_tars_effects
 
 async def text_to_speech_with_pipelining_espeak(text):
     """
@@ -38,7 +19,7 @@ async def text_to_speech_with_pipelining_espeak(text):
     - BytesIO: Chunks of processed audio as they're generated.
     """
     # Split text into smaller chunks at sentence boundaries
-    chunks = re.split(r'(?<=\.)\s', text)
+    chunks = chunk_text(text)  # Short first chunk, then balanced sentences
 
     for chunk in chunks:
         chunk = chunk.strip()
@@ -58,19 +39,21 @@ async def text_to_speech_with_pipelining_espeak(text):
                 queue_message(f"ERROR: espeak-ng failed: {process.stderr.decode()}")
                 continue
 
-            # Convert espeak output to Pydub AudioSegment
-            audio = AudioSegment.from_file(io.BytesIO(process.stdout), format="wav")
+            # Read the 16-bit mono samples espeak wrote
+            with wave.open(io.BytesIO(process.stdout), 'rb') as espeak_wav:
+                sample_rate = espeak_wav.getframerate()
+                samples = np.frombuffer(espeak_wav.readframes(espeak_wav.getnframes()), dtype=np.int16)
 
             # Apply TARS-like effects
-            audio = apply_tars_effects(audio)
+            audio = apply_tars_effects(samples, sample_rate)
 
             # Convert modified audio to BytesIO buffer
             wav_buffer = io.BytesIO()
             with wave.open(wav_buffer, 'wb') as wav_file:
                 wav_file.setnchannels(1)  # Mono
                 wav_file.setsampwidth(2)  # 16-bit samples
-                wav_file.setframerate(audio.frame_rate)  # Keep the same sample rate
-                wav_file.writeframes(audio.raw_data)
+                wav_file.setframerate(sample_rate)  # Keep the same sample rate
+                wav_file.writeframes(audio.tobytes())
 
             wav_buffer.seek(0)
             yield wav_buffer  # Yield the processed audio chunk
@@ -27,9 +27,8 @@ import requests
 from typing import List, Union
 import bm25s
 import Stemmer
-from sentence_transformers import CrossEncoder
 import configparser
-import torch
+import threading
 
 from modules.module_config import get_api_key
 from modules.module_messageQue import queue_message
@@ -80,8 +79,18 @@ def get_embedding_new(documents):
         queue_message("Error:", response.status_code, response.text)
         return None
 
-from sentence_transformers import SentenceTransformer
-EMBEDDING_MODEL = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', device='cpu')
+# Loaded on first use (or by the warmup thread) instead of at import time
+EMBEDDING_MODEL = None
+_embedding_lock = threading.Lock()
+
+def get_embedding_model():
+    """Return the sentence embedding model, loading it once."""
+    global EMBEDDING_MODEL
+    with _embedding_lock:
+        if EMBEDDING_MODEL is None:
+            from sentence_transformers import SentenceTransformer
+            EMBEDDING_MODEL = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2', device='cpu')
+    return EMBEDDING_MODEL
 
 def get_embedding(documents, key=None):
     """Default embedding function that uses OpenAI Embeddings."""
@@ -104,7 +113,7 @@ def get_embedding(documents, key=None):
         elif isinstance(documents[0], str):
             texts = documents
 
-    embeddings = EMBEDDING_MODEL.encode(texts)
+    embeddings = get_embedding_model().encode(texts)
     return embeddings
 
 def get_norm_vector(vector):
@@ -181,17 +190,8 @@ class HyperDB:
         )
         self.rag_strategy = rag_strategy
 
-        if rag_strategy == "hybrid":
-            try:
-                self.reranker = CrossEncoder(
-                    'BAAI/bge-reranker-base',
-                    device='cuda' if torch.cuda.is_available() else 'cpu', 
-                    max_length=256,
-                )
-                queue_message("INFO: BGE reranker model loaded successfully")
-            except Exception as e:
-                queue_message(f"WARNING: Failed to load BGE reranker model: {e}")
-                self.reranker = None
+        # Loaded by load_reranker() in the background; hybrid search skips reranking until then
+        self.reranker = None
 
         # Initialize BM25 components
         queue_message(f"INFO: Initializing HyperDB with {rag_strategy} RAG strategy")
@@ -428,6 +428,28 @@ class HyperDB:
             )
         return [self.documents[index] for index in ranked_results]
 
+    def load_reranker(self):
+        """
+        Load the BGE reranker used by hybrid search.
+        """
+        try:
+            import torch
+            from sentence_transformers import CrossEncoder
+            self.reranker = CrossEncoder(
+                'BAAI/bge-reranker-base',
+                device='cuda' if torch.cuda.is_available() else 'cpu',
+                max_length=256,
+            )
+            queue_message("INFO: BGE reranker model loaded successfully")
+        except Exception as e:
+            queue_message(f"WARNING: Failed to load BGE reranker model: {e}")
+            self.reranker = None
+
+    def warm_reranker(self):
+        """Score one dummy query/document pair with the cross-encoder."""
+        if self.reranker is not None:
+            self.reranker.predict([["warmup", "warmup"]])
+
     def _rerank_results(self, query: str, candidate_docs: list) -> list:
         """
         Rerank candidate documents using the BGE reranker model.
@@ -14,6 +14,8 @@ import threading
 import concurrent.futures
 from modules.module_config import load_config
 from modules.module_prompt import build_prompt
+from modules.module_engine import predict_class_nb, mode as intent_mode
+from modules.module_speculative import SpeculativeRunner
 
 from modules.module_messageQue import queue_message
 
@@ -21,27 +23,39 @@ from modules.module_messageQue import queue_message
 CONFIG = load_config()
 character_manager = None
 memory_manager = None
+speculative_runner = None
 
 # Threading and Executor
 executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+_cancel_event = threading.Event()  # Set by cancel_completion() when the user barges in
 
 # === Core Functions ===
 
-def get_completion(user_prompt, istext=True):
+def get_completion(user_prompt, istext=True, prefetched=None):
     """
     Generate a completion using the configured LLM backend.
 
     Parameters:
     - user_prompt (str): The user's input prompt.
     - istext (bool): Whether the prompt is a standard text query.
+    - prefetched (dict): Intent and long-term memory already computed for the prompt.
 
     Returns:
     - str: The generated completion.
     """
+    bot_reply = _request_completion(user_prompt, istext, prefetched)
+    if bot_reply is not None and not _cancel_event.is_set():
+        llm_process(user_prompt, bot_reply)
+    return bot_reply
+
+def _request_completion(user_prompt, istext=True, prefetched=None):
+    """
+    Build the prompt and request a reply, without touching memory.
+    """
     if memory_manager is None or character_manager is None:
         raise ValueError("MemoryManager and CharacterManager must be initialized before generating completions.")
 
-    prompt = build_prompt(user_prompt, character_manager, memory_manager, CONFIG)
+    prompt = build_prompt(user_prompt, character_manager, memory_manager, CONFIG, prefetched=prefetched)
     headers = {
         "Content-Type": "application/json",
         "Authorization": f"Bearer {CONFIG['LLM']['api_key']}"
@@ -52,10 +66,7 @@ def get_completion(user_prompt, istext=True):
     try:
         response = requests.post(url, headers=headers, json=data)
         response.raise_for_status()
-        bot_reply = _extract_text(response.json(), istext)
-        
-        llm_process(user_prompt, bot_reply)
-        return bot_reply
+        return _extract_text(response.json(), istext)
     
     except requests.RequestException as e:
         queue_message(f"ERROR: LLM request failed: {e}")
@@ -144,10 +155,60 @@ def process_completion(prompt):
     - prompt (str): The input prompt.
 
     Returns:
-    - str: The generated response.
+    - str: The generated response, or None if it was cancelled.
     """
+    _cancel_event.clear()
+    speculation = speculative_runner.take(prompt) if speculative_runner else None
+    if speculation is not None:
+        if speculation["reply"] is not None:
+            # The reply was generated on a near-identical partial; store it against the final text
+            return llm_process(prompt, speculation["reply"])
+        prefetched = {"intent": speculation["intent"], "past_memory": speculation["past_memory"]}
+        future = executor.submit(get_completion, prompt, istext=True, prefetched=prefetched)
+        return _wait_for_completion(future)
+
     future = executor.submit(get_completion, prompt, istext=True)
-    return future.result()
+    return _wait_for_completion(future)
+
+def _wait_for_completion(future):
+    """
+    Wait for a completion, giving up as soon as cancel_completion() is called.
+    The request itself runs to the end in the background and its reply is dropped.
+    """
+    while not _cancel_event.is_set():
+        try:
+            return future.result(timeout=0.05)
+        except concurrent.futures.TimeoutError:
+            continue
+    queue_message("INFO: LLM request cancelled.")
+    return None
+
+def cancel_completion():
+    """
+    Abandon the completion in flight (the user interrupted). Its reply is not
+    returned and not written to memory.
+    """
+    _cancel_event.set()
+    if speculative_runner is not None:
+        speculative_runner.cancel()
+
+def speculate(partial_text):
+    """
+    Feed a streaming partial transcript so intent, memory and (optionally) LLM work
+    can start before the user has finished speaking. No-op unless enabled.
+
+    Parameters:
+    - partial_text (str): The current partial transcript ("" once it is final).
+    """
+    if speculative_runner is not None:
+        speculative_runner.on_partial(partial_text)
+
+def get_speculation_stats():
+    """
+    Returns:
+    - dict: Speculation hit rate and latency saved, or None if speculation is disabled.
+    """
+    return speculative_runner.get_stats() if speculative_runner else None
 
 # === Emotion Detection ===
 
@@ -228,6 +289,17 @@ def initialize_manager_llm(mem_manager, char_manager):
     - mem_manager: The MemoryManager instance from app.py.
     - char_manager: The CharacterManager instance from app.py.
     """
-    global memory_manager, character_manager
+    global memory_manager, character_manager, speculative_runner
     memory_manager = mem_manager
-    character_manager = char_manager
\ No newline at end of file
+    character_manager = char_manager
+
+    if CONFIG['LLM']['speculative']:
+        speculative_runner = SpeculativeRunner(
+            # The LLM classifier costs a request per partial, so intent is only speculated with NB
+            intent_fn=predict_class_nb if intent_mode == 'NB' else None,
+            memory_fn=memory_manager.get_longterm_memory,
+            llm_fn=_request_completion if CONFIG['LLM']['speculative_llm'] else None,
+            similarity=CONFIG['LLM']['speculative_similarity'],
+            stable_ms=CONFIG['LLM']['speculative_stable_ms'],
+        )
+        queue_message("INFO: Speculative pre-work on partial transcripts enabled.")
\ No newline at end of file
@@ -7,20 +7,20 @@ Core logic module for the TARS-AI application.
 # === Standard Libraries ===
 import os
 import threading
+import queue
 import json
 import re
 import concurrent.futures
 import sys
 import time
 import asyncio
-import sounddevice as sd
 import soundfile as sf
 
 # === Custom Modules ===
 from modules.module_config import load_config
 from modules.module_btcontroller import start_controls
 from modules.module_discord import *
-from modules.module_llm import process_completion
+from modules.module_llm import process_completion, speculate, cancel_completion
 from modules.module_tts import play_audio_chunks
 from modules.module_messageQue import queue_message
 
@@ -34,6 +34,9 @@ CONFIG = load_config()
 # Global Variables (if needed)
 stop_event = threading.Event()
 executor = concurrent.futures.ProcessPoolExecutor(max_workers=4)
+partial_queue = queue.Queue()  # Partial transcripts waiting to be posted to the chat UI
+partial_sender = None
+partial_sender_lock = threading.Lock()
 
 # === Threads ===
 def start_bt_controller_thread():
@@ -89,7 +92,7 @@ def wake_word_callback(wake_response):
     Parameters:
     - wake_response (str): The response to the wake word.
     """ 
-    asyncio.run(play_audio_chunks(wake_response, CONFIG['TTS']['ttsoption']))
+    asyncio.run(play_audio_chunks(wake_response, CONFIG['TTS']['ttsoption'], CONFIG['TTS']['lookahead']))
 
 def utterance_callback(message):
     """
@@ -117,6 +120,8 @@ def utterance_callback(message):
         
         # Process the message using process_completion
         reply = process_completion(message_dict['text'])  # Process the message
+        if reply is None:  # Failed, or cancelled because the user talked over it
+            return
 
         # Extract the <think> block if present
         try:
@@ -140,19 +145,63 @@ def utterance_callback(message):
         reply = re.sub(r'[^a-zA-Z0-9\s.,?!;:"\'-]', '', reply)
         
         # Stream TTS audio to speakers
-        asyncio.run(play_audio_chunks(reply, CONFIG['TTS']['ttsoption']))
+        asyncio.run(play_audio_chunks(reply, CONFIG['TTS']['ttsoption'], CONFIG['TTS']['lookahead']))
 
     except json.JSONDecodeError:
         queue_message("ERROR: Invalid JSON format. Could not process user message.")
     except Exception as e:
         queue_message(f"ERROR: {e}")
 
+def partial_utterance_callback(text):
+    """
+    Show the running transcript while the user is still speaking.
+
+    Parameters:
+    - text (str): Partial transcript, or "" once the final text is ready.
+    """
+    if text:
+        queue_message(f"PARTIAL: {text}")
+
+    # Start intent/memory work on the partial once it stops changing (if enabled)
+    speculate(text)
+
+    # Never hold up the transcription thread on the UI; one sender keeps the partials in order
+    global partial_sender
+    with partial_sender_lock:
+        if partial_sender is None:
+            partial_sender = threading.Thread(target=send_partials, name="PartialSenderThread", daemon=True)
+            partial_sender.start()
+    partial_queue.put(text)
+
+def send_partials():
+    """
+    Post queued partial transcripts to the chat UI one at a time. Each partial is
+    the whole running transcript, so if the UI falls behind only the newest is sent.
+    """
+    import requests
+    while True:
+        text = partial_queue.get()
+        while not partial_queue.empty():
+            text = partial_queue.get_nowait()
+        try:
+            requests.post("http://127.0.0.1:5012/stt_partial", json={"message": text, "final": not text}, timeout=1)
+        except Exception:
+            pass
+
+def barge_in_callback():
+    """
+    The user started talking over the reply. STTManager has already stopped the
+    audio; drop the LLM request still in flight so nothing more is said.
+    """
+    cancel_completion()
+
 def post_utterance_callback():
     """
-    Restart listening for another utterance after handling the current one.
+    Called once a reply has been delivered, right before STTManager opens the
+    follow-up window. Listening for the next utterance is driven by the STT
+    state machine itself, so nothing here re-enters transcription.
     """
-    global stt_manager
-    stt_manager._transcribe_utterance()
+    pass
 
 # === Initialization ===
 def initialize_managers(mem_manager, char_manager, stt_mgr):
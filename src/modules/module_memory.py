@@ -19,6 +19,7 @@ import numpy as np
 from modules.module_hyperdb import *
 from modules.module_config import load_config
 from modules.module_messageQue import queue_message
+from modules.module_warmup import register_warmup
 
 CONFIG = load_config()
 
@@ -40,6 +41,11 @@ class MemoryManager:
         
         # Initialize HyperDB with the RAG strategy
         self.hyper_db = HyperDB(rag_strategy=self.rag_strategy)
+
+        # Embedding and reranker models load in the background; memory reads wait for embeddings only
+        register_warmup("embeddings", get_embedding_model, lambda: get_embedding(["warmup"]), priority=5)
+        if self.rag_strategy == "hybrid":
+            register_warmup("reranker", self.hyper_db.load_reranker, self.hyper_db.warm_reranker, priority=15)
         self.long_mem_use = True
         self.initial_memory_path =  os.path.abspath(os.path.join(os.path.join("..", "memory", "initial_memory.json")))
         
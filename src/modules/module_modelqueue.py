@@ -0,0 +1,185 @@
+"""
+module_modelqueue.py
+
+Request queues with dynamic micro-batching for the TARS-AI server.
+
+Each model gets one ModelQueue. Request threads submit work and wait; a fixed
+number of worker threads take the oldest request, keep collecting more for up
+to `max_wait_ms` (or until `max_batch`), and run them through the model as one
+batch. When the queue is full new requests are refused with a suggested retry
+delay, so overload turns into fast 503s instead of unbounded tail latency.
+"""
+
+# === Standard Libraries ===
+import math
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, List, Optional
+
+import numpy as np
+
+
+class QueueFull(Exception):
+    """Raised by ModelQueue.submit() when the queue is at capacity."""
+
+    def __init__(self, name: str, retry_after: int):
+        super().__init__(f"{name} queue is full")
+        self.retry_after = retry_after
+
+
+class LatencyStats:
+    """
+    Counters and a window of recent latencies for one endpoint or queue.
+    """
+
+    def __init__(self, window: int = 500):
+        self.count = 0
+        self.errors = 0
+        self.rejected = 0
+        self._latencies = deque(maxlen=window)  # seconds
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, error: bool = False):
+        with self._lock:
+            self.count += 1
+            self.errors += int(error)
+            self._latencies.append(seconds)
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: requests, errors, rejected and p50/p95/p99 latency in ms over the window.
+        """
+        with self._lock:
+            latencies = np.array(self._latencies, dtype=np.float64) * 1000
+            stats = {"requests": self.count, "errors": self.errors, "rejected": self.rejected}
+        if latencies.size:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            stats.update({"p50_ms": round(float(p50), 1), "p95_ms": round(float(p95), 1), "p99_ms": round(float(p99), 1)})
+        return stats
+
+
+class ModelQueue:
+    """
+    Bounded request queue in front of one model, served by worker threads in micro-batches.
+    """
+
+    def __init__(self, name: str, handler: Callable[[List[Any]], List[Any]], workers: int = 1,
+                 max_batch: int = 8, max_wait_ms: int = 10, max_depth: int = 32):
+        """
+        Args:
+            name (str): Queue name used in metrics and errors.
+            handler (callable): Takes a list of payloads and returns one result per payload
+                (an Exception instance fails only that request).
+            workers (int): Worker threads calling the handler concurrently.
+            max_batch (int): Largest batch passed to the handler.
+            max_wait_ms (int): How long a worker waits for more requests to fill a batch.
+            max_depth (int): Requests waiting beyond which submit() raises QueueFull.
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_depth = max_depth
+        self.stats = LatencyStats()
+        self.batches = 0
+        self.batched_items = 0
+        self.max_depth_seen = 0
+        self._service_per_item = 0.0  # Moving average, seconds
+        self._queue = queue.Queue()
+        for index in range(workers):
+            threading.Thread(target=self._worker, name=f"{name}-worker-{index}", daemon=True).start()
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least 1."""
+        backlog = self.depth * self._service_per_item / max(1, self.workers)
+        return max(1, math.ceil(backlog))
+
+    def admit(self):
+        """Raise QueueFull if a new request would not be accepted now."""
+        if self.depth >= self.max_depth:
+            self.stats.reject()
+            raise QueueFull(self.name, self.retry_after())
+
+    def submit(self, payload: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Queue a request and wait for its result.
+
+        Args:
+            payload: Passed to the handler as one element of a batch.
+            timeout (float): Seconds to wait for the result, or None.
+
+        Returns:
+            The handler's result for this payload.
+        """
+        self.admit()
+        item = {"payload": payload, "queued": time.monotonic(), "done": threading.Event(),
+                "result": None, "error": None}
+        self._queue.put(item)
+        self.max_depth_seen = max(self.max_depth_seen, self.depth)
+        if not item["done"].wait(timeout):
+            raise TimeoutError(f"{self.name} request timed out")
+        if item["error"] is not None:
+            raise item["error"]
+        return item["result"]
+
+    def _worker(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._run(batch)
+
+    def _run(self, batch: list):
+        started = time.monotonic()
+        try:
+            results = self.handler([item["payload"] for item in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"{self.name} handler returned {len(results)} results for {len(batch)} requests")
+        except Exception as e:
+            results = [e] * len(batch)
+
+        finished = time.monotonic()
+        per_item = (finished - started) / len(batch)
+        self._service_per_item = per_item if not self.batches else 0.8 * self._service_per_item + 0.2 * per_item
+        self.batches += 1
+        self.batched_items += len(batch)
+        for item, result in zip(batch, results):
+            if isinstance(result, Exception):
+                item["error"] = result
+            else:
+                item["result"] = result
+            self.stats.record(finished - item["queued"], error=isinstance(result, Exception))
+            item["done"].set()
+
+    def metrics(self) -> dict:
+        """
+        Returns:
+            dict: queue depth, worker and batch settings, average batch size and latency stats.
+        """
+        return {
+            "depth": self.depth,
+            "max_depth_seen": self.max_depth_seen,
+            "capacity": self.max_depth,
+            "workers": self.workers,
+            "batches": self.batches,
+            "average_batch": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "service_ms_per_item": round(self._service_per_item * 1000, 1),
+            **self.stats.snapshot(),
+        }
@@ -1,15 +1,15 @@
-import sounddevice as sd
 import soundfile as sf
 from io import BytesIO
-from piper.voice import PiperVoice
 import wave
-import re
 import os
 import ctypes
+import threading
 
 # === Custom Modules ===
 from modules.module_config import load_config
 from modules.module_messageQue import queue_message
+from modules.module_ttschunker import chunk_text
+from modules.module_warmup import register_warmup
 
 CONFIG = load_config()
 
@@ -25,15 +25,41 @@ def py_error_handler(filename, line, function, err, fmt):
 # Create a C-compatible function pointer
 c_error_handler = ERROR_HANDLER_FUNC(py_error_handler)
 
-# Load the ALSA library
-asound = ctypes.cdll.LoadLibrary('libasound.so')
+# Load the ALSA library (not present on headless machines)
+try:
+    asound = ctypes.cdll.LoadLibrary('libasound.so')
+except OSError:
+    asound = None
 
-# Load the Piper model globally
+# The Piper model is loaded once, by the warmup thread or on first use
 script_dir = os.path.dirname(__file__)
 model_path = os.path.join(script_dir, '..', 'tts/TARS.onnx')
+voice = None
+_voice_lock = threading.Lock()
+
+def get_voice():
+    """
+    Return the Piper voice, loading it on first use.
+    """
+    global voice
+    with _voice_lock:
+        if voice is None:
+            from piper.voice import PiperVoice
+            voice = PiperVoice.load(model_path)
+    return voice
+
+def warm_voice():
+    """
+    Synthesize a short test phrase with the Piper voice into a throwaway WAV.
+    """
+    with wave.open(BytesIO(), 'wb') as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(get_voice().config.sample_rate)
+        get_voice().synthesize("Ready.", wav_file)
 
 if CONFIG['TTS']['ttsoption'] == 'piper':
-    voice = PiperVoice.load(model_path)
+    register_warmup("piper", get_voice, warm_voice, priority=5)
 
 async def synthesize(voice, chunk):
     """
@@ -56,10 +82,10 @@ async def text_to_speech_with_pipelining_piper(text):
     Converts text to speech using the Piper model and streams audio as it's generated.
     """
     # Split text into smaller chunks
-    chunks = re.split(r'(?<=\.)\s', text)  # Split at sentence boundaries
+    chunks = chunk_text(text)  # Short first chunk, then balanced sentences
 
     # Yield each audio chunk as soon as it's ready
     for chunk in chunks:
         if chunk.strip():  # Ignore empty chunks
-            wav_buffer = await synthesize(voice, chunk.strip())
+            wav_buffer = await synthesize(get_voice(), chunk.strip())
             yield wav_buffer  # Return the chunk for external playback
\ No newline at end of file
@@ -0,0 +1,274 @@
+"""
+module_playback.py
+
+Gapless speaker playback for TARS-AI.
+
+PlaybackEngine keeps one sounddevice OutputStream open for the life of the
+program. Speech from any producer is appended to a queue that the stream
+callback drains at the device's pace, so consecutive sentences follow each other
+sample-exactly instead of each reopening the device. Short UI cues (beeps) are
+mixed on top of whatever is playing. The engine counts underruns and reports how
+far playback has really got, from the device's own output timestamps.
+"""
+
+# === Standard Libraries ===
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+from modules.module_messageQue import queue_message
+from modules.module_resampler import PolyphaseResampler, resample
+
+
+def _to_float_mono(data: np.ndarray) -> np.ndarray:
+    """Mix to mono and convert int16 or float (-1..1) samples to float32 (-1..1)."""
+    data = np.asarray(data)
+    scale = 1.0 if data.dtype.kind == "f" else 1 / 32768.0
+    if data.ndim > 1:
+        data = data.mean(axis=1)
+    return (data * scale).astype(np.float32, copy=False)
+
+
+class PlaybackEngine:
+    """
+    One persistent output stream fed from a speech queue, with cues mixed on top.
+
+    Positions are counted in speech frames at the engine's sample rate: write()
+    returns where the new audio ends, and position() is the frame being heard now.
+    A reply runs from the first write() to drain() or flush(); if the queue runs
+    dry in between, the gap is counted as an underrun.
+    """
+
+    def __init__(self, sample_rate: int = 22050, blocksize: int = 512, reference=None):
+        """
+        Args:
+            sample_rate (int): Rate of the output stream; other rates are resampled.
+            blocksize (int): Frames per stream callback.
+            reference (PlaybackReference): Optional level envelope told when each chunk will be heard.
+        """
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self.reference = reference
+
+        self.underruns = 0  # Reply starved of speech
+        self.xruns = 0  # Device reported an output underflow
+        self.latency = 0.0  # Seconds from callback to the audio reaching the speaker
+
+        self._stream = None
+        self._lock = threading.Lock()
+        self._progress = threading.Condition(self._lock)
+        self._speech = deque()  # float32 arrays waiting to be played
+        self._offset = 0  # Frames of _speech[0] already played
+        self._cues = []  # [float32 array, frames already played]
+        self._resamplers = {}  # sample rate -> PolyphaseResampler for the speech stream
+        self._written = 0  # Speech frames queued since start
+        self._consumed = 0  # Speech frames handed to the device
+        self._blocks = deque(maxlen=64)  # (first speech frame, speech frames, monotonic time heard) per callback
+        self._in_reply = False
+        self._dry = False
+        self._reply_underruns = 0  # underruns when the current reply started
+
+    # === Stream ===
+
+    def start(self):
+        """Open the output stream; called on first use."""
+        import sounddevice as sd
+        with self._lock:
+            if self._stream is not None:
+                return
+            self._stream = sd.OutputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype="float32",
+                blocksize=self.blocksize,
+                latency="low",
+                callback=self._on_output,
+            )
+            self.latency = self._stream.latency
+        self._stream.start()
+        queue_message(f"INFO: Playback stream open at {self.sample_rate} Hz ({self.latency * 1000:.0f} ms latency).")
+
+    def close(self):
+        """Stop and close the output stream."""
+        with self._lock:
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                queue_message(f"ERROR: Closing the playback stream failed: {e}")
+
+    def _on_output(self, outdata, frames, time_info, status):
+        if status and status.output_underflow:
+            self.xruns += 1
+        out = np.zeros(frames, dtype=np.float32)
+        with self._lock:
+            start = self._consumed
+            filled = 0
+            while filled < frames and self._speech:
+                chunk = self._speech[0]
+                take = min(frames - filled, chunk.size - self._offset)
+                out[filled:filled + take] = chunk[self._offset:self._offset + take]
+                filled += take
+                self._offset += take
+                if self._offset >= chunk.size:
+                    self._speech.popleft()
+                    self._offset = 0
+            self._consumed += filled
+            if filled < frames and self._in_reply and not self._dry:
+                self._dry = True
+                self.underruns += 1
+
+            for cue in self._cues:
+                samples, played = cue
+                take = min(frames, samples.size - played)
+                out[:take] += samples[played:played + take]
+                cue[1] += take
+            self._cues = [cue for cue in self._cues if cue[1] < cue[0].size]
+
+            if time_info.outputBufferDacTime and time_info.currentTime:
+                self.latency = max(0.0, time_info.outputBufferDacTime - time_info.currentTime)
+            self._blocks.append((start, filled, time.monotonic() + self.latency))
+            self._progress.notify_all()
+        outdata[:, 0] = np.clip(out, -1.0, 1.0)
+
+    # === Speech ===
+
+    def _queued_seconds(self) -> float:
+        return (self._written - self._consumed) / self.sample_rate
+
+    def write(self, data: np.ndarray, sample_rate: int) -> int:
+        """
+        Append speech to the queue; returns immediately.
+
+        Args:
+            data (np.ndarray): int16 or float (-1..1) samples, mono or (frames, channels).
+            sample_rate (int): Sample rate of `data`.
+
+        Returns:
+            int: Speech position at which this audio will have finished playing.
+        """
+        self.start()
+        samples = _to_float_mono(data)
+        if sample_rate != self.sample_rate:
+            # Stateful per source rate, so a stream written in pieces has no seams
+            resampler = self._resamplers.get(sample_rate)
+            if resampler is None:
+                resampler = self._resamplers[sample_rate] = PolyphaseResampler(sample_rate, self.sample_rate)
+            samples = resampler.process(samples)
+        return self._enqueue(samples)
+
+    def _enqueue(self, samples: np.ndarray) -> int:
+        with self._lock:
+            starts = time.monotonic() + self._queued_seconds() + self.latency
+            if samples.size:
+                self._speech.append(samples)
+                self._written += samples.size
+                if not self._in_reply:
+                    self._in_reply = True
+                    self._reply_underruns = self.underruns
+                self._dry = False
+            end = self._written
+        if self.reference is not None and samples.size:
+            self.reference.add(samples, self.sample_rate, starts)
+        return end
+
+    def position(self) -> int:
+        """Speech frame being heard from the speaker right now."""
+        now = time.monotonic()
+        with self._lock:
+            # Newest block that has started reaching the speaker
+            for start, filled, heard in reversed(self._blocks):
+                if heard <= now:
+                    return start + min(filled, int((now - heard) * self.sample_rate))
+            return self._blocks[0][0] if self._blocks else 0
+
+    def wait_until(self, position: int, cancel: Optional[threading.Event] = None, timeout: Optional[float] = None) -> bool:
+        """
+        Block until speech `position` has been heard.
+
+        Args:
+            position (int): Speech frame to wait for, e.g. as returned by write().
+            cancel (threading.Event): Stop waiting when set.
+            timeout (float): Give up after this many seconds.
+
+        Returns:
+            bool: True if the position was reached.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.position() < position:
+            if cancel is not None and cancel.is_set():
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            with self._progress:
+                if self._written < position or self._stream is None:
+                    return False  # Flushed, or nothing left that could get there
+                self._progress.wait(0.05)
+        return True
+
+    def drain(self, cancel: Optional[threading.Event] = None):
+        """
+        End the reply: play out everything queued and wait until it has been heard.
+        """
+        tails = [resampler.flush() for resampler in self._resamplers.values()]
+        self._resamplers.clear()
+        end = self._enqueue(np.concatenate(tails)) if tails else self._written
+        with self._lock:
+            # Running out of speech from here on is the end of the reply, not an underrun
+            underruns = self.underruns - self._reply_underruns if self._in_reply else 0
+            self._in_reply = False
+        if underruns:
+            queue_message(f"WARNING: Playback ran dry {underruns} time(s) during the reply.")
+        self.wait_until(end, cancel, timeout=self._queued_seconds() + self.latency + 1.0)
+
+    def flush(self):
+        """Drop all queued speech at once (cues keep playing) and end the reply."""
+        with self._lock:
+            self._speech.clear()
+            self._offset = 0
+            self._written = self._consumed
+            self._in_reply = False
+            self._progress.notify_all()
+        self._resamplers.clear()
+
+    # === Cues ===
+
+    def play_cue(self, data: np.ndarray, sample_rate: int) -> float:
+        """
+        Mix a short sound on top of whatever is playing; returns immediately.
+
+        Returns:
+            float: time.monotonic() at which the cue will have been heard.
+        """
+        self.start()
+        samples = _to_float_mono(data)
+        if sample_rate != self.sample_rate:
+            samples = resample(samples, sample_rate, self.sample_rate)
+        with self._lock:
+            starts = time.monotonic() + self.latency
+            self._cues.append([samples, 0])
+        if self.reference is not None:
+            self.reference.add(samples, self.sample_rate, starts)
+        return starts + samples.size / self.sample_rate
+
+    # === Metrics ===
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: underruns, device xruns, latency, seconds heard and seconds still queued.
+        """
+        with self._lock:
+            queued = self._queued_seconds()
+        return {
+            "underruns": self.underruns,
+            "xruns": self.xruns,
+            "latency_ms": round(self.latency * 1000, 1),
+            "position_s": round(self.position() / self.sample_rate, 3),
+            "queued_s": round(queued, 3),
+        }
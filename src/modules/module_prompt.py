@@ -9,7 +9,7 @@ import os
 from modules.module_engine import check_for_module
 from modules.module_messageQue import queue_message
 
-def build_prompt(user_prompt, character_manager, memory_manager, config, debug=False):
+def build_prompt(user_prompt, character_manager, memory_manager, config, debug=False, prefetched=None):
     """
     Build a dynamically optimized prompt for the LLM backend.
 
@@ -19,6 +19,8 @@ def build_prompt(user_prompt, character_manager, memory_manager, config, debug=F
     - memory_manager: The MemoryManager instance.
     - config (dict): Configuration dictionary.
     - debug (bool): If True, print debug information.
+    - prefetched (dict): Optional "intent" (class, probability) and "past_memory"
+      already computed for this input, which are then not recomputed.
 
     Returns:
     - str: The formatted prompt for the LLM backend.
@@ -27,7 +29,8 @@ def build_prompt(user_prompt, character_manager, memory_manager, config, debug=F
     dtg = f"Current Date: {now.strftime('%m/%d/%Y')}\nCurrent Time: {now.strftime('%H:%M:%S')}\n"
     user_name = config['CHAR']['user_name']
     char_name = character_manager.char_name
-    functioncall = check_for_module(user_prompt)
+    prefetched = prefetched or {}
+    functioncall = check_for_module(user_prompt, prefetched.get("intent"))
 
     # Construct persona traits
     persona_traits = "\n".join(
@@ -49,7 +52,8 @@ def build_prompt(user_prompt, character_manager, memory_manager, config, debug=F
 
     # Dynamically append memory and examples
     final_prompt = append_memory_and_examples(
-        base_prompt, user_prompt, memory_manager, config, character_manager, functioncall
+        base_prompt, user_prompt, memory_manager, config, character_manager, functioncall,
+        prefetched.get("past_memory")
     )
 
     final_prompt = inject_dynamic_values(final_prompt, user_name, char_name)
@@ -78,7 +82,8 @@ def clean_text(text):
             .strip()
     )
 
-def append_memory_and_examples(base_prompt, user_prompt, memory_manager, config, character_manager, functioncall):
+def append_memory_and_examples(base_prompt, user_prompt, memory_manager, config, character_manager, functioncall,
+                               past_memory=None):
     """
     Append short-term memory and example dialog to the prompt based on token availability.
 
@@ -89,12 +94,15 @@ def append_memory_and_examples(base_prompt, user_prompt, memory_manager, config,
     - config (dict): Configuration dictionary.
     - character_manager: The CharacterManager instance.
     - functioncall (str): The function determined by the input.
+    - past_memory (str): Long-term memory already retrieved for this input.
 
     Returns:
     - str: The full prompt with memory and examples included.
     """
     # Prepare memory and examples
-    past_memory = clean_text(memory_manager.get_longterm_memory(user_prompt))
+    if past_memory is None:
+        past_memory = memory_manager.get_longterm_memory(user_prompt)
+    past_memory = clean_text(past_memory)
     short_term_memory = ""
     example_dialog = ""
 
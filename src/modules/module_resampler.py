@@ -0,0 +1,164 @@
+"""
+module_resampler.py
+
+Streaming polyphase resampler for TARS-AI.
+
+Filter kernels are designed once per rate pair and cached, and each resampler
+keeps just enough input history to process audio block by block as it is
+captured. Resampling is therefore already finished when an utterance ends,
+without pulling librosa onto the speech path.
+"""
+
+# === Standard Libraries ===
+import math
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=16)
+def design_polyphase_filter(up: int, down: int, zero_crossings: int = 8,
+                            rolloff: float = 0.945, beta: float = 8.0):
+    """
+    Design a Kaiser-windowed sinc low-pass filter split into polyphase branches.
+
+    Parameters:
+    - up (int): Interpolation factor (already reduced by the gcd).
+    - down (int): Decimation factor (already reduced by the gcd).
+    - zero_crossings (int): Sinc zero crossings kept on each side of the centre.
+    - rolloff (float): Cutoff as a fraction of the lower Nyquist frequency.
+    - beta (float): Kaiser window shape.
+
+    Returns:
+    - tuple: (phases, delay) where phases has shape (up, taps) and delay is the
+      filter's group delay in output samples.
+    """
+    cutoff = rolloff / max(up, down)  # relative to the upsampled Nyquist frequency
+    # Centre the kernel on a multiple of `down` so the delay is a whole number of output samples
+    half_length = int(math.ceil(zero_crossings / cutoff / down)) * down
+    length = 2 * half_length + 1
+    taps = int(math.ceil(length / up))
+
+    k = np.arange(taps * up, dtype=np.float64)
+    centre = half_length
+    kernel = cutoff * np.sinc(cutoff * (k - centre)) * up
+    window = np.zeros_like(kernel)
+    window[:length] = np.kaiser(length, beta)
+    kernel *= window
+
+    # phases[p, j] = kernel[p + j * up]
+    phases = kernel.reshape(taps, up).T.astype(np.float32)
+    phases.setflags(write=False)
+    delay = centre // down
+    return phases, delay
+
+
+class PolyphaseResampler:
+    """
+    Stateful rational-ratio resampler fed with consecutive blocks of audio.
+    """
+
+    MAX_BLOCK = 16384  # Input samples processed per vectorized step
+
+    def __init__(self, orig_sr: int, target_sr: int):
+        """
+        Args:
+            orig_sr (int): Input sample rate.
+            target_sr (int): Output sample rate.
+        """
+        g = math.gcd(int(orig_sr), int(target_sr))
+        self.orig_sr = int(orig_sr)
+        self.target_sr = int(target_sr)
+        self.up = self.target_sr // g
+        self.down = self.orig_sr // g
+        self.phases, self.delay = design_polyphase_filter(self.up, self.down)
+        self.taps = self.phases.shape[1]
+        self._tap_offsets = np.arange(self.taps)
+        self.reset()
+
+    def reset(self):
+        """Forget all history, e.g. before a new utterance."""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._in_count = 0
+        self._out_count = 0
+        self._skip = self.delay
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Resample the next block of a stream.
+
+        Parameters:
+        - block (np.ndarray): Samples at orig_sr (any numeric dtype, any shape).
+
+        Returns:
+        - np.ndarray: float32 samples at target_sr, on the same scale as the input.
+        """
+        block = np.asarray(block, dtype=np.float32).reshape(-1)
+        if self.up == self.down:
+            return block.copy()
+
+        outputs = [self._process_chunk(block[start:start + self.MAX_BLOCK])
+                   for start in range(0, block.size, self.MAX_BLOCK)]
+        if not outputs:
+            return np.zeros(0, dtype=np.float32)
+        out = outputs[0] if len(outputs) == 1 else np.concatenate(outputs)
+
+        if self._skip:
+            dropped = min(self._skip, out.size)
+            self._skip -= dropped
+            out = out[dropped:]
+        return out
+
+    def _process_chunk(self, block: np.ndarray) -> np.ndarray:
+        buffer = np.concatenate((self._history, block))
+        last_input = self._in_count + block.size - 1
+        out_end = ((last_input + 1) * self.up + self.down - 1) // self.down
+
+        n = np.arange(self._out_count, out_end)
+        t = n * self.down
+        phase = t % self.up
+        # Index of each output's newest input sample, relative to `buffer`
+        newest = t // self.up - (self._in_count - (self.taps - 1))
+        frames = buffer[newest[:, None] - self._tap_offsets[None, :]]
+        out = np.einsum("ij,ij->i", self.phases[phase], frames)
+
+        self._history = buffer[buffer.size - (self.taps - 1):].copy()
+        self._in_count += block.size
+        self._out_count = out_end
+        return out.astype(np.float32, copy=False)
+
+    def flush(self) -> np.ndarray:
+        """
+        Push out the samples still held back by the filter delay.
+        """
+        if self.up == self.down:
+            return np.zeros(0, dtype=np.float32)
+        tail_inputs = int(math.ceil(self.delay * self.down / self.up)) + 1
+        return self.process(np.zeros(tail_inputs, dtype=np.float32))
+
+    def process_int16(self, block: np.ndarray) -> np.ndarray:
+        """Resample int16 audio, returning int16."""
+        return np.clip(self.process(block), -32768, 32767).astype(np.int16)
+
+    def flush_int16(self) -> np.ndarray:
+        """int16 counterpart of flush()."""
+        return np.clip(self.flush(), -32768, 32767).astype(np.int16)
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """
+    One-shot resampling of a complete signal.
+
+    Parameters:
+    - audio (np.ndarray): Mono samples at orig_sr.
+    - orig_sr (int): Input sample rate.
+    - target_sr (int): Output sample rate.
+
+    Returns:
+    - np.ndarray: float32 samples at target_sr.
+    """
+    if orig_sr == target_sr:
+        return np.asarray(audio, dtype=np.float32).reshape(-1)
+    resampler = PolyphaseResampler(orig_sr, target_sr)
+    head = resampler.process(audio)
+    return np.concatenate((head, resampler.flush()))
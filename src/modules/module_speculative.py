@@ -0,0 +1,197 @@
+"""
+module_speculative.py
+
+Speculative turn pre-work for TARS-AI.
+
+While the user is still finishing a sentence, streaming STT already has a partial
+transcript. Once that partial has stopped changing for a moment, intent
+classification and long-term memory retrieval (and optionally the LLM request)
+are started on it. When the final transcript arrives the work is committed if
+the text is close enough to what was speculated on, and discarded otherwise.
+Tools themselves are never run speculatively, only on the final text.
+"""
+
+# === Standard Libraries ===
+import difflib
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from modules.module_messageQue import queue_message
+
+
+def _words(text: str) -> list:
+    return re.sub(r"[^\w' ]", " ", text.lower()).split()
+
+
+def text_similarity(a: str, b: str) -> float:
+    """
+    Word-level similarity of two transcripts, ignoring case and punctuation.
+
+    Returns:
+    - float: 1.0 for identical word sequences, down to 0.0.
+    """
+    words_a, words_b = _words(a), _words(b)
+    if not words_a and not words_b:
+        return 1.0
+    return difflib.SequenceMatcher(None, words_a, words_b, autojunk=False).ratio()
+
+
+class SpeculativeRunner:
+    """
+    Runs intent, memory and optional LLM work on stable partial transcripts.
+    """
+
+    def __init__(self, intent_fn: Optional[Callable], memory_fn: Callable, llm_fn: Optional[Callable] = None,
+                 similarity: float = 0.9, stable_ms: int = 300, max_age_s: float = 10.0):
+        """
+        Args:
+            intent_fn (callable): text -> (predicted class or None, probability); must have no side
+                effects. If None, intent is classified on the final text only and llm_fn is not used.
+            memory_fn (callable): text -> long-term memory string for the prompt.
+            llm_fn (callable): (text, prefetched dict) -> reply; only called when no tool was predicted.
+            similarity (float): Minimum text_similarity() for the final text to reuse the work.
+            stable_ms (int): How long a partial must stay unchanged before work starts on it.
+            max_age_s (float): Speculation older than this is never committed.
+        """
+        self.intent_fn = intent_fn
+        self.memory_fn = memory_fn
+        self.llm_fn = llm_fn if intent_fn else None  # Without an intent a tool may still be needed
+        self.similarity = similarity
+        self.stable_s = stable_ms / 1000
+        self.max_age_s = max_age_s
+        self._executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="Speculative")
+        self._lock = threading.Lock()
+        self._timer = None
+        self._current = None  # dict describing the running speculation
+        self.stats = {"turns": 0, "speculated": 0, "hits": 0, "misses": 0, "superseded": 0,
+                      "llm_hits": 0, "saved_ms": 0.0, "wait_ms": 0.0}
+
+    def on_partial(self, text: str):
+        """
+        Feed the running transcript. Work starts once it has been stable for `stable_ms`.
+        An empty string (the final transcript is being produced) only stops the timer.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not text.strip():
+                return
+            if self._current is not None and self._current["text"] == text:
+                return
+            self._timer = threading.Timer(self.stable_s, self._start, args=(text,))
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _start(self, text: str):
+        with self._lock:
+            self._timer = None
+            if self._current is not None:
+                self._current["cancelled"].set()
+                self.stats["superseded"] += 1
+            spec = {
+                "text": text,
+                "start": time.monotonic(),
+                "done": None,
+                "cancelled": threading.Event(),
+            }
+            spec["intent"] = self._executor.submit(self.intent_fn, text) if self.intent_fn else None
+            spec["memory"] = self._executor.submit(self.memory_fn, text)
+            spec["llm"] = self._executor.submit(self._run_llm, spec) if self.llm_fn else None
+            self._current = spec
+            self.stats["speculated"] += 1
+        for future in (spec["intent"], spec["memory"], spec["llm"]):
+            if future is not None:
+                future.add_done_callback(lambda _, spec=spec: self._mark_done(spec))
+
+    def _run_llm(self, spec: dict):
+        predicted_class, _ = spec["intent"].result()
+        if predicted_class or spec["cancelled"].is_set():
+            # A tool has to run on the final text first; its result is part of the prompt
+            return None
+        prefetched = {"intent": (predicted_class, None), "past_memory": spec["memory"].result()}
+        return self.llm_fn(spec["text"], prefetched)
+
+    def _mark_done(self, spec: dict):
+        futures = [f for f in (spec["intent"], spec["memory"], spec["llm"]) if f is not None]
+        if spec["done"] is None and all(f.done() for f in futures):
+            spec["done"] = time.monotonic()
+
+    def cancel(self):
+        """Discard any pending or running speculation."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._current is not None:
+                self._current["cancelled"].set()
+                self._current = None
+
+    def take(self, final_text: str) -> Optional[dict]:
+        """
+        Commit the speculation if it was made on (nearly) the final text.
+
+        Args:
+            final_text (str): The final transcript of the turn.
+
+        Returns:
+            dict or None: {"intent", "past_memory", "reply"} on a hit (reply may be
+            None), or None if there was nothing usable.
+        """
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            spec, self._current = self._current, None
+            self.stats["turns"] += 1
+        if spec is None:
+            return None
+
+        now = time.monotonic()
+        score = text_similarity(spec["text"], final_text)
+        if now - spec["start"] > self.max_age_s or score < self.similarity:
+            spec["cancelled"].set()
+            self.stats["misses"] += 1
+            queue_message(f"INFO: Speculation miss ({score:.2f} similar, hit rate "
+                          f"{self.get_stats()['hit_rate']:.0%}): '{spec['text']}'")
+            return None
+
+        try:
+            result = {
+                "intent": spec["intent"].result() if spec["intent"] is not None else None,
+                "past_memory": spec["memory"].result(),
+                "reply": spec["llm"].result() if spec["llm"] is not None else None,
+            }
+        except Exception as e:
+            self.stats["misses"] += 1
+            queue_message(f"WARNING: Speculative work failed: {e}")
+            return None
+
+        # Time the final turn no longer has to spend: work that overlapped the user's speech
+        done = spec["done"] or time.monotonic()
+        saved_ms = 1000 * (min(now, done) - spec["start"])
+        wait_ms = 1000 * max(0.0, done - now)
+        self.stats["hits"] += 1
+        self.stats["saved_ms"] += saved_ms
+        self.stats["wait_ms"] += wait_ms
+        if result["reply"] is not None:
+            self.stats["llm_hits"] += 1
+        queue_message(f"INFO: Speculation hit ({score:.2f} similar), saved {saved_ms:.0f} ms, "
+                      f"waited {wait_ms:.0f} ms, hit rate {self.get_stats()['hit_rate']:.0%}.")
+        return result
+
+    def get_stats(self) -> dict:
+        """
+        Hit rate and latency saved over all turns.
+
+        Returns:
+            dict: counters, hit_rate (hits per speculated turn) and average_saved_ms per hit.
+        """
+        stats = dict(self.stats)
+        decided = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / decided if decided else 0.0
+        stats["average_saved_ms"] = stats["saved_ms"] / stats["hits"] if stats["hits"] else 0.0
+        return stats
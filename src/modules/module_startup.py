@@ -0,0 +1,159 @@
+"""
+module_startup.py
+
+Startup profiling for TARS-AI.
+
+Heavy third-party modules are imported through `timed_import` and model loads are
+wrapped in `timed_step`, so every start can print how long each one took and how
+much resident memory it added. Regressions in cold-start time show up in the log
+instead of being noticed on the Pi weeks later.
+"""
+
+# === Standard Libraries ===
+import importlib
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from modules.module_messageQue import queue_message
+
+# === Constants and Globals ===
+PROCESS_START = time.monotonic()
+STARTUP_RECORDS = []  # One dict per import or step, in completion order
+_records_lock = threading.Lock()
+
+
+# === Helper Functions ===
+def current_rss_mb() -> float:
+    """
+    Resident set size of this process in MB.
+
+    Returns:
+    - float: Current RSS (peak RSS where /proc is unavailable), or 0.0 if unknown.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS reports bytes
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return 0.0
+
+
+def peak_rss_mb() -> float:
+    """
+    Highest resident set size this process has reached, in MB.
+
+    Returns:
+    - float: Peak RSS, or 0.0 if unknown.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except Exception:
+        return 0.0
+
+
+def _record(kind: str, name: str, started: float, seconds: float, rss_delta: float, error: str = None):
+    with _records_lock:
+        STARTUP_RECORDS.append({
+            "kind": kind,
+            "name": name,
+            "start": started - PROCESS_START,
+            "seconds": seconds,
+            "rss_delta_mb": rss_delta,
+            "thread": threading.current_thread().name,
+            "error": error,
+        })
+
+
+def timed_import(module_name: str):
+    """
+    Import a module and record how long it took and how much memory it added.
+
+    Modules that are already loaded are returned without being recorded.
+
+    Parameters:
+    - module_name (str): Dotted module name, e.g. "faster_whisper".
+
+    Returns:
+    - module: The imported module.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+
+    rss_before = current_rss_mb()
+    started = time.monotonic()
+    try:
+        module = importlib.import_module(module_name)
+    except Exception as e:
+        _record("import", module_name, started, time.monotonic() - started,
+                current_rss_mb() - rss_before, error=str(e))
+        raise
+    _record("import", module_name, started, time.monotonic() - started, current_rss_mb() - rss_before)
+    return module
+
+
+@contextmanager
+def timed_step(name: str):
+    """
+    Record the duration and memory growth of a startup step such as a model load.
+
+    Parameters:
+    - name (str): Label shown in the startup report.
+    """
+    rss_before = current_rss_mb()
+    started = time.monotonic()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = str(e)
+        raise
+    finally:
+        _record("step", name, started, time.monotonic() - started, current_rss_mb() - rss_before, error=error)
+
+
+def get_startup_records() -> list:
+    """Copy of everything recorded so far."""
+    with _records_lock:
+        return list(STARTUP_RECORDS)
+
+
+def report_startup(title: str = "Startup report"):
+    """
+    Print recorded imports and steps, slowest first, followed by the totals.
+    """
+    records = get_startup_records()
+    if not records:
+        return
+
+    queue_message(f"INFO: {title} ({time.monotonic() - PROCESS_START:.2f}s since start, "
+                  f"RSS {current_rss_mb():.0f} MB)")
+    for record in sorted(records, key=lambda r: r["seconds"], reverse=True):
+        status = f"  FAILED: {record['error']}" if record["error"] else ""
+        queue_message(f"INFO:   {record['kind']:<6} {record['name']:<32} "
+                      f"{record['seconds'] * 1000:8.0f} ms  {record['rss_delta_mb']:+7.1f} MB{status}")
+
+    imports = [r for r in records if r["kind"] == "import"]
+    steps = [r for r in records if r["kind"] == "step"]
+    queue_message(f"INFO:   imports {sum(r['seconds'] for r in imports):.2f}s / "
+                  f"{sum(r['rss_delta_mb'] for r in imports):+.1f} MB, "
+                  f"steps {sum(r['seconds'] for r in steps):.2f}s / "
+                  f"{sum(r['rss_delta_mb'] for r in steps):+.1f} MB")
@@ -13,33 +13,38 @@ import os
 import random
 import threading
 import time
-import wave
-import json
 import sys
-from io import BytesIO
+from collections import deque
+from enum import Enum
 from typing import Callable, Optional
 
-import torch
-import torchaudio  # Faster than librosa for resampling
-import librosa
 import numpy as np
-import sounddevice as sd
-import soundfile as sf
-
-from vosk import Model, KaldiRecognizer, SetLogLevel
-from pocketsphinx import LiveSpeech
-from faster_whisper import WhisperModel
-import requests
 
 from modules.module_messageQue import queue_message
 from modules.module_config import load_config
+from modules.module_audiobuffer import MicrophoneBroker, UtteranceBuffer
+from modules.module_audioio import create_audio_source, get_audio_sink
+from modules.module_resampler import PolyphaseResampler
+from modules.module_vad import BargeInDetector, EnergyGate, NoiseFloorTracker, Endpointer
+from modules.module_wakeword import create_wake_word_engine
+from modules.module_startup import timed_import
+from modules.module_sttbackends import create_stt_backend, create_vad_backend
+from modules.module_sttstream import ServerStreamingTranscription, StreamingTranscription
+from modules.module_warmup import register_warmup, start_warmup, is_ready, wait_until_ready
 
 CONFIG = load_config()
 
-# Suppress Vosk logs and parallelism warnings
-SetLogLevel(-1)
+# Suppress parallelism warnings
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
+class ConversationState(Enum):
+    """Phases of a voice conversation handled by the STT loop."""
+    SLEEPING = "sleeping"
+    LISTENING = "listening"
+    TRANSCRIBING = "transcribing"
+    RESPONDING = "responding"
+    FOLLOW_UP_WINDOW = "follow_up_window"
+
 class STTManager:
     """
     Manages Speech-to-Text processing for TARS-AI.
@@ -58,7 +63,7 @@ class STTManager:
         "Finally, I was about to lose my mind.",
     ]
 
-    def __init__(self, config, shutdown_event: threading.Event, amp_gain: float = 4.0):
+    def __init__(self, config, shutdown_event: threading.Event, amp_gain: float = 4.0, shared_audio: bool = False):
         """
         Initialize the STTManager.
 
@@ -66,6 +71,7 @@ class STTManager:
             config (dict): Configuration dictionary.
             shutdown_event (threading.Event): Event to signal when to stop.
             amp_gain (float): Amplification gain for audio data.
+            shared_audio (bool): Capture into a shared memory ring other processes can read.
         """
         self.config = config
         self.shutdown_event = shutdown_event
@@ -77,6 +83,10 @@ class STTManager:
             self.SAMPLE_RATE = 16000
             self.DEFAULT_SAMPLE_RATE = 16000
             queue_message("INFO: Using 16000 Hz sample rate for VAD compatibility")
+        elif self.config["AUDIO"]["source"] != "mic":
+            # Recordings are resampled on load, so capture at the transcription rate
+            self.DEFAULT_SAMPLE_RATE = 16000
+            self.SAMPLE_RATE = 16000
         else:
             # If VAD is disabled, use system default
             self.DEFAULT_SAMPLE_RATE = 16000
@@ -85,47 +95,137 @@ class STTManager:
         self.amp_gain = amp_gain  # Microphone amplification multiplier
         self.silence_margin = 3.5  # Noise floor multiplier
         self.wake_silence_threshold = None
-        self.silence_threshold = None  # Updated after measuring background noise
+        self.silence_threshold = 10 * self.silence_margin  # Refreshed live by the noise floor tracker
+        self.noise_tracker = NoiseFloorTracker(block_s=0.1)
+        self._logged_threshold_db = None
         self.MAX_RECORDING_FRAMES = 100   # ~12.5 seconds
-        self.MAX_SILENT_FRAMES = CONFIG['STT']['speechdelay']
-        
+
+        # Shared microphone (or replayed recording): opened once, read by every stage through its own cursor
+        self.mic = MicrophoneBroker(self.SAMPLE_RATE, source=create_audio_source(config, self.SAMPLE_RATE),
+                                    shared=shared_audio)
+        self.preroll_samples = int(self.SAMPLE_RATE * CONFIG['STT']['preroll_ms'] / 1000)
+        self._listen_position = None  # Ring position where the next utterance starts
+
+        # Utterances are stored at DEFAULT_SAMPLE_RATE, resampled block by block while capturing
+        max_samples = self.MAX_RECORDING_FRAMES * 4000 * self.DEFAULT_SAMPLE_RATE // self.SAMPLE_RATE + 4000
+        self.utterance = UtteranceBuffer(max_samples)  # Reused every turn
+        self._capture_resampler = None
+        self._wake_resampler = None
+        if self.SAMPLE_RATE != self.DEFAULT_SAMPLE_RATE:
+            self._capture_resampler = PolyphaseResampler(self.SAMPLE_RATE, self.DEFAULT_SAMPLE_RATE)
+            self._wake_resampler = PolyphaseResampler(self.SAMPLE_RATE, 16000)
+        self.mic.start()
+
+        # Endpointing on 20-30 ms frames instead of 4000-sample blocks
+        self.endpointer = Endpointer(
+            self.SAMPLE_RATE,
+            frame_ms=CONFIG['STT']['frame_ms'],
+            speech_ms=CONFIG['STT']['speech_ms'],
+            hangover_ms=CONFIG['STT']['hangover_ms'],
+            timeout_ms=CONFIG['STT']['listen_timeout_ms'],
+            max_ms=self.MAX_RECORDING_FRAMES * 4000 * 1000 // self.SAMPLE_RATE,
+            early_endpoint=CONFIG['STT']['early_endpoint'],
+            early_hangover_ms=CONFIG['STT']['early_hangover_ms'],
+        )
+        self.endpoint_stats = deque(maxlen=50)
+
+        # Full duplex: keep listening while TARS speaks, ignoring its own voice
+        self.barge_in_detector = None
+        if CONFIG['STT']['barge_in']:
+            self.barge_in_detector = BargeInDetector(
+                self.SAMPLE_RATE,
+                frame_ms=CONFIG['STT']['frame_ms'],
+                confirm_ms=CONFIG['STT']['barge_in_ms'],
+                margin=CONFIG['STT']['barge_in_margin'],
+            )
+        self._barged_in = threading.Event()
+        self.barge_in_stats = deque(maxlen=50)
+
         # Callbacks
         self.wake_word_callback: Optional[Callable[[str], None]] = None
         self.utterance_callback: Optional[Callable[[str], None]] = None
         self.post_utterance_callback: Optional[Callable[[], None]] = None
+        self.partial_callback: Optional[Callable[[str], None]] = None
+        self.barge_in_callback: Optional[Callable[[], None]] = None
+        self.state_callback: Optional[Callable[["ConversationState"], None]] = None
+
+        # Conversation state machine
+        self.state = ConversationState.SLEEPING
+        self._state_since = time.monotonic()
+        self._state_totals = {}
+        self._state_transitions = deque(maxlen=50)
+
+        # Wake word: one engine for the whole session, behind an energy gate
+        self.wake_engine = None
+        self.wake_gate = None
+        self.wake_stats = {"audio_samples": 0, "spotted_samples": 0, "cpu_seconds": 0.0}
+        if CONFIG['STT']['wake_gate']:
+            self.wake_gate = EnergyGate(self.SAMPLE_RATE, margin=CONFIG['STT']['wake_gate_margin'])
 
         # Wake word and model settings
         self.WAKE_WORD = config.get("STT", {}).get("wake_word", "default_wake_word")
-        self.vosk_model = None
-        self.faster_whisper_model = None
-        self.silero_model = None  # For Silero STT (if used)
-        self.silero_vad_model = None
-        self.get_speech_timestamps = None
+        self.stt_backend = None  # Only the selected engine's modules are ever imported
+        self.stream_transcription = None
+        self._capture_stream = None
+        self._endpoint_time = None
+        self.transcription_stats = deque(maxlen=50)
+        self.vad_backend = None
+        self.streaming_vad = None
+        self.vadmethod = None
         self._initialize_models()
-        self.vadmethod = CONFIG['STT']['vad_method']
         self.DEBUG = False
 
     def _initialize_models(self):
         """
-        Measure background noise and load the selected STT model.
-        For "whisper" configuration, faster-whisper will be used.
+        Start background noise tracking and register the wake word, VAD and STT
+        models for background warmup. Each backend imports its heavy dependencies
+        only when it is selected, and the STT loop waits only for the models the
+        current state needs.
         """
-        self._measure_background_noise()
-        stt_processor = self.config.get("STT", {}).get("stt_processor", "vosk")
-        # Map "whisper" to "faster-whisper" for compatibility
-        if stt_processor in ["whisper", "faster-whisper"]:
-            self._load_fasterwhisper_model()
-        elif stt_processor == "silero":
-            self._load_silero_model()
-        else:
-            self._load_vosk_model()
+        self._start_noise_tracking()
+        register_warmup("wakeword", self._get_wake_engine, lambda: self.wake_engine.warmup(), priority=0)
+        register_warmup("vad", self._load_vad, self._warm_vad, priority=0)
+        register_warmup("stt", self._load_stt, lambda: self.stt_backend.warmup(), priority=0)
+
+    def _load_vad(self):
+        """Load the endpointing VAD (Silero instead of RMS if configured)."""
+        self.vad_backend = create_vad_backend(self.config, sample_rate=self.SAMPLE_RATE)
+        self.vadmethod = self.vad_backend.name
+
+    def _warm_vad(self):
+        """Warm the VAD, then hand it to the capture loop, which endpoints on energy alone until now."""
+        self.vad_backend.warmup()
+        self.streaming_vad = getattr(self.vad_backend, "streaming_vad", None)
+
+    def _load_stt(self):
+        """Load the selected STT backend and set up streaming transcription."""
+        self.stt_backend = create_stt_backend(
+            self.config, sample_rate=self.DEFAULT_SAMPLE_RATE, amp_gain=self.amp_gain
+        )
+
+        # Upload to the server while the user is talking; it decodes as the audio arrives
+        if self.stt_backend.ready and self.stt_backend.name == "external" and self.config["STT"]["external_streaming"]:
+            self.stream_transcription = ServerStreamingTranscription(
+                self.config["STT"]["external_url"], sample_rate=self.DEFAULT_SAMPLE_RATE
+            )
+            queue_message("INFO: Streaming audio to the STT server.")
+
+        # Re-decode while the user is talking so only the tail is left at the endpoint
+        elif self.config["STT"].get("stt_streaming"):
+            if self.stt_backend.ready and self.stt_backend.supports_streaming:
+                self.stream_transcription = StreamingTranscription(
+                    self.stt_backend,
+                    sample_rate=self.DEFAULT_SAMPLE_RATE,
+                    interval_ms=self.config["STT"].get("stream_interval_ms", 500),
+                    partial_callback=self._on_partial_transcript,
+                )
+                queue_message("INFO: Streaming transcription enabled.")
+            else:
+                queue_message(f"WARNING: {self.stt_backend.name} does not support streaming; using batch transcription.")
 
-        # Use Silero VAD instead of RMS (if configured)
-        if self.config["STT"].get("vad_enabled", False):
-            self._load_silero_vad()
-        
     def start(self):
         """Start the STT processing loop in a separate thread."""
+        start_warmup()  # No-op if the app already started it
         self.running = True
         self.thread = threading.Thread(
             target=self._stt_processing_loop, name="STTThread", daemon=True
@@ -137,361 +237,379 @@ class STTManager:
         self.running = False
         self.shutdown_event.set()
         self.thread.join()
+        self.mic.stop()
 
-    # === Model Loading Methods ===
-
-    def _download_vosk_model(self, url, dest_folder):
-        """Download the Vosk model from the specified URL with basic progress display."""
-        file_name = url.split("/")[-1]
-        dest_path = os.path.join(dest_folder, file_name)
-
-        queue_message(f"INFO: Downloading Vosk model from {url}...")
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-
-        total_size = int(response.headers.get('content-length', 0))
-        downloaded_size = 0
-
-        with open(dest_path, "wb") as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-                downloaded_size += len(chunk)
-        queue_message(f"INFO: Download complete. Extracting...")
-        if file_name.endswith(".zip"):
-            import zipfile
-            with zipfile.ZipFile(dest_path, 'r') as zip_ref:
-                zip_ref.extractall(dest_folder)
-            os.remove(dest_path)
-            queue_message(f"INFO: Zip file deleted.")
-        queue_message(f"INFO: Extraction complete.")
-
-    def _load_vosk_model(self):
-        """
-        Initialize the Vosk model for local STT transcription.
-        """
-        if self.config['STT']['stt_processor'] == 'vosk':
-            vosk_model_path = os.path.join(os.getcwd(), "..", "stt", self.config['STT']['vosk_model'])
-            if not os.path.exists(vosk_model_path):
-                queue_message(f"ERROR: Vosk model not found. Downloading...")
-                download_url = f"https://alphacephei.com/vosk/models/{self.config['STT']['vosk_model']}.zip"
-                self._download_vosk_model(download_url, os.path.join(os.getcwd(), "..", "stt"))
-                queue_message(f"INFO: Restarting model loading...")
-                self._load_vosk_model()
-                return
-
-            self.vosk_model = Model(vosk_model_path)
-            queue_message(f"INFO: Vosk model loaded successfully.")
-
-    def _load_fasterwhisper_model(self):
-        """Load the Faster-Whisper model for local transcription."""
-        try:
-            import warnings
-            warnings.filterwarnings("ignore", category=FutureWarning, module="torch")
-            original_torch_load = torch.load
-
-            def patched_torch_load(fp, map_location, *args, **kwargs):
-                return original_torch_load(fp, map_location=map_location, weights_only=True, *args, **kwargs)
-
-            torch.load = patched_torch_load
-
-            model_size = self.config["STT"].get("whisper_model", "tiny")
-            queue_message(f"INFO: Preparing to load Faster-Whisper model '{model_size}'...")
+    # === Transcription Methods ===
 
-            # Set up a folder for Whisper models inside the stt directory via environment variable.
-            whisper_folder = os.path.join(os.getcwd(), "..", "stt", "whisper")
-            os.makedirs(whisper_folder, exist_ok=True)
-            os.environ["HF_HUB_CACHE"] = whisper_folder
+    def _capture_utterance(self) -> Optional[UtteranceBuffer]:
+        """
+        Record the user's utterance from the shared microphone until the endpoint.
+        Audio is read in endpointer frames (20-30 ms) and copied straight into the
+        preallocated utterance buffer.
 
-            # Let faster-whisper handle the download automatically.
-            self.faster_whisper_model = WhisperModel(
-                model_size, device="cpu", compute_type="int8", num_workers=4
-            )
-            queue_message("INFO: Faster-Whisper model loaded successfully.")
-        except Exception as e:
-            queue_message(f"ERROR: Failed to load Faster-Whisper model: {e}")
-            self.faster_whisper_model = None
-        finally:
-            torch.load = original_torch_load
+        Returns:
+            UtteranceBuffer or None: The captured utterance, or None if nobody spoke.
+        """
+        processor = self.config["STT"].get("stt_processor", "vosk")
+        use_model_vad = processor != "vosk"  # force RMS as VAD doesnt like vosk
+
+        reader = self._listen_reader(processor)
+        turn_start = reader.position
+        if self.streaming_vad is not None:
+            self.streaming_vad.reset()
+        if self._capture_resampler is not None:
+            self._capture_resampler.reset()
+        self.utterance.reset()
+        stream = self.stream_transcription
+        self._capture_stream = stream  # Finalized by _transcribe_audio even if streaming was enabled mid-turn
+        if stream is not None:
+            stream.start(self.utterance)
+        endpointer = self.endpointer
+        endpointer.reset()
+        update_bar, clear_bar = self._init_progress_bar()
+        bar_step = 0
+        result = None
+
+        while result is None:
+            data = reader.read(endpointer.frame)
+            if data is None:
+                break
+
+            # Same decision as the old RMS check on amplified audio, refreshed with the noise floor
+            endpointer.threshold = self.silence_threshold * self.silence_margin / self.amp_gain
+            model_speech = self._model_speech(data) if use_model_vad else None
+            result = endpointer.process(data, model_speech)
+            if endpointer.detected_speech and self.state is ConversationState.FOLLOW_UP_WINDOW:
+                self._set_state(ConversationState.LISTENING)
+            self._append_utterance(data)
+            if stream is not None and endpointer.detected_speech:
+                stream.notify()
+
+            # Silence progress in tenths of the hangover, redrawn only when it changes
+            step = min(10, endpointer.silent_frames * 10 // endpointer.hangover_frames) if endpointer.detected_speech else 0
+            if step != bar_step:
+                if step:
+                    update_bar(step, 10)
+                else:
+                    clear_bar()
+                bar_step = step
+        if bar_step:
+            clear_bar()
+
+        if self._capture_resampler is not None:
+            self.utterance.append(self._capture_resampler.flush_int16())
+        self._endpoint_time = time.monotonic()
+        if result in (Endpointer.ENDPOINT, Endpointer.EARLY):
+            self._record_endpoint(result, turn_start + endpointer.speech_end_sample)
+        if not endpointer.detected_speech or self.utterance.length == 0:
+            if stream is not None:
+                stream.cancel()
+            return None
+        return self.utterance
 
-    def _load_silero_model(self):
-        """Load Silero STT model via Torch Hub into the stt folder (without a hub subfolder)."""
+    def _model_speech(self, data: np.ndarray) -> Optional[bool]:
+        """
+        Model VAD decision for a block, or None when only energy is used.
+        """
+        if self.streaming_vad is None:
+            return None
         try:
-            # Go one level up from the current directory
-            parent_dir = os.path.dirname(os.getcwd())
-            stt_folder = os.path.join(parent_dir, "stt")
-            os.makedirs(stt_folder, exist_ok=True)
-            # Override torch.hub.get_dir to return stt_folder directly.
-            import torch.hub
-            torch.hub.get_dir = lambda: stt_folder
-
-            self.silero_model, self.decoder, self.utils = torch.hub.load(
-                "snakers4/silero-models", model="silero_stt", language="en", device="cpu"
-            )
-            (
-                self.read_batch,
-                self.split_into_batches,
-                self.read_audio,
-                self.prepare_model_input,
-            ) = self.utils
-            queue_message("INFO: Silero model loaded successfully.")
+            return self.streaming_vad.is_speech(data)
         except Exception as e:
-            queue_message(f"ERROR: Failed to load Silero model: {e}")
+            queue_message(f"WARNING: Streaming VAD error, falling back to RMS: {e}")
+            self.streaming_vad = None
+            return None
 
-    def _load_silero_vad(self):
+    def _record_endpoint(self, reason: str, speech_end_position: int):
         """
-        Load the Silero VAD model using the pip package and optional ONNX support.
-        This loads the get_speech_timestamps function (instead of get_speech_ts).
+        Log how long after the end of speech the endpoint was reached, in wall time
+        (hangover plus any capture and processing delay).
         """
-        # You can set these values as needed.
-        USE_PIP = True  # download model using pip package
-        USE_ONNX = False
+        latency_ms = 1000 * (time.monotonic() - self.mic.time_of(speech_end_position))
+        self.endpoint_stats.append({"reason": reason, "latency_ms": latency_ms})
+        queue_message(f"INFO: Endpoint ({reason}) {latency_ms:.0f} ms after end of speech.")
 
-        if USE_PIP:
-            try:
-                from silero_vad import load_silero_vad, get_speech_timestamps
-                self.silero_vad_model = load_silero_vad(onnx=USE_ONNX)
-                self.get_speech_timestamps = get_speech_timestamps
-                queue_message("INFO: Silero VAD loaded successfully using pip package.")
-            except Exception as e:
-                queue_message(f"ERROR: Failed to load Silero VAD with pip: {e}")
-        else:
-            try:
-                self.silero_vad_model, utils = torch.hub.load(
-                    repo_or_dir='snakers4/silero-vad',
-                    model='silero_vad',
-                    force_reload=True,
-                    onnx=USE_ONNX
-                )
-                (get_speech_timestamps,
-                 save_audio,
-                 read_audio,
-                 VADIterator,
-                 collect_chunks) = utils
-                self.get_speech_timestamps = get_speech_timestamps
-                queue_message("INFO: Silero VAD loaded successfully using torch.hub.")
-            except Exception as e:
-                queue_message(f"ERROR: Failed to load Silero VAD with torch.hub: {e}")
+    def get_endpoint_stats(self) -> dict:
+        """
+        End-of-speech to endpoint latency over recent turns.
 
-    # === Transcription Methods ===
+        Returns:
+            dict: turns, last and average latency in ms, and the share of early endpoints.
+        """
+        turns = list(self.endpoint_stats)
+        if not turns:
+            return {"turns": 0}
+        latencies = [turn["latency_ms"] for turn in turns]
+        return {
+            "turns": len(turns),
+            "last_ms": latencies[-1],
+            "average_ms": sum(latencies) / len(latencies),
+            "early_ratio": sum(turn["reason"] == Endpointer.EARLY for turn in turns) / len(turns),
+        }
+
+    def _append_utterance(self, data: np.ndarray):
+        """
+        Store a captured block, resampling it to DEFAULT_SAMPLE_RATE as it arrives
+        so nothing is left to resample once the speaker stops.
+        """
+        if self._capture_resampler is not None:
+            data = self._capture_resampler.process_int16(data)
+        self.utterance.append(data)
 
-    def _transcribe_utterance(self):
-        """Transcribe the user's utterance using the selected STT processor."""
-        try:
-            # Map "whisper" to faster-whisper as well.
-            processor = self.config["STT"].get("stt_processor", "vosk")
-            if processor in ["whisper", "faster-whisper"]:
-                result = self._transcribe_with_faster_whisper()
-            elif processor == "silero":
-                result = self._transcribe_silero()
-            elif processor == "external":
-                result = self._transcribe_with_server()
-            else:
-                result = self._transcribe_with_vosk()
+    def _transcribe_audio(self, audio: UtteranceBuffer) -> Optional[str]:
+        """
+        Transcribe a captured utterance using the selected STT backend.
 
-            if self.post_utterance_callback and result:
-                self.post_utterance_callback()
+        Returns:
+            str or None: JSON message with a "text" field, or None if nothing was recognized.
+        """
+        mode = "batch"
+        message = None
+        try:
+            if self._capture_stream is not None:
+                mode = "streaming"
+                try:
+                    message = self._capture_stream.finalize()
+                except Exception as e:
+                    queue_message(f"WARNING: Streaming finalize failed, transcribing in batch: {e}")
+                    mode = "batch"
+            if mode == "batch":
+                trim_threshold = self.silence_threshold / 32768.0 if self.silence_threshold else None
+                message = self.stt_backend.transcribe(audio, trim_threshold)
         except Exception as e:
             queue_message(f"ERROR: Transcription failed: {e}")
-
-    def _transcribe_with_vosk(self):
-        """Transcribe audio using the local Vosk model."""
-        recognizer = KaldiRecognizer(self.vosk_model, self.SAMPLE_RATE)
-        recognizer.SetWords(False)
-        recognizer.SetPartialWords(False)
-
-        detected_speech = False
-        silent_frames = 0
-
-        with sd.InputStream(samplerate=self.SAMPLE_RATE,
-                            channels=1, dtype="int16",
-                            blocksize=4000, latency='high') as stream:
-            for _ in range(self.MAX_RECORDING_FRAMES):  # Limit recording duration (~12.5 seconds)
-                data, _ = stream.read(4000)
-                
-                is_silence, detected_speech, silent_frames = self._is_silence_detected_rms(data, detected_speech, silent_frames) #force RMS as VAD doesnt like vosk
-                if is_silence:
-                    if not detected_speech:
-                        return None
-                    break
-                
-                #write the audio data
-                data = self.amplify_audio(data) #amp the sound
-
-
-                if recognizer.AcceptWaveform(data.tobytes()):
-                    result = recognizer.Result()
-                    if self.utterance_callback:
-                        self.utterance_callback(result)
-                    return result
-        return None
-
-    def _transcribe_with_faster_whisper(self):
-        """Transcribe audio using Faster-Whisper."""
-        audio_buffer = BytesIO()
-        detected_speech = False
-        silent_frames = 0
-        max_silent_frames = self.MAX_SILENT_FRAMES
-
-        with sd.InputStream(
-            samplerate=self.SAMPLE_RATE, channels=1, dtype="int16"
-        ) as stream, wave.open(audio_buffer, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(self.SAMPLE_RATE)
-            for _ in range(self.MAX_RECORDING_FRAMES):
-                data, _ = stream.read(4000)
-
-                is_silence, detected_speech, silent_frames = self.voice_activity_detection_main(data, detected_speech, silent_frames)
-                if is_silence:
-                    if not detected_speech:
-                        return None
-                    break
-
-                wf.writeframes(data.tobytes())
-
-        audio_buffer.seek(0)
-        if audio_buffer.getbuffer().nbytes == 0:
-            queue_message("ERROR: No audio recorded.")
             return None
 
-        audio_data, sample_rate = sf.read(audio_buffer, dtype="float32")
-        audio_data = np.clip(audio_data, -1.0, 1.0)
-        if sample_rate != self.DEFAULT_SAMPLE_RATE:
-            audio_data = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=self.DEFAULT_SAMPLE_RATE)
+        self._record_transcription(mode)
+        return message
 
-        segments, _ = self.faster_whisper_model.transcribe(
-            audio_data, temperature=0.0, beam_size=1, language="en"
-        )
-        transcribed_text = " ".join(segment.text for segment in segments).strip()
-        if transcribed_text:
-            formatted_result = {"text": transcribed_text}
-            if self.utterance_callback:
-                self.utterance_callback(json.dumps(formatted_result))
-            return formatted_result
-        else:
-            queue_message("ERROR: No transcription from Faster-Whisper.")
-            return None
+    def _on_partial_transcript(self, text: str):
+        if self.partial_callback:
+            self.partial_callback(text)
 
-    def _transcribe_silero(self):
-        """Transcribe audio using Silero STT."""
-        audio_buffer = BytesIO()
-        detected_speech = False
-        silent_frames = 0
-
-        with sd.InputStream(
-            samplerate=self.SAMPLE_RATE, channels=1, dtype="int16", blocksize=4000
-        ) as stream, wave.open(audio_buffer, "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(self.SAMPLE_RATE)
-
-            for _ in range(self.MAX_RECORDING_FRAMES):
-                data, _ = stream.read(4000)
-                
+    def _record_transcription(self, mode: str):
+        """Log the gap between the endpoint and the final text for this turn."""
+        if self._endpoint_time is None:
+            return
+        gap_ms = 1000 * (time.monotonic() - self._endpoint_time)
+        self.transcription_stats.append({"mode": mode, "gap_ms": gap_ms})
+        queue_message(f"INFO: Final transcript {gap_ms:.0f} ms after endpoint ({mode}).")
 
-                is_silence, detected_speech, silent_frames = self.voice_activity_detection_main(data, detected_speech, silent_frames)
-                if is_silence:
-                    if not detected_speech:
-                        return None
-                    break
-                
-                #write the audio data
-                wf.writeframes(data.tobytes())
-    
-        audio_buffer.seek(0)
-        if audio_buffer.getbuffer().nbytes == 0:
-            queue_message("ERROR: No audio recorded.")
-            return None
+    def get_transcription_stats(self) -> dict:
+        """
+        Endpoint-to-final-text gap per transcription mode over recent turns.
 
-        # Convert recorded audio for STT model
-        audio_data, sample_rate = sf.read(audio_buffer, dtype="float32")
-        if sample_rate != self.DEFAULT_SAMPLE_RATE:
-            audio_data = librosa.resample(audio_data, orig_sr=sample_rate, target_sr=self.DEFAULT_SAMPLE_RATE)
-            #queue_message("INFO: Resampled Audio.")
-
-        # Run STT Model
-        input_audio = self.prepare_model_input([torch.tensor(audio_data)], device="cpu")
-        silero_output = self.silero_model(input_audio)[0]
-        decoded_text = self.decoder(silero_output.cpu())
-
-        # Return transcription result
-        if decoded_text:
-            formatted_result = {"text": decoded_text}
-            if self.utterance_callback:
-                self.utterance_callback(json.dumps(formatted_result))
-            return formatted_result
-
-    def _transcribe_with_server(self):
-        """Transcribe audio by sending it to an external server."""
-        try:
-            audio_buffer = BytesIO()
-            silent_frames = 0
-            detected_speech = False
-
-            with sd.InputStream(
-                samplerate=self.SAMPLE_RATE, channels=1, dtype="int16"
-            ) as stream, wave.open(audio_buffer, "wb") as wf:
-                wf.setnchannels(1)
-                wf.setsampwidth(2)
-                wf.setframerate(self.SAMPLE_RATE)
-                for _ in range(self.MAX_RECORDING_FRAMES):
-                    data, _ = stream.read(4000)
-
-
-                    is_silence, detected_speech, silent_frames = self.voice_activity_detection_main(data, detected_speech, silent_frames)
-                    if is_silence:
-                        if not detected_speech:
-                            return None
-                        break
-
-                    wf.writeframes(data.tobytes())
-
-            audio_buffer.seek(0)
-            if audio_buffer.getbuffer().nbytes == 0:
-                queue_message("ERROR: No audio recorded for server transcription.")
-                return None
-
-            files = {"audio": ("audio.wav", audio_buffer, "audio/wav")}
-            response = requests.post(
-                f"{self.config['STT'].get('external_url')}/save_audio",
-                files=files, timeout=10
-            )
-            if response.status_code == 200:
-                transcription = response.json().get("transcription", [])
-                if transcription:
-                    raw_text = transcription[0].get("text", "").strip()
-                    formatted_result = {
-                        "text": raw_text,
-                        "result": [
-                            {
-                                "conf": 1.0,
-                                "start": seg.get("start", 0),
-                                "end": seg.get("end", 0),
-                                "word": seg.get("text", ""),
-                            }
-                            for seg in transcription
-                        ],
-                    }
-                    if self.utterance_callback:
-                        self.utterance_callback(json.dumps(formatted_result))
-                    return formatted_result
-        except requests.RequestException as e:
-            queue_message(f"ERROR: Server transcription request failed: {e}")
-        return None
-
-    # === Helper Methods ===
+        Returns:
+            dict: {mode: {"turns", "last_ms", "average_ms"}}.
+        """
+        stats = {}
+        for turn in self.transcription_stats:
+            entry = stats.setdefault(turn["mode"], {"turns": 0, "total_ms": 0.0})
+            entry["turns"] += 1
+            entry["total_ms"] += turn["gap_ms"]
+            entry["last_ms"] = turn["gap_ms"]
+        return {
+            mode: {"turns": entry["turns"], "last_ms": entry["last_ms"], "average_ms": entry["total_ms"] / entry["turns"]}
+            for mode, entry in stats.items()
+        }
+
+    # === Conversation State Machine ===
 
     def _stt_processing_loop(self):
-        """Main loop that detects the wake word and transcribes utterances."""
+        """
+        Drive the conversation as an explicit state machine:
+        SLEEPING -> LISTENING -> TRANSCRIBING -> RESPONDING -> FOLLOW_UP_WINDOW.
+
+        Every turn runs in this one loop, so stack depth stays constant and each
+        turn's audio is released before the next one is captured.
+        """
         queue_message("INFO: Starting STT processing loop...")
+        audio = None
+        message = None
         while self.running and not self.shutdown_event.is_set():
-            if self._detect_wake_word():
-                self._transcribe_utterance()
+            try:
+                state = self.state
+                if state is ConversationState.SLEEPING:
+                    if self._wait_for_model("wakeword") and self._detect_wake_word():
+                        self._set_state(ConversationState.LISTENING)
+
+                elif state in (ConversationState.LISTENING, ConversationState.FOLLOW_UP_WINDOW):
+                    audio = self._capture_utterance()
+                    if audio is None:
+                        self._set_state(ConversationState.SLEEPING)
+                    else:
+                        self._set_state(ConversationState.TRANSCRIBING)
+
+                elif state is ConversationState.TRANSCRIBING:
+                    if not is_ready("stt"):
+                        queue_message("INFO: Waiting for the STT model to finish loading...")
+                    if not self._wait_for_model("stt"):
+                        continue
+                    message = self._transcribe_audio(audio)
+                    audio = None
+                    if message:
+                        self._set_state(ConversationState.RESPONDING)
+                    else:
+                        self._set_state(ConversationState.SLEEPING)
+
+                elif state is ConversationState.RESPONDING:
+                    stop_watching = self._start_barge_in_watch()
+                    try:
+                        if self.utterance_callback:
+                            self.utterance_callback(message)
+                    finally:
+                        stop_watching.set()
+                        # The reply is over; later replies must play even if this one was cut short
+                        get_audio_sink().resume()
+                    message = None
+                    if self._barged_in.is_set():
+                        # Straight into transcribing the interruption
+                        self._set_state(ConversationState.LISTENING)
+                        continue
+                    if self.post_utterance_callback:
+                        self.post_utterance_callback()
+                    self._set_state(ConversationState.FOLLOW_UP_WINDOW)
+
+            except Exception as e:
+                queue_message(f"ERROR: STT state {self.state.name} failed: {e}")
+                audio = None
+                message = None
+                self._set_state(ConversationState.SLEEPING)
         queue_message("INFO: STT Manager stopped.")
 
+    # === Barge-in ===
+
+    def _start_barge_in_watch(self) -> threading.Event:
+        """
+        Watch the microphone for the user talking over the reply, if barge-in is enabled.
+
+        Returns:
+            threading.Event: Set it to stop watching once the reply is over.
+        """
+        stop = threading.Event()
+        self._barged_in.clear()
+        get_audio_sink().resume()
+        if self.barge_in_detector is not None:
+            threading.Thread(target=self._barge_in_loop, args=(stop,), name="BargeInThread", daemon=True).start()
+        return stop
+
+    def _barge_in_loop(self, stop: threading.Event):
+        """
+        Run the VAD on the microphone during the reply. Frames are compared with
+        the level of what the sink played around the same time, so TARS's own voice
+        coming back through the microphone does not count as the user.
+        """
+        processor = self.config["STT"].get("stt_processor", "vosk")
+        use_model_vad = processor != "vosk"
+        detector = self.barge_in_detector
+        detector.reset()
+        if use_model_vad and self.streaming_vad is not None:
+            self.streaming_vad.reset()
+        sink = get_audio_sink()
+        reader = self.mic.subscribe("barge-in")
+
+        while not stop.is_set() and not self.shutdown_event.is_set():
+            data = reader.read(detector.frame, timeout=0.1)
+            if data is None:
+                continue
+            detector.threshold = self.silence_threshold * self.silence_margin / self.amp_gain
+            reference = sink.reference.level(self.mic.time_of(reader.position))
+            model_speech = self._model_speech(data) if use_model_vad else None
+            if not detector.process(data, reference, model_speech) or stop.is_set():
+                continue
+
+            # Stop talking first, then cancel the rest of the reply
+            speech_start = reader.position - detector.speech_samples
+            sink.interrupt()
+            self._barged_in.set()
+            if self.barge_in_callback:
+                self.barge_in_callback()
+            reaction_ms = 1000 * (time.monotonic() - self.mic.time_of(speech_start))
+            self.barge_in_stats.append({"reaction_ms": reaction_ms, "suppressed_frames": detector.suppressed_frames})
+            queue_message(f"INFO: Barge-in, reply stopped {reaction_ms:.0f} ms after the user started speaking.")
+            # Capture the interruption from where it started
+            self._listen_position = speech_start
+            return
+
+    def get_barge_in_stats(self) -> dict:
+        """
+        Barge-in reaction time over recent interruptions.
+
+        Returns:
+            dict: interruptions, last and average ms from speech onset to playback stop,
+            and the learned echo gain.
+        """
+        events = list(self.barge_in_stats)
+        if not events:
+            return {"interruptions": 0}
+        reactions = [event["reaction_ms"] for event in events]
+        return {
+            "interruptions": len(events),
+            "last_ms": reactions[-1],
+            "average_ms": sum(reactions) / len(reactions),
+            "echo_gain": self.barge_in_detector.echo_gain,
+        }
+
+    def _wait_for_model(self, name: str) -> bool:
+        """
+        Block the STT loop until a warmup job has finished.
+
+        Returns:
+            bool: False if the manager is shutting down first.
+        """
+        while not wait_until_ready(name, timeout=0.5):
+            if not self.running or self.shutdown_event.is_set():
+                return False
+        return True
+
+    def _set_state(self, new_state: "ConversationState"):
+        """Record a state transition and how long the previous state lasted."""
+        now = time.monotonic()
+        duration = now - self._state_since
+        old_state = self.state
+
+        total, count = self._state_totals.get(old_state, (0.0, 0))
+        self._state_totals[old_state] = (total + duration, count + 1)
+        self._state_transitions.append({
+            "from": old_state.name,
+            "to": new_state.name,
+            "time": time.time(),
+            "duration": duration,
+        })
+
+        self.state = new_state
+        self._state_since = now
+        if self.state_callback:
+            self.state_callback(new_state)
+
+    def get_state(self) -> dict:
+        """
+        Current conversation state and transition timings.
+
+        Returns:
+            dict: state name, seconds spent in it, per-state average durations and
+            the most recent transitions.
+        """
+        return {
+            "state": self.state.name,
+            "elapsed": time.monotonic() - self._state_since,
+            "averages": {
+                state.name: total / count
+                for state, (total, count) in self._state_totals.items() if count
+            },
+            "transitions": list(self._state_transitions),
+            "wake_word": self.get_wake_word_stats(),
+            "endpoint": self.get_endpoint_stats(),
+            "transcription": self.get_transcription_stats(),
+            "cascade": self.stt_backend.get_stats() if hasattr(self.stt_backend, "get_stats") else None,
+        }
+
     def _detect_wake_word(self) -> bool:
         """
         Detect the wake word using enhanced false-positive filtering.
+
+        A cheap energy gate runs on every block; keyword spotting only sees audio
+        (plus a short pre-roll) while the gate reports voice-like energy.
         """
         if self.config["STT"].get("use_indicators"):
             self.play_beep(400, 0.1, 44100, 0.6)
@@ -501,69 +619,128 @@ class STTManager:
         queue_message(f"{character_name}: Sleeping...")
 
         # Notify external service to stop talking.
-        try:
-            requests.get("http://127.0.0.1:5012/stop_talking", timeout=1)
-        except Exception:
-            pass
-
-        silent_frames = 0
-        max_iterations = 100  # Prevent infinite loops
+        self._notify_chatui("stop_talking")
 
+        cpu_start = time.thread_time()
         try:
-            threshold_map = {
-                1: 1e-20,
-                2: 1e-18,
-                3: 1e-16,
-                4: 1e-14,
-                5: 1e-12,
-                6: 1e-10,
-                7: 1e-8,
-                8: 1e-6,
-                9: 1e-4,
-                10: 1e-2,
-            }
-            kws_threshold = threshold_map.get(int(self.config["STT"]["sensitivity"]), 1)
-            speech = LiveSpeech(lm=False, keyphrase=self.WAKE_WORD, kws_threshold=kws_threshold)
-
-            for phrase in speech:
-                text = phrase.hypothesis().lower()
-                if self.WAKE_WORD in text:
-                    silent_frames = 0
-                    if self.config["STT"].get("use_indicators"):
-                        self.play_beep(1200, 0.1, 44100, 0.8)
-                    try:
-                        requests.get("http://127.0.0.1:5012/start_talking", timeout=1)
-                    except Exception:
-                        pass
-                    wake_response = random.choice(self.WAKE_WORD_RESPONSES)
-                    queue_message(f"{character_name}: {wake_response}", stream=True)
-                    if self.wake_word_callback:
-                        self.wake_word_callback(wake_response)
-                    return True
-
-            # Fallback: check silence over iterations.
-            with sd.InputStream(
-                samplerate=self.SAMPLE_RATE, channels=1, dtype="int16"
-            ) as stream:
-                for iteration, _ in enumerate(speech):
-                    if iteration >= max_iterations:
-                        queue_message("DEBUG: Maximum iterations reached for wake word detection.")
-                        break
-                    data, _ = stream.read(4000)
-                    rms = self.prepare_audio_data(self.amplify_audio(data))
-                    if rms > self.silence_threshold:
-                        detected_speech = True
-                        silent_frames = 0
-                    else:
-                        silent_frames += 1
-                    if silent_frames > self.MAX_SILENT_FRAMES:
-                        break
+            engine = self._get_wake_engine()
+            self._restart_wake_utterance()
+            gate = self.wake_gate
+            if gate is not None:
+                gate.reset()
+
+            # Keyword spotting reads the shared ring instead of opening its own device.
+            reader = self.mic.subscribe("wake-word")
+            block = int(self.SAMPLE_RATE * 0.1)
+            spotting = gate is None
+            while self.running and not self.shutdown_event.is_set():
+                data = reader.read(block)
+                if data is None:
+                    continue
+                self.wake_stats["audio_samples"] += block
+
+                if gate is not None:
+                    voiced = gate.process(data)
+                    if not spotting:
+                        if not voiced:
+                            continue
+                        # Voice-like energy: rewind so the decoder also hears the pre-roll.
+                        spotting = True
+                        end = reader.position
+                        reader.seek(end - block - self.preroll_samples)
+                        data = reader.read(end - reader.position)
+                    elif not voiced:
+                        # Gate closed again: drop the partial hypothesis and go back to idle.
+                        spotting = False
+                        self._restart_wake_utterance()
+                        continue
+
+                self.wake_stats["spotted_samples"] += data.shape[0]
+                if not engine.process(self._to_wake_word_rate(data)):
+                    continue
+
+                self._record_wake_cpu(cpu_start)
+                self._listen_position = reader.position
+                if self.config["STT"].get("use_indicators"):
+                    self.play_beep(1200, 0.1, 44100, 0.8)
+                self._notify_chatui("start_talking")
+                wake_response = random.choice(self.WAKE_WORD_RESPONSES)
+                queue_message(f"{character_name}: {wake_response}", stream=True)
+                if self.wake_word_callback:
+                    self.wake_word_callback(wake_response)
+                    # The spoken response is not part of the user's utterance.
+                    self._listen_position = self.mic.position()
+                return True
 
         except Exception as e:
             queue_message(f"ERROR: Wake word detection failed: {e}")
+            if self.wake_engine is not None:
+                self.wake_engine.close()
+            self.wake_engine = None  # Rebuild it on the next cycle
 
+        self._record_wake_cpu(cpu_start)
         return False
 
+    def _get_wake_engine(self):
+        """
+        Return the wake word engine, loading it only on first use so the model is
+        not rebuilt on every sleep cycle.
+        """
+        if self.wake_engine is None:
+            self.wake_engine = create_wake_word_engine(self.config)
+        return self.wake_engine
+
+    def _restart_wake_utterance(self):
+        """Clear the engine's partial hypothesis and the resampler history."""
+        self.wake_engine.reset()
+        if self._wake_resampler is not None:
+            self._wake_resampler.reset()
+
+    def _record_wake_cpu(self, cpu_start: float):
+        self.wake_stats["cpu_seconds"] += time.thread_time() - cpu_start
+
+    def get_wake_word_stats(self) -> dict:
+        """
+        CPU used while waiting for the wake word.
+
+        Returns:
+            dict: audio seconds listened to, fraction passed to keyword spotting,
+            and STT-thread CPU milliseconds per second of idle audio.
+        """
+        audio_seconds = self.wake_stats["audio_samples"] / self.SAMPLE_RATE
+        return {
+            "gate": self.wake_gate is not None,
+            "audio_seconds": audio_seconds,
+            "spotted_ratio": self.wake_stats["spotted_samples"] / max(1, self.wake_stats["audio_samples"]),
+            "cpu_ms_per_audio_s": 1000 * self.wake_stats["cpu_seconds"] / audio_seconds if audio_seconds else 0.0,
+        }
+
+    def _notify_chatui(self, endpoint: str):
+        """Tell the ChatUI whether TARS is talking; requests is only imported on first use."""
+        try:
+            timed_import("requests").get(f"http://127.0.0.1:5012/{endpoint}", timeout=1)
+        except Exception:
+            pass
+
+    def _to_wake_word_rate(self, data: np.ndarray) -> np.ndarray:
+        """
+        Convert captured int16 audio to the 16 kHz expected by pocketsphinx.
+        """
+        if self._wake_resampler is None:
+            return data.reshape(-1)
+        return self._wake_resampler.process_int16(data)
+
+    def _listen_reader(self, name: str):
+        """
+        Create a ring cursor for an utterance, starting a short pre-roll before
+        listening began so the first syllables are never lost.
+        """
+        reader = self.mic.subscribe(name)
+        start = self._listen_position if self._listen_position is not None else self.mic.position()
+        reader.seek(start - self.preroll_samples)
+        self._listen_position = None
+        return reader
+
     def _init_progress_bar(self):
         """Initialize progress bar settings and functions"""
         bar_length = 10  
@@ -593,162 +770,42 @@ class STTManager:
                 flush_all()  # 🔹 Ensure everything is flushed immediately
         return update_progress_bar, clear_progress_bar
     
-    # === VAD Methods ===
-
-    def voice_activity_detection_main(self, data, detected_speech, silent_frames=0):
-        """
-        Determines if the current audio frame contains silence using VAD or RMS.
-        Returns a tuple: (is_silence, detected_speech, silent_frames)
-        """
-        # Get the vad_method from the configuration, defaulting to "rms" if not set.
-        #print(self.vadmethod)
+    # === Audio adjustments ===
     
-        if self.vadmethod == "silero":
-            return self._is_silence_detected_silero(data, detected_speech, silent_frames)
-        elif self.vadmethod == "rms":
-            return self._is_silence_detected_rms(data, detected_speech, silent_frames)
-        else:
-            return self._is_silence_detected_rms(data, detected_speech, silent_frames)
-
-    def _is_silence_detected_silero(self, data, detected_speech, silent_frames):
+    def _start_noise_tracking(self):
         """
-        Check if the provided audio data represents silence using VAD.
-        Always returns a tuple of (is_silence, detected_speech, silent_frames).
+        Track background noise from the shared microphone in a daemon thread.
+        Startup does not wait for calibration; thresholds are refreshed as soon as
+        the first second of audio has been seen and keep following the room.
         """
-        update_bar, clear_bar = self._init_progress_bar()
-        self.DEBUG = False
-
-        try:
-            # Silero VAD-based detection
-            if self.silero_vad_model is not None and self.get_speech_timestamps is not None:
-                try:
-                    audio_norm = data.astype(np.float32) / 32768.0
-                    audio_tensor = torch.from_numpy(audio_norm).squeeze()
-                    
-                    if hasattr(self.silero_vad_model, 'reset_states'):
-                        self.silero_vad_model.reset_states()
-                    
-                    # Get VAD configuration with defaults
-
-                    noise_gate = 0.01 * self.silence_threshold #adjust for bgnoise
-
-                    # Skip very low amplitude signals 
-                    #if np.max(np.abs(audio_norm)) < noise_gate:
-                        #return True, detected_speech, silent_frames
-
-                    speech_ts = self.get_speech_timestamps(
-                        audio_tensor, 
-                        self.silero_vad_model,
-                        sampling_rate=self.SAMPLE_RATE,
-                        threshold=0.3,
-                        min_speech_duration_ms=100,
-                        return_seconds=True
-                    ) or []
-                    
-             
-
-                    if len(speech_ts) > 0:
-                        detected_speech = True
-                        silent_frames = 0
-                        clear_bar()
-                    else:
-                        silent_frames += 1
-                        update_bar(silent_frames, self.MAX_SILENT_FRAMES)
-
-                    if silent_frames > self.MAX_SILENT_FRAMES:
-                        clear_bar()
-                        return True, detected_speech, silent_frames
-                    
-                    return False, detected_speech, silent_frames
-                        
-                except Exception as e:
-                    queue_message(f"WARNING: VAD error, falling back to RMS: {e}")
-                    return self._is_silence_detected_rms(data, detected_speech, silent_frames)
-            
-            return self._is_silence_detected_rms(data, detected_speech, silent_frames)
-            
-        
-        except Exception as e:
-            queue_message(f"ERROR: Silence detection failed: {e}")
-            # Return safe default values
-            return False, detected_speech, silent_frames
-
-    def _is_silence_detected_rms(self, data, detected_speech, silent_frames):
-        """RMS-based silence detection with visual progress bar"""
-        try:
-            update_bar, clear_bar = self._init_progress_bar()
-            self.DEBUG = False
-            rms = self.prepare_audio_data(self.amplify_audio(data))
-            self.silence_threshold_margin = self.silence_threshold * self.silence_margin
-
-            if rms is None:
-                # Even if RMS calculation fails, return proper tuple
-                return False, detected_speech, silent_frames
-
-            if rms > self.silence_threshold_margin:
-                detected_speech = True
-                silent_frames = 0
-                
-                if self.DEBUG:
-                    queue_message(f"AUDIO: {rms:.2f}/{self.silence_threshold:.2f}/{self.silence_threshold_margin:.2f}")
-                
-                clear_bar()
-            else:
-                silent_frames += 1
-                
-                if self.DEBUG:
-                    queue_message(f"SILENT: {rms:.2f}/{self.silence_threshold:.2f}/{self.silence_threshold_margin:.2f}")
-                
-                update_bar(silent_frames, self.MAX_SILENT_FRAMES)
-
-                if silent_frames > self.MAX_SILENT_FRAMES:
-                    clear_bar()
-                    return True, detected_speech, silent_frames
-
-            
-            return False, detected_speech, silent_frames
-        
-        except Exception as e:
-            queue_message(f"ERROR: RMS silence detection failed: {e}")
-            # Return safe default values
-            return False, detected_speech, silent_frames
-  
-    # === Audio adjustments ===
-    
-    def _measure_background_noise(self):
-        """Measure background noise and set the silence threshold."""
-        queue_message("INFO: Measuring background noise...")
-        background_rms_values = []
-        total_frames = 20  # ~2-3 seconds
-
-        with sd.InputStream(
-            samplerate=self.SAMPLE_RATE, channels=1, dtype="int16"
-        ) as stream:
-            for _ in range(total_frames):
-                data, _ = stream.read(4000)
-                rms = self.prepare_audio_data(data)
-                if rms is not None:
-                    background_rms_values.append(rms)
-                time.sleep(0.1)
-
-        if background_rms_values:
-            background_rms = np.array(background_rms_values)
-            median_rms = np.median(background_rms)
-            self.silence_threshold = max(median_rms, 10)
-
-            # Remove outliers using IQR
-            q1, q3 = np.percentile(background_rms, [25, 75])
-            iqr = q3 - q1
-            lower_bound = q1 - 1.5 * iqr
-            upper_bound = q3 + 1.5 * iqr
-            filtered = background_rms[(background_rms >= lower_bound) & (background_rms <= upper_bound)]
-            self.wake_silence_threshold = np.max(filtered)
-            self.silence_threshold = self.wake_silence_threshold * self.silence_margin
-
-            db = 20 * np.log10(self.silence_threshold)
+        queue_message("INFO: Tracking background noise...")
+        threading.Thread(target=self._noise_floor_loop, name="NoiseFloorThread", daemon=True).start()
+
+    def _noise_floor_loop(self):
+        reader = self.mic.subscribe("noise")
+        block = int(self.SAMPLE_RATE * 0.1)
+        while not self.shutdown_event.is_set():
+            data = reader.read(block)
+            if data is None:
+                continue
+            # TARS hearing its own voice is not background noise
+            if self.state is ConversationState.RESPONDING:
+                continue
+            level = self.noise_tracker.update_block(data)
+            if level is not None:
+                self._refresh_thresholds(level)
+
+    def _refresh_thresholds(self, level: float):
+        """Derive the wake and endpointing thresholds from the current noise level."""
+        self.wake_silence_threshold = level
+        self.silence_threshold = level * self.silence_margin
+        if self.wake_gate is not None:
+            self.wake_gate.floor = max(level, self.wake_gate.min_floor)
+
+        db = 20 * np.log10(self.silence_threshold)
+        if self._logged_threshold_db is None or abs(db - self._logged_threshold_db) >= 3.0:
+            self._logged_threshold_db = db
             queue_message(f"INFO: Silence threshold: {db:.2f} dB and {self.silence_threshold}")
-        else:
-            queue_message("WARNING: Background noise measurement failed; using default threshold.")
 
     def prepare_audio_data(self, data: np.ndarray) -> Optional[float]:
         """
@@ -784,6 +841,7 @@ class STTManager:
             int: The sample rate.
         """
         try:
+            import sounddevice as sd
             default_index = sd.default.device[0]
             if default_index is None:
                 raise ValueError("No default microphone detected.")
@@ -798,9 +856,8 @@ class STTManager:
         Play a beep sound to indicate state changes.
         """
         t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-        sine_wave = volume * np.sin(2 * np.pi * frequency * t)
-        sd.play(sine_wave, samplerate=sample_rate)
-        sd.wait()
+        sine_wave = (volume * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+        get_audio_sink().play_cue(sine_wave, sample_rate)
 
     # === Callback Setters ===
 
@@ -812,3 +869,12 @@ class STTManager:
 
     def set_post_utterance_callback(self, callback: Callable[[], None]):
         self.post_utterance_callback = callback
+
+    def set_barge_in_callback(self, callback: Callable[[], None]):
+        self.barge_in_callback = callback
+
+    def set_partial_callback(self, callback: Callable[[str], None]):
+        self.partial_callback = callback
+
+    def set_state_callback(self, callback: Callable[["ConversationState"], None]):
+        self.state_callback = callback
@@ -0,0 +1,600 @@
+"""
+module_sttbackends.py
+
+Speech-to-Text and VAD backends for TARS-AI.
+
+Each engine is a plugin that lists the heavy modules it needs. Those modules are
+imported only when the plugin is selected in config.ini, so a Vosk setup never
+pays for torch or faster-whisper at startup. Imports and model loads go through
+module_startup so they appear in the startup report.
+"""
+
+# === Standard Libraries ===
+import json
+import math
+import os
+import sys
+import threading
+import time
+import wave
+from io import BytesIO
+from typing import Optional
+
+import numpy as np
+
+from modules.module_messageQue import queue_message
+from modules.module_startup import timed_import, timed_step
+from modules.module_warmup import register_warmup
+
+
+# === STT Backends ===
+class STTBackend:
+    """
+    Base class for STT engines. Subclasses list their heavy imports in `modules`
+    and implement `_load` and `transcribe`.
+    """
+
+    name = "base"
+    modules = ()
+    supports_streaming = False  # True if decode_words() is implemented
+
+    def __init__(self, config, sample_rate: int = 16000, amp_gain: float = 4.0):
+        """
+        Args:
+            config (dict): Configuration dictionary.
+            sample_rate (int): Sample rate of the utterances passed to transcribe().
+            amp_gain (float): Gain applied by engines that expect amplified audio.
+        """
+        self.config = config
+        self.sample_rate = sample_rate
+        self.amp_gain = amp_gain
+        self.ready = False
+
+    def import_dependencies(self) -> dict:
+        """Import this backend's heavy modules, recording each in the startup report."""
+        return {module_name: timed_import(module_name) for module_name in self.modules}
+
+    def load(self) -> bool:
+        """
+        Import dependencies and load the model.
+
+        Returns:
+            bool: True if the backend can transcribe.
+        """
+        try:
+            with timed_step(f"stt:{self.name}"):
+                self.import_dependencies()
+                self._load()
+            self.ready = True
+        except Exception as e:
+            queue_message(f"ERROR: Failed to load {self.name} STT backend: {e}")
+            self.ready = False
+        return self.ready
+
+    def _load(self):
+        pass
+
+    def warmup(self):
+        """Run one decode on silence after load(); a no-op unless the backend overrides it."""
+        pass
+
+    def transcribe(self, audio, trim_threshold: Optional[float] = None) -> Optional[str]:
+        """
+        Transcribe a captured utterance.
+
+        Args:
+            audio (UtteranceBuffer): The utterance at `sample_rate`.
+            trim_threshold (float): RMS on the float scale used to trim silence, or None.
+
+        Returns:
+            str or None: JSON message with a "text" field, or None if nothing was recognized.
+        """
+        raise NotImplementedError
+
+    def transcribe_scored(self, audio, trim_threshold: Optional[float] = None):
+        """
+        Transcribe and report how confident the engine was.
+
+        Returns:
+            tuple: (message or None, confidence dict or None). The dict may hold
+            "avg_logprob" and "no_speech_prob"; engines without scores return None.
+        """
+        return self.transcribe(audio, trim_threshold), None
+
+    def decode_words(self, audio: np.ndarray, prompt: Optional[str] = None) -> list:
+        """
+        Decode float32 audio into timed words, for streaming transcription.
+
+        Returns:
+            list: (start seconds, end seconds, text) tuples.
+        """
+        raise NotImplementedError
+
+    def _float32(self, audio, trim_threshold: Optional[float]) -> np.ndarray:
+        """float32 view of the utterance with leading and trailing silence trimmed."""
+        return audio.as_float32(trim_threshold, sample_rate=self.sample_rate)
+
+    def amplify_audio(self, data: np.ndarray) -> np.ndarray:
+        """Amplify int16 audio by `amp_gain`."""
+        return np.clip(data * self.amp_gain, -32768, 32767).astype(np.int16)
+
+
+class VoskBackend(STTBackend):
+    """Local Kaldi recognizer."""
+
+    name = "vosk"
+    modules = ("vosk",)
+
+    def _load(self):
+        vosk = sys.modules["vosk"]
+        vosk.SetLogLevel(-1)  # Suppress Vosk logs
+
+        vosk_model_path = os.path.join(os.getcwd(), "..", "stt", self.config['STT']['vosk_model'])
+        if not os.path.exists(vosk_model_path):
+            queue_message("ERROR: Vosk model not found. Downloading...")
+            download_url = f"https://alphacephei.com/vosk/models/{self.config['STT']['vosk_model']}.zip"
+            self._download_model(download_url, os.path.join(os.getcwd(), "..", "stt"))
+            queue_message("INFO: Restarting model loading...")
+
+        self.model = vosk.Model(vosk_model_path)
+        queue_message("INFO: Vosk model loaded successfully.")
+
+    def _download_model(self, url, dest_folder):
+        """Download the Vosk model from the specified URL with basic progress display."""
+        requests = timed_import("requests")
+        file_name = url.split("/")[-1]
+        dest_path = os.path.join(dest_folder, file_name)
+
+        queue_message(f"INFO: Downloading Vosk model from {url}...")
+        response = requests.get(url, stream=True)
+        response.raise_for_status()
+
+        with open(dest_path, "wb") as file:
+            for chunk in response.iter_content(chunk_size=8192):
+                file.write(chunk)
+        queue_message("INFO: Download complete. Extracting...")
+        if file_name.endswith(".zip"):
+            import zipfile
+            with zipfile.ZipFile(dest_path, 'r') as zip_ref:
+                zip_ref.extractall(dest_folder)
+            os.remove(dest_path)
+            queue_message("INFO: Zip file deleted.")
+        queue_message("INFO: Extraction complete.")
+
+    def warmup(self):
+        recognizer = sys.modules["vosk"].KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.AcceptWaveform(np.zeros(self.sample_rate, dtype=np.int16).tobytes())
+        recognizer.FinalResult()
+
+    def transcribe(self, audio, trim_threshold=None):
+        return self._recognize(audio, words=False)[0]
+
+    def transcribe_scored(self, audio, trim_threshold=None):
+        message, result = self._recognize(audio, words=True)
+        confs = [max(word.get("conf", 0.0), 1e-6) for word in result.get("result", [])]
+        if not confs:
+            return message, None
+        return message, {"avg_logprob": sum(math.log(conf) for conf in confs) / len(confs)}
+
+    def _recognize(self, audio, words: bool):
+        recognizer = sys.modules["vosk"].KaldiRecognizer(self.model, self.sample_rate)
+        recognizer.SetWords(words)
+        recognizer.SetPartialWords(False)
+
+        recognizer.AcceptWaveform(self.amplify_audio(audio.pcm).tobytes())  # amp the sound
+        result = recognizer.FinalResult()
+        parsed = json.loads(result)
+        if parsed.get("text"):
+            return result, parsed
+        return None, parsed
+
+
+class FasterWhisperBackend(STTBackend):
+    """CTranslate2 Whisper on the CPU (int8 unless whisper_compute_type says otherwise)."""
+
+    name = "faster-whisper"
+    modules = ("faster_whisper",)
+    supports_streaming = True
+
+    def _load(self):
+        import warnings
+        warnings.filterwarnings("ignore", category=FutureWarning, module="torch")
+
+        # Only patch torch.load when something already pulled torch in; faster-whisper itself does not need it.
+        torch = sys.modules.get("torch")
+        original_torch_load = torch.load if torch is not None else None
+        if torch is not None:
+            def patched_torch_load(fp, map_location, *args, **kwargs):
+                return original_torch_load(fp, map_location=map_location, weights_only=True, *args, **kwargs)
+            torch.load = patched_torch_load
+
+        try:
+            model_size = self.config["STT"].get("whisper_model", "tiny")
+            compute_type = self.config["STT"].get("whisper_compute_type", "int8")
+            queue_message(f"INFO: Preparing to load Faster-Whisper model '{model_size}' ({compute_type})...")
+
+            # Set up a folder for Whisper models inside the stt directory via environment variable.
+            whisper_folder = os.path.join(os.getcwd(), "..", "stt", "whisper")
+            os.makedirs(whisper_folder, exist_ok=True)
+            os.environ["HF_HUB_CACHE"] = whisper_folder
+
+            # Let faster-whisper handle the download automatically.
+            self.model = sys.modules["faster_whisper"].WhisperModel(
+                model_size, device="cpu", compute_type=compute_type, num_workers=4
+            )
+            queue_message("INFO: Faster-Whisper model loaded successfully.")
+        finally:
+            if torch is not None:
+                torch.load = original_torch_load
+
+    def warmup(self):
+        segments, _ = self.model.transcribe(
+            np.zeros(self.sample_rate, dtype=np.float32), temperature=0.0, beam_size=1, language="en"
+        )
+        list(segments)
+
+    def transcribe(self, audio, trim_threshold=None):
+        return self.transcribe_scored(audio, trim_threshold)[0]
+
+    def transcribe_scored(self, audio, trim_threshold=None):
+        audio_data = self._float32(audio, trim_threshold)
+        if audio_data.size == 0:
+            queue_message("ERROR: No audio recorded.")
+            return None, None
+
+        segments, _ = self.model.transcribe(
+            audio_data, temperature=0.0, beam_size=1, language="en"
+        )
+        segments = list(segments)
+        transcribed_text = " ".join(segment.text for segment in segments).strip()
+        confidence = None
+        if segments:
+            durations = [max(segment.end - segment.start, 1e-3) for segment in segments]
+            confidence = {
+                "avg_logprob": sum(seg.avg_logprob * d for seg, d in zip(segments, durations)) / sum(durations),
+                "no_speech_prob": max(segment.no_speech_prob for segment in segments),
+            }
+        if transcribed_text:
+            return json.dumps({"text": transcribed_text}), confidence
+        queue_message("ERROR: No transcription from Faster-Whisper.")
+        return None, confidence
+
+    def decode_words(self, audio, prompt=None):
+        segments, _ = self.model.transcribe(
+            audio, temperature=0.0, beam_size=1, language="en", word_timestamps=True,
+            initial_prompt=prompt, condition_on_previous_text=False
+        )
+        return [(word.start, word.end, word.word) for segment in segments for word in (segment.words or [])]
+
+
+class SileroSTTBackend(STTBackend):
+    """Silero STT loaded via Torch Hub into the stt folder (without a hub subfolder)."""
+
+    name = "silero"
+    modules = ("torch", "torch.hub")
+
+    def _load(self):
+        torch = sys.modules["torch"]
+        # Go one level up from the current directory
+        parent_dir = os.path.dirname(os.getcwd())
+        stt_folder = os.path.join(parent_dir, "stt")
+        os.makedirs(stt_folder, exist_ok=True)
+        # Override torch.hub.get_dir to return stt_folder directly.
+        torch.hub.get_dir = lambda: stt_folder
+
+        self.model, self.decoder, utils = torch.hub.load(
+            "snakers4/silero-models", model="silero_stt", language="en", device="cpu"
+        )
+        (self.read_batch, self.split_into_batches, self.read_audio, self.prepare_model_input) = utils
+        queue_message("INFO: Silero model loaded successfully.")
+
+    def warmup(self):
+        torch = sys.modules["torch"]
+        with torch.no_grad():
+            self.model(self.prepare_model_input([torch.zeros(self.sample_rate)], device="cpu"))
+
+    def transcribe(self, audio, trim_threshold=None):
+        audio_data = self._float32(audio, trim_threshold)
+        if audio_data.size == 0:
+            queue_message("ERROR: No audio recorded.")
+            return None
+
+        # Run STT Model (torch.from_numpy shares the buffer instead of copying it)
+        torch = sys.modules["torch"]
+        input_audio = self.prepare_model_input([torch.from_numpy(audio_data)], device="cpu")
+        silero_output = self.model(input_audio)[0]
+        decoded_text = self.decoder(silero_output.cpu())
+
+        if decoded_text:
+            return json.dumps({"text": decoded_text})
+        return None
+
+
+class ExternalSTTBackend(STTBackend):
+    """Transcription on the TARS-AI server (app-server.py)."""
+
+    name = "external"
+    modules = ("requests",)
+
+    def _load(self):
+        queue_message(f"INFO: Using external STT server at {self.config['STT'].get('external_url')}.")
+
+    def _to_wav_buffer(self, audio: np.ndarray) -> BytesIO:
+        """Wrap int16 samples in an in-memory WAV file."""
+        audio_buffer = BytesIO()
+        with wave.open(audio_buffer, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(self.sample_rate)
+            wf.writeframes(audio.tobytes())
+        audio_buffer.seek(0)
+        return audio_buffer
+
+    def transcribe(self, audio, trim_threshold=None):
+        requests = sys.modules["requests"]
+        try:
+            audio_buffer = self._to_wav_buffer(audio.pcm)
+            if audio_buffer.getbuffer().nbytes == 0:
+                queue_message("ERROR: No audio recorded for server transcription.")
+                return None
+
+            files = {"audio": ("audio.wav", audio_buffer, "audio/wav")}
+            response = requests.post(
+                f"{self.config['STT'].get('external_url')}/save_audio",
+                files=files, timeout=10
+            )
+            if response.status_code == 200:
+                transcription = response.json().get("transcription", [])
+                if transcription:
+                    raw_text = transcription[0].get("text", "").strip()
+                    formatted_result = {
+                        "text": raw_text,
+                        "result": [
+                            {
+                                "conf": 1.0,
+                                "start": seg.get("start", 0),
+                                "end": seg.get("end", 0),
+                                "word": seg.get("text", ""),
+                            }
+                            for seg in transcription
+                        ],
+                    }
+                    return json.dumps(formatted_result)
+        except requests.RequestException as e:
+            queue_message(f"ERROR: Server transcription request failed: {e}")
+        return None
+
+
+class CascadeBackend(STTBackend):
+    """
+    Fast first pass with escalation: every utterance goes through the configured
+    engine, and only low-confidence results are re-decoded from the same buffer
+    by a larger whisper model or the external server.
+    """
+
+    name = "cascade"
+
+    def __init__(self, config, fast: STTBackend, sample_rate: int = 16000, amp_gain: float = 4.0):
+        """
+        Args:
+            config (dict): Configuration dictionary.
+            fast (STTBackend): Loaded first-pass backend.
+        """
+        super().__init__(config, sample_rate, amp_gain)
+        self.fast = fast
+        self.slow = None
+        self.target = config["STT"].get("cascade_target", "small")
+        self.min_logprob = config["STT"].get("cascade_logprob", -0.8)
+        self.max_no_speech = config["STT"].get("cascade_no_speech", 0.6)
+        self.stats = {"turns": 0, "escalations": 0, "fast": [0, 0.0], "slow": [0, 0.0]}
+        self._stats_lock = threading.Lock()
+
+    def _load(self):
+        # The larger model loads in the background so startup is not held up by it
+        register_warmup("stt-escalation", self._load_slow, lambda: self.slow and self.slow.warmup(), priority=15)
+
+    def warmup(self):
+        self.fast.warmup()
+
+    def _load_slow(self):
+        if self.target == "external":
+            slow = ExternalSTTBackend(self.config, self.sample_rate, self.amp_gain)
+        else:
+            config = dict(self.config)
+            config["STT"] = dict(self.config["STT"], whisper_model=self.target)
+            slow = FasterWhisperBackend(config, self.sample_rate, self.amp_gain)
+        if slow.load():
+            self.slow = slow
+            queue_message(f"INFO: Cascade escalation tier '{self.target}' ready.")
+
+    def needs_escalation(self, confidence: Optional[dict]) -> bool:
+        """True if the first-pass scores cross either threshold."""
+        if not confidence:
+            return False
+        if confidence.get("avg_logprob", 0.0) < self.min_logprob:
+            return True
+        return confidence.get("no_speech_prob", 0.0) > self.max_no_speech
+
+    def transcribe(self, audio, trim_threshold=None):
+        return self.transcribe_scored(audio, trim_threshold)[0]
+
+    def transcribe_scored(self, audio, trim_threshold=None):
+        start = time.monotonic()
+        message, confidence = self.fast.transcribe_scored(audio, trim_threshold)
+        fast_seconds = time.monotonic() - start
+        self._record("fast", fast_seconds, escalated=False)
+
+        if self.slow is None or not self.needs_escalation(confidence):
+            return message, confidence
+
+        start = time.monotonic()
+        slow_message, slow_confidence = self.slow.transcribe_scored(audio, trim_threshold)
+        slow_seconds = time.monotonic() - start
+        self._record("slow", slow_seconds, escalated=True)
+        scores = ", ".join(f"{key} {value:.2f}" for key, value in confidence.items())
+        queue_message(f"INFO: Escalated to {self.target} ({scores}): +{slow_seconds * 1000:.0f} ms.")
+        if slow_message:
+            return slow_message, slow_confidence
+        return message, confidence
+
+    def _record(self, tier: str, seconds: float, escalated: bool):
+        with self._stats_lock:
+            if tier == "fast":
+                self.stats["turns"] += 1
+            if escalated:
+                self.stats["escalations"] += 1
+            self.stats[tier][0] += 1
+            self.stats[tier][1] += seconds
+
+    def get_stats(self) -> dict:
+        """
+        How often utterances were escalated and what each tier costs.
+
+        Returns:
+            dict: turns, escalations, escalation_rate and per-tier count and average ms.
+        """
+        with self._stats_lock:
+            turns = self.stats["turns"]
+            return {
+                "turns": turns,
+                "escalations": self.stats["escalations"],
+                "escalation_rate": self.stats["escalations"] / turns if turns else 0.0,
+                "tiers": {
+                    tier: {
+                        "count": self.stats[tier][0],
+                        "average_ms": 1000 * self.stats[tier][1] / self.stats[tier][0] if self.stats[tier][0] else 0.0,
+                    }
+                    for tier in ("fast", "slow")
+                },
+            }
+
+
+# === VAD Backends ===
+class VADBackend:
+    """
+    Base class for voice activity detectors used to endpoint utterances.
+    """
+
+    name = "base"
+    modules = ()
+
+    def __init__(self, config, sample_rate: int = 16000):
+        self.config = config
+        self.sample_rate = sample_rate
+        self.ready = False
+
+    def load(self) -> bool:
+        """Import dependencies and load the model; see STTBackend.load()."""
+        try:
+            with timed_step(f"vad:{self.name}"):
+                for module_name in self.modules:
+                    timed_import(module_name)
+                self._load()
+            self.ready = True
+        except Exception as e:
+            queue_message(f"ERROR: Failed to load {self.name} VAD backend: {e}")
+            self.ready = False
+        return self.ready
+
+    def _load(self):
+        pass
+
+    def warmup(self):
+        """Run the model once on silence."""
+        pass
+
+
+class RMSVADBackend(VADBackend):
+    """Energy threshold VAD; STTManager applies the threshold itself, no model needed."""
+
+    name = "rms"
+
+
+class SileroVADBackend(VADBackend):
+    """Silero VAD from the pip package, run incrementally over 512-sample windows."""
+
+    name = "silero"
+    modules = ("torch", "silero_vad")
+
+    def __init__(self, config, sample_rate: int = 16000):
+        super().__init__(config, sample_rate)
+        self.runtime = config["STT"].get("vad_runtime", "torchscript")
+        self.model = None
+        self.streaming_vad = None
+
+    def _load(self):
+        from modules.module_vad import load_silero_vad_model, StreamingSileroVAD
+
+        self.model = load_silero_vad_model(self.runtime)
+        queue_message(f"INFO: Silero VAD loaded successfully using pip package ({self.runtime}).")
+
+        # Stateful 512-sample windows, fed to the Endpointer block by block
+        self.streaming_vad = StreamingSileroVAD(
+            model=self.model,
+            runtime=self.runtime,
+            sample_rate=self.sample_rate,
+            threshold=0.3,
+        )
+
+    def warmup(self):
+        self.streaming_vad.is_speech(np.zeros(self.sample_rate // 10, dtype=np.int16))
+        self.streaming_vad.reset()
+
+
+# === Registry ===
+STT_BACKENDS = {
+    "vosk": VoskBackend,
+    "whisper": FasterWhisperBackend,  # "whisper" maps to faster-whisper for compatibility
+    "faster-whisper": FasterWhisperBackend,
+    "silero": SileroSTTBackend,
+    "external": ExternalSTTBackend,
+}
+
+VAD_BACKENDS = {
+    "rms": RMSVADBackend,
+    "silero": SileroVADBackend,
+}
+
+
+def create_stt_backend(config, sample_rate: int = 16000, amp_gain: float = 4.0) -> STTBackend:
+    """
+    Build and load the STT backend selected by `stt_processor`.
+
+    Parameters:
+    - config (dict): Configuration dictionary.
+    - sample_rate (int): Sample rate of the utterances to transcribe.
+    - amp_gain (float): Gain for engines that expect amplified audio.
+
+    Returns:
+    - STTBackend: The backend (check `ready` to see whether it loaded).
+    """
+    processor = config["STT"].get("stt_processor", "vosk")
+    backend_class = STT_BACKENDS.get(processor)
+    if backend_class is None:
+        queue_message(f"WARNING: Unknown stt_processor '{processor}', using vosk.")
+        backend_class = VoskBackend
+    backend = backend_class(config, sample_rate=sample_rate, amp_gain=amp_gain)
+    backend.load()
+
+    if config["STT"].get("stt_cascade") and backend.ready:
+        cascade = CascadeBackend(config, backend, sample_rate=sample_rate, amp_gain=amp_gain)
+        cascade.load()
+        return cascade
+    return backend
+
+
+def create_vad_backend(config, sample_rate: int = 16000) -> VADBackend:
+    """
+    Build and load the VAD backend selected by `vad_method`, falling back to RMS.
+
+    Returns:
+    - VADBackend: A loaded backend.
+    """
+    method = config["STT"].get("vad_method", "rms")
+    backend = VAD_BACKENDS.get(method, RMSVADBackend)(config, sample_rate=sample_rate)
+    if backend.load():
+        return backend
+    queue_message(f"WARNING: {method} VAD unavailable, falling back to RMS.")
+    backend = RMSVADBackend(config, sample_rate=sample_rate)
+    backend.load()
+    return backend
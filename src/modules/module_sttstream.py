@@ -0,0 +1,354 @@
+"""
+module_sttstream.py
+
+Streaming incremental transcription for TARS-AI.
+
+While the user is still talking, a worker thread re-decodes the growing utterance
+every few hundred milliseconds. A local-agreement policy commits the words that
+two consecutive hypotheses agree on, and the rest is shown as a partial
+transcript. When the endpoint fires only the uncommitted tail is decoded, so the
+final text is ready almost immediately instead of after a full batch decode.
+
+For the external STT server, ServerStreamingTranscription uploads the utterance
+while it is captured and the server does the incremental decoding instead.
+"""
+
+# === Standard Libraries ===
+import json
+import re
+import threading
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from modules.module_messageQue import queue_message
+
+Word = Tuple[float, float, str]  # (start seconds, end seconds, text), relative to the utterance start
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _join(words: List[Word]) -> str:
+    return "".join(word[2] for word in words).strip()
+
+
+class LocalAgreement:
+    """
+    LocalAgreement-2 commit policy: a word is committed once two consecutive
+    hypotheses agree on it and on everything before it.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.committed: List[Word] = []
+        self.previous: List[Word] = []
+        self.last_committed_end = 0.0
+
+    def insert(self, words: List[Word]) -> List[Word]:
+        """
+        Compare a new hypothesis with the previous one and commit the agreed prefix.
+
+        Args:
+            words (list): Hypothesis words with absolute times.
+
+        Returns:
+            list: Words committed by this hypothesis.
+        """
+        new = self._unseen(words)
+        commit = []
+        previous = list(self.previous)
+        while new and previous and _normalize(new[0][2]) == _normalize(previous[0][2]):
+            commit.append(new.pop(0))
+            previous.pop(0)
+
+        self._commit(commit)
+        self.previous = new
+        return commit
+
+    def flush(self, words: List[Word]) -> List[Word]:
+        """Commit a final hypothesis without waiting for agreement."""
+        new = self._unseen(words)
+        self._commit(new)
+        self.previous = []
+        return new
+
+    def _commit(self, words: List[Word]):
+        if words:
+            self.committed.extend(words)
+            self.last_committed_end = words[-1][1]
+
+    def _unseen(self, words: List[Word]) -> List[Word]:
+        """Words of a hypothesis that come after what is already committed."""
+        new = [word for word in words if word[0] > self.last_committed_end - 0.1]
+
+        # The decoder often repeats the last committed words at the window start
+        if new and self.committed and abs(new[0][0] - self.last_committed_end) < 1.0:
+            for n in range(min(len(self.committed), len(new), 5), 0, -1):
+                tail = [_normalize(word[2]) for word in self.committed[-n:]]
+                head = [_normalize(word[2]) for word in new[:n]]
+                if tail == head:
+                    new = new[n:]
+                    break
+        return new
+
+    @property
+    def committed_text(self) -> str:
+        return _join(self.committed)
+
+    @property
+    def pending_text(self) -> str:
+        return _join(self.previous)
+
+
+class StreamingTranscription:
+    """
+    Re-decodes one utterance in the background while it is being captured.
+    """
+
+    def __init__(self, backend, sample_rate: int = 16000, interval_ms: int = 500,
+                 trim_s: float = 8.0, partial_callback: Optional[Callable[[str], None]] = None):
+        """
+        Args:
+            backend: STT backend implementing decode_words(audio, prompt).
+            sample_rate (int): Sample rate of the utterance buffer.
+            interval_ms (int): New audio needed before the window is decoded again.
+            trim_s (float): Window length after which committed audio is dropped from the window.
+            partial_callback (callable): Called with the running transcript when it changes.
+        """
+        self.backend = backend
+        self.sample_rate = sample_rate
+        self.interval = int(sample_rate * interval_ms / 1000)
+        self.trim = int(sample_rate * trim_s)
+        self.partial_callback = partial_callback
+        self.agreement = LocalAgreement()
+        self._thread = None
+        self._new_audio = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()  # One decode at a time
+        self.decodes = 0
+
+    def start(self, utterance, background: bool = True):
+        """
+        Begin following an UtteranceBuffer that the caller keeps appending to.
+
+        Args:
+            utterance (UtteranceBuffer): Buffer being captured into.
+            background (bool): Decode in a worker thread; if False the caller drives update().
+        """
+        self.cancel()
+        self.utterance = utterance
+        self.agreement.reset()
+        self.window_start = 0
+        self.decoded_length = 0
+        self.decodes = 0
+        self._last_partial = ""
+        self._stop.clear()
+        self._new_audio.clear()
+        if background:
+            self._thread = threading.Thread(target=self._worker, name="STTStreamThread", daemon=True)
+            self._thread.start()
+
+    def notify(self):
+        """Signal that speech audio was appended to the utterance."""
+        self._new_audio.set()
+
+    def cancel(self):
+        """Stop following the utterance without producing a result."""
+        if self._thread is not None:
+            self._stop.set()
+            self._new_audio.set()
+            self._thread.join()
+            self._thread = None
+
+    def finalize(self) -> Optional[str]:
+        """
+        Decode the uncommitted tail once more and return the full transcript.
+
+        Returns:
+            str or None: JSON message with a "text" field, or None if nothing was recognized.
+        """
+        self.cancel()
+        with self._lock:
+            # Everything up to the last committed word is settled; only the rest is decoded
+            self.window_start = max(self.window_start, int(self.agreement.last_committed_end * self.sample_rate))
+            self.agreement.flush(self._decode_window(self.utterance.length))
+        text = self.agreement.committed_text
+        self._emit_partial("")
+        if text:
+            return json.dumps({"text": text})
+        return None
+
+    def _worker(self):
+        while not self._stop.is_set():
+            self._new_audio.wait(0.1)
+            self._new_audio.clear()
+            if self._stop.is_set():
+                break
+            try:
+                self.update()
+            except Exception as e:
+                queue_message(f"WARNING: Streaming transcription update failed: {e}")
+
+    def update(self) -> bool:
+        """
+        Re-decode the window if at least `interval` new samples arrived.
+
+        Returns:
+            bool: True if a decode ran.
+        """
+        length = self.utterance.length
+        if length - self.decoded_length < self.interval:
+            return False
+        with self._lock:
+            self.agreement.insert(self._decode_window(length))
+            self._trim_window()
+        self._emit_partial((self.agreement.committed_text + " " + self.agreement.pending_text).strip())
+        return True
+
+    def _decode_window(self, length: int) -> List[Word]:
+        """Decode audio from the window start to `length`, with absolute word times."""
+        self.decoded_length = length
+        if length <= self.window_start:
+            return []
+        pcm = self.utterance.pcm[self.window_start:length]
+        audio = pcm.astype(np.float32) * (1.0 / 32768.0)
+        offset = self.window_start / self.sample_rate
+        prompt = self.agreement.committed_text[-200:] or None
+        self.decodes += 1
+        return [(start + offset, end + offset, text) for start, end, text in self.backend.decode_words(audio, prompt)]
+
+    def _trim_window(self):
+        """Drop committed audio from the window once it grows past `trim`."""
+        if self.decoded_length - self.window_start > self.trim and self.agreement.committed:
+            self.window_start = int(self.agreement.last_committed_end * self.sample_rate)
+
+    def _emit_partial(self, text: str):
+        if text == self._last_partial:
+            return
+        self._last_partial = text
+        if self.partial_callback:
+            try:
+                self.partial_callback(text)
+            except Exception as e:
+                queue_message(f"WARNING: Partial transcript callback failed: {e}")
+
+
+class _StreamCancelled(Exception):
+    pass
+
+
+class ServerStreamingTranscription:
+    """
+    Streams one utterance to app-server.py's /stream_audio while it is being
+    captured. Same interface as StreamingTranscription; the server decodes
+    incrementally, so after the end of the upload only the tail is left to decode.
+    """
+
+    def __init__(self, url: str, sample_rate: int = 16000, timeout: float = 10.0):
+        """
+        Args:
+            url (str): Base URL of the STT server.
+            sample_rate (int): Sample rate of the utterance buffer.
+            timeout (float): Seconds to wait for the text after the end of the upload.
+        """
+        self.url = f"{url.rstrip('/')}/stream_audio"
+        self.sample_rate = sample_rate
+        self.timeout = timeout
+        self._thread = None
+        self._new_audio = threading.Event()
+        self._end = threading.Event()
+        self._stop = threading.Event()
+        self.decodes = 0
+
+    def start(self, utterance, background: bool = True):
+        """
+        Begin uploading an UtteranceBuffer that the caller keeps appending to.
+        The upload only starts with the first notify(), once speech was detected.
+        """
+        self.cancel()
+        self.utterance = utterance
+        self.sent = 0
+        self.decodes = 0
+        self._result = None
+        self._error = None
+        self._stop.clear()
+        self._end.clear()
+        self._new_audio.clear()
+        self._thread = threading.Thread(target=self._upload, name="STTUploadThread", daemon=True)
+        self._thread.start()
+
+    def notify(self):
+        """Signal that speech audio was appended to the utterance."""
+        self._new_audio.set()
+
+    def cancel(self):
+        """Abort the upload without waiting for a result."""
+        if self._thread is not None:
+            self._stop.set()
+            self._new_audio.set()
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def finalize(self) -> Optional[str]:
+        """
+        Send the rest of the utterance, mark the end of the stream and wait for the text.
+
+        Returns:
+            str or None: JSON message with a "text" field, or None if nothing was recognized.
+        """
+        self._end.set()
+        self._new_audio.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.timeout)
+            if self._thread.is_alive():
+                self.cancel()
+                raise TimeoutError("STT server did not answer in time")
+            self._thread = None
+        if self._error is not None:
+            raise self._error
+
+        text = (self._result or {}).get("text", "").strip()
+        self.decodes = (self._result or {}).get("decodes", 0)
+        if text:
+            return json.dumps({"text": text})
+        return None
+
+    def _chunks(self):
+        """Request body: int16 PCM as it is captured; ends after finalize()."""
+        while not self._new_audio.is_set() and not self._end.is_set():
+            self._new_audio.wait(0.05)
+            if self._stop.is_set():
+                raise _StreamCancelled()
+        while True:
+            self._new_audio.wait(0.05)
+            self._new_audio.clear()
+            if self._stop.is_set():
+                # Raising drops the connection, so the server does not decode a cancelled turn
+                raise _StreamCancelled()
+            end = self._end.is_set()
+            length = self.utterance.length
+            if length > self.sent:
+                yield self.utterance.pcm[self.sent:length].tobytes()
+                self.sent = length
+            if end:
+                return
+
+    def _upload(self):
+        import requests
+        try:
+            # A generator body is sent with chunked transfer encoding
+            response = requests.post(
+                self.url, data=self._chunks(), params={"rate": self.sample_rate},
+                headers={"Content-Type": "application/octet-stream"}, timeout=(3.0, self.timeout),
+            )
+            response.raise_for_status()
+            self._result = response.json()
+        except _StreamCancelled:
+            pass
+        except Exception as e:
+            if not self._stop.is_set():
+                self._error = e
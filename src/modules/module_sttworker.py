@@ -0,0 +1,352 @@
+"""
+module_sttworker.py
+
+Out-of-process speech recognition for TARS-AI.
+
+With `stt_process = True` in [STT], capture, wake word, VAD and STT run in a
+dedicated worker process, so their inference no longer competes for the GIL
+with TTS synthesis, embeddings, BLIP and the web UI. The worker captures into a
+shared-memory ring that the main process reads without copying, and sends
+transcripts and events over a pipe. STTWorkerClient has the same callback
+interface as STTManager, runs the callbacks in the main process and restarts
+the worker if it dies.
+"""
+
+# === Standard Libraries ===
+import itertools
+import multiprocessing
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+import numpy as np
+
+from modules.module_messageQue import queue_message
+from modules.module_config import load_config
+from modules.module_audiobuffer import RingReader, SharedAudioRing
+from modules.module_audioio import AudioSink, get_audio_sink, set_audio_sink
+from modules.module_stt import ConversationState
+
+
+# === Worker Process ===
+class _WorkerLink:
+    """
+    Worker side of the pipe: thread-safe sends, blocking calls into the main
+    process, and a receiver thread for replies, playback reference and stop.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.stopped = threading.Event()
+        self._send_lock = threading.Lock()
+        self._calls = {}  # call id -> Event
+        self._call_ids = itertools.count()
+        self.reference_sink = None
+        threading.Thread(target=self._receive_loop, name="STTWorkerLink", daemon=True).start()
+
+    def send(self, *message):
+        with self._send_lock:
+            try:
+                self.conn.send(message)
+            except (OSError, ValueError):
+                self.stopped.set()
+
+    def call(self, name: str, *args):
+        """Run a callback in the main process and wait until it returns."""
+        call_id = next(self._call_ids)
+        done = threading.Event()
+        self._calls[call_id] = done
+        self.send("call", call_id, name, args)
+        while not done.wait(0.5):
+            if self.stopped.is_set():
+                break
+        self._calls.pop(call_id, None)
+
+    def _receive_loop(self):
+        while not self.stopped.is_set():
+            try:
+                message = self.conn.recv()
+            except (EOFError, OSError):
+                # Main process is gone
+                break
+            kind = message[0]
+            if kind == "return":
+                done = self._calls.get(message[1])
+                if done is not None:
+                    done.set()
+            elif kind == "reference" and self.reference_sink is not None:
+                self.reference_sink.reference.extend(message[1])
+            elif kind == "stop":
+                break
+        self.stopped.set()
+
+
+class _PipeSink(AudioSink):
+    """
+    Worker-side sink: beeps are played by the main process, and what the main
+    process plays is mirrored into `reference` for barge-in detection.
+    """
+
+    name = "pipe"
+
+    def __init__(self, link: _WorkerLink):
+        super().__init__(realtime=True)
+        self.link = link
+        link.reference_sink = self
+
+    def _write(self, data: np.ndarray, sample_rate: int):
+        self.link.send("play", np.asarray(data), sample_rate)
+
+
+def _worker_main(conn):
+    """
+    Entry point of the STT worker process.
+    """
+    from modules.module_stt import STTManager
+
+    link = _WorkerLink(conn)
+    set_audio_sink(_PipeSink(link))
+    config = load_config()
+    shutdown_event = threading.Event()
+
+    manager = STTManager(config=config, shutdown_event=shutdown_event, shared_audio=True)
+    manager.set_wake_word_callback(lambda response: link.call("wake_word", response))
+    manager.set_utterance_callback(lambda message: link.call("utterance", message))
+    manager.set_post_utterance_callback(lambda: link.call("post_utterance"))
+    manager.set_partial_callback(lambda text: link.send("partial", text))
+    manager.set_barge_in_callback(lambda: link.send("barge_in"))
+    manager.set_state_callback(lambda state: link.send("state", state.name))
+    link.send("audio", manager.mic.ring.name, manager.mic.ring.capacity, manager.SAMPLE_RATE)
+    manager.start()
+
+    finished_sent = False
+    while not link.stopped.is_set() and manager.running:
+        time.sleep(0.1)
+        if not finished_sent and manager.mic.finished():
+            link.send("finished")
+            finished_sent = True
+    manager.stop()
+    manager.mic.ring.close()
+
+
+# === Main Process ===
+class SharedMicrophone:
+    """
+    Read side of the worker's MicrophoneBroker, with the same reader API.
+    """
+
+    def __init__(self):
+        self.ring = None
+        self.sample_rate = None
+        self._finished = threading.Event()
+
+    def attach(self, name: str, capacity: int, sample_rate: int):
+        """Map the ring of a (re)started worker."""
+        self.detach()
+        self.ring = SharedAudioRing(capacity, name=name)
+        self.sample_rate = sample_rate
+
+    def detach(self, unlink: bool = True):
+        """Unmap the ring, and free it if the worker can no longer do so."""
+        ring, self.ring = self.ring, None
+        if ring is not None:
+            ring.close()
+            if unlink:
+                ring.unlink()
+
+    def finished(self) -> bool:
+        """True once a replayed recording has been delivered completely."""
+        return self._finished.is_set()
+
+    def mark_finished(self):
+        self._finished.set()
+
+    def subscribe(self, name: str, preroll: float = 0.0) -> RingReader:
+        reader = RingReader(self.ring, name, self.ring.write_position)
+        reader.seek_latest(int(preroll * self.sample_rate))
+        return reader
+
+    def position(self) -> int:
+        return self.ring.write_position
+
+    def time_of(self, position: int) -> float:
+        clock_position, clock_time = self.ring.clock
+        return float(clock_time - (clock_position - position) / self.sample_rate)
+
+
+class STTWorkerClient:
+    """
+    Runs STTManager in a worker process and relays its callbacks.
+    """
+
+    def __init__(self, config, shutdown_event: threading.Event, max_backoff: float = 30.0):
+        """
+        Args:
+            config (dict): Configuration dictionary.
+            shutdown_event (threading.Event): Event to signal when to stop.
+            max_backoff (float): Longest wait between restarts of a crashing worker.
+        """
+        self.config = config
+        self.shutdown_event = shutdown_event
+        self.max_backoff = max_backoff
+        self.running = False
+        self.state = ConversationState.SLEEPING
+        self.mic = SharedMicrophone()
+        self.restarts = 0
+        self.generation = 0  # Incremented per worker; tags its calls so replies reach only that worker
+
+        self.wake_word_callback: Optional[Callable[[str], None]] = None
+        self.utterance_callback: Optional[Callable[[str], None]] = None
+        self.post_utterance_callback: Optional[Callable[[], None]] = None
+        self.partial_callback: Optional[Callable[[str], None]] = None
+        self.barge_in_callback: Optional[Callable[[], None]] = None
+
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+        self._send_lock = threading.Lock()
+        self._calls = queue.Queue()  # Blocking callbacks, run in order on their own thread
+
+    def start(self):
+        """Start the worker and the threads that supervise it and run its callbacks."""
+        self.running = True
+        if self.config["STT"]["barge_in"]:
+            # The worker needs to know what TARS is saying to ignore it
+            get_audio_sink().reference.listener = lambda frames: self._send("reference", frames)
+        threading.Thread(target=self._callback_loop, name="STTCallbackThread", daemon=True).start()
+        self.thread = threading.Thread(target=self._supervise, name="STTSupervisor", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop the worker and free the shared audio ring."""
+        self.running = False
+        self._send("stop")
+        if self._process is not None:
+            self._process.join(timeout=5)
+            if self._process.is_alive():
+                self._process.terminate()
+        self.thread.join(timeout=5)
+        self.mic.detach()
+
+    def _send(self, *message):
+        with self._send_lock:
+            if self._conn is None:
+                return
+            try:
+                self._conn.send(message)
+            except (OSError, ValueError):
+                pass
+
+    def _supervise(self):
+        """Run the worker, restarting it with exponential backoff whenever it dies."""
+        backoff = 1.0
+        while self.running and not self.shutdown_event.is_set():
+            started = time.monotonic()
+            parent_conn, child_conn = self._context.Pipe()
+            self._process = self._context.Process(target=_worker_main, args=(child_conn,), name="STTWorker", daemon=True)
+            self._process.start()
+            child_conn.close()
+            with self._send_lock:
+                self._conn = parent_conn
+                self.generation += 1
+            queue_message(f"INFO: STT worker started (pid {self._process.pid}).")
+
+            self._receive_loop(parent_conn, self.generation)
+
+            with self._send_lock:
+                self._conn = None
+            parent_conn.close()
+            self._process.join(timeout=5)
+            self.mic.detach()
+            if not self.running or self.shutdown_event.is_set():
+                break
+
+            # A worker that ran for a while gets a fresh backoff
+            if time.monotonic() - started > 60:
+                backoff = 1.0
+            self.restarts += 1
+            self.state = ConversationState.SLEEPING
+            queue_message(f"ERROR: STT worker exited (code {self._process.exitcode}), "
+                          f"restarting in {backoff:.0f}s (restart {self.restarts}).")
+            self.shutdown_event.wait(backoff)
+            backoff = min(backoff * 2, self.max_backoff)
+
+    def _receive_loop(self, conn, generation: int):
+        """Handle messages of worker `generation` until it exits."""
+        while True:
+            try:
+                if not conn.poll(0.5):
+                    if not self._process.is_alive():
+                        return
+                    continue
+                message = conn.recv()
+            except (EOFError, OSError):
+                return
+
+            kind = message[0]
+            if kind == "call":
+                self._calls.put((generation,) + message[1:])
+            elif kind == "partial":
+                if self.partial_callback:
+                    self.partial_callback(message[1])
+            elif kind == "barge_in":
+                get_audio_sink().interrupt()
+                if self.barge_in_callback:
+                    self.barge_in_callback()
+            elif kind == "state":
+                self.state = ConversationState[message[1]]
+            elif kind == "play":
+                threading.Thread(target=get_audio_sink().play_cue, args=message[1:], daemon=True).start()
+            elif kind == "audio":
+                self.mic.attach(*message[1:])
+            elif kind == "finished":
+                self.mic.mark_finished()
+
+    def _callback_loop(self):
+        callbacks = {
+            "wake_word": lambda: self.wake_word_callback,
+            "utterance": lambda: self.utterance_callback,
+            "post_utterance": lambda: self.post_utterance_callback,
+        }
+        while True:
+            generation, call_id, name, args = self._calls.get()
+            try:
+                if name in ("wake_word", "utterance"):
+                    # A new reply may play even if the last one was cut short
+                    get_audio_sink().resume()
+                callback = callbacks[name]()
+                if callback:
+                    callback(*args)
+            except Exception as e:
+                queue_message(f"ERROR: STT callback '{name}' failed: {e}")
+            finally:
+                self._return(generation, call_id)
+
+    def _return(self, generation: int, call_id: int):
+        """Release a blocked call, unless it came from an earlier worker."""
+        with self._send_lock:
+            # Call ids restart with each worker, so a stale reply would release a call of its successor
+            if self._conn is None or generation != self.generation:
+                return
+            try:
+                self._conn.send(("return", call_id))
+            except (OSError, ValueError):
+                pass
+
+    # === Callback Setters ===
+
+    def set_wake_word_callback(self, callback: Callable[[str], None]):
+        self.wake_word_callback = callback
+
+    def set_utterance_callback(self, callback: Callable[[str], None]):
+        self.utterance_callback = callback
+
+    def set_post_utterance_callback(self, callback: Callable[[], None]):
+        self.post_utterance_callback = callback
+
+    def set_barge_in_callback(self, callback: Callable[[], None]):
+        self.barge_in_callback = callback
+
+    def set_partial_callback(self, callback: Callable[[str], None]):
+        self.partial_callback = callback
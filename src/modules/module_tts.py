@@ -15,10 +15,13 @@ import requests
 import os 
 from datetime import datetime
 import numpy as np
-import sounddevice as sd
 import soundfile as sf
 from io import BytesIO
 import asyncio
+import queue
+import threading
+import time
+from collections import deque
 
 from modules.module_piper import text_to_speech_with_pipelining_piper
 from modules.module_silero import text_to_speech_with_pipelining_silero
@@ -27,6 +30,14 @@ from modules.module_alltalk import text_to_speech_with_pipelining_alltalk
 from modules.module_elevenlabs import text_to_speech_with_pipelining_elevenlabs
 from modules.module_azure import text_to_speech_with_pipelining_azure
 from modules.module_messageQue import queue_message
+from modules.module_audioio import get_audio_sink
+from modules.module_ttscache import get_tts_cache, tts_settings
+from modules.module_config import load_config
+
+CONFIG = load_config()
+
+# Timing of recent replies: time to first audio and the silences between sentences
+_reply_stats = deque(maxlen=50)
 
 def update_tts_settings(ttsurl):
     """
@@ -64,7 +75,7 @@ def update_tts_settings(ttsurl):
 
 def play_audio_stream(tts_stream, samplerate=22050, channels=1, gain=1.0, normalize=False):
     """
-    Play the audio stream through speakers using SoundDevice with volume/gain adjustment.
+    Play the audio stream through the configured audio sink with volume/gain adjustment.
     
     Parameters:
     - tts_stream: Stream of audio data in chunks.
@@ -74,8 +85,11 @@ def play_audio_stream(tts_stream, samplerate=22050, channels=1, gain=1.0, normal
     - normalize: Whether to normalize the audio to use the full dynamic range.
     """
     try:
-        with sd.OutputStream(samplerate=samplerate, channels=channels, dtype='int16', blocksize=4096) as stream:
+        sink = get_audio_sink()
+        with sink.open_stream(samplerate, channels) as stream:
             for chunk in tts_stream:
+                if sink.interrupted:
+                    break
                 if chunk:
                     # Convert bytes to int16 using numpy
                     audio_data = np.frombuffer(chunk, dtype='int16')
@@ -97,9 +111,45 @@ def play_audio_stream(tts_stream, samplerate=22050, channels=1, gain=1.0, normal
         queue_message(f"ERROR: Error during audio playback: {e}")
 
 
+async def _synthesize(text, ttsoption):
+    """
+    Yield the audio chunks of `text` from the selected TTS backend.
+    """
+    # Azure TTS generation
+    if ttsoption == "azure":
+        async for chunk in text_to_speech_with_pipelining_azure(text):
+            yield chunk
+
+    # Local TTS generation using `espeak-ng`
+    elif ttsoption == "espeak":
+        async for chunk in text_to_speech_with_pipelining_espeak(text):
+            yield chunk
+
+    elif ttsoption == "alltalk":
+        async for chunk in text_to_speech_with_pipelining_alltalk(text):
+            yield chunk
+
+    # Local TTS generation using local onboard PIPER TTS
+    elif ttsoption == "piper":
+        async for chunk in text_to_speech_with_pipelining_piper(text):
+            yield chunk
+
+    elif ttsoption == "elevenlabs":
+        async for chunk in text_to_speech_with_pipelining_elevenlabs(text):
+            yield chunk
+
+    elif ttsoption == "silero":
+        async for chunk in text_to_speech_with_pipelining_silero(text):
+            yield chunk
+
+    else:
+        raise ValueError(f"ERROR: Invalid TTS option.")
+
 async def generate_tts_audio(text, ttsoption, azure_api_key=None, azure_region=None, ttsurl=None, toggle_charvoice=True, tts_voice=None):
     """
     Generate TTS audio for the given text using the specified TTS system.
+    Short texts are served from the TTS cache when they have been spoken before,
+    and stored in it once they have been synthesized completely.
 
     Parameters:
     - text (str): The text to convert into speech.
@@ -109,48 +159,215 @@ async def generate_tts_audio(text, ttsoption, azure_api_key=None, azure_region=N
     - tts_voice (str): The TTS speaker/voice configuration.
     """
     try:
-        # Azure TTS generation
-        if ttsoption == "azure":
-           async for chunk in text_to_speech_with_pipelining_azure(text):
-                yield chunk
-
-        # Local TTS generation using `espeak-ng`
-        elif ttsoption == "espeak":
-            async for chunk in text_to_speech_with_pipelining_espeak(text):
-                yield chunk
-
-        elif ttsoption == "alltalk":
-            async for chunk in text_to_speech_with_pipelining_alltalk(text):
-                yield chunk
-                
-        # Local TTS generation using local onboard PIPER TTS
-        elif ttsoption == "piper":
-            async for chunk in text_to_speech_with_pipelining_piper(text):
-                yield chunk  
-
-        elif ttsoption == "elevenlabs":
-            async for chunk in text_to_speech_with_pipelining_elevenlabs(text):
-                yield chunk
-
-        elif ttsoption == "silero":
-            async for chunk in text_to_speech_with_pipelining_silero(text):
-                yield chunk 
+        cache = get_tts_cache()
+        key = None
+        if cache is not None and len(text) <= CONFIG['TTS']['cache_max_chars']:
+            key = cache.key(text, tts_settings(CONFIG, ttsoption))
+            cached = cache.get(key)
+            if cached is not None:
+                for chunk in cached:
+                    yield BytesIO(chunk)
+                return
 
-        else:
-            raise ValueError(f"ERROR: Invalid TTS option.")
+        chunks = []
+        async for chunk in _synthesize(text, ttsoption):
+            if key is not None:
+                chunk.seek(0)
+                data = chunk.read()
+                chunks.append(data)
+                chunk = BytesIO(data)
+            yield chunk
+        # Only reached when the whole text was synthesized (not on aclose() or errors)
+        if key is not None and chunks:
+            cache.put(key, chunks)
 
     except Exception as e:
         queue_message(f"ERROR: Text-to-speech generation failed: {e}")
 
-async def play_audio_chunks(text, config):
+def prerender_tts(phrases, ttsoption):
+    """
+    Synthesize phrases into the TTS cache ahead of time, so canned lines such as
+    the wake responses play without waiting for synthesis.
+
+    Parameters:
+    - phrases (list): Texts to render.
+    - ttsoption (str): The TTS system to use.
+    """
+    cache = get_tts_cache()
+    if cache is None:
+        return
+    settings = tts_settings(CONFIG, ttsoption)
+    missing = [phrase for phrase in phrases if cache.key(phrase, settings) not in cache]
+
+    async def render():
+        for phrase in missing:
+            async for _ in generate_tts_audio(phrase, ttsoption):
+                pass
+
+    asyncio.run(render())
+    queue_message(f"INFO: TTS cache pre-rendered {len(missing)} of {len(phrases)} phrases.")
+
+def _synthesize_ahead(text, ttsoption, chunks, stop, sink):
+    """
+    Worker thread: synthesize and decode the sentences of `text` into `chunks`,
+    staying at most `chunks.maxsize` sentences ahead of playback.
+
+    Runs the TTS generator on its own event loop, so engines that synthesize
+    synchronously (piper, espeak) do not hold up playback of the previous sentence.
+
+    Parameters:
+    - text (str): The text to speak.
+    - ttsoption (str): The TTS system to use.
+    - chunks (queue.Queue): Receives (data, samplerate) tuples, then None when done.
+    - stop (threading.Event): Set by the consumer to abandon the remaining sentences.
+    - sink (AudioSink): Synthesis is abandoned as soon as it is interrupted.
+    """
+    def cancelled():
+        return stop.is_set() or sink.interrupted
+
+    def put(item):
+        while not cancelled():
+            try:
+                chunks.put(item, timeout=0.05)
+                return
+            except queue.Full:
+                pass
+
+    async def synthesize(generator):
+        async for audio_chunk in generator:
+            if cancelled():
+                break
+            try:
+                data, samplerate = sf.read(audio_chunk, dtype='float32')
+            except Exception as e:
+                queue_message(f"ERROR: Failed to decode audio chunk: {e}")
+                continue
+            put((data, samplerate))
+
+    async def produce():
+        generator = generate_tts_audio(text, ttsoption)
+        task = asyncio.ensure_future(synthesize(generator))
+        try:
+            # Cancel the sentence being synthesized instead of waiting for it to finish
+            while not task.done():
+                if cancelled():
+                    task.cancel()
+                    break
+                await asyncio.wait({task}, timeout=0.05)
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        finally:
+            # Closing the generator cancels the sentences not synthesized yet
+            await generator.aclose()
+
+    try:
+        asyncio.run(produce())
+    finally:
+        put(None)
+
+def _next_chunk(chunks, sink):
     """
-    Plays audio chunks sequentially from the generate_tts_audio function.
+    Wait for the next synthesized sentence.
+
+    Returns:
+    - tuple or None: (data, samplerate), or None when synthesis is done or the sink was interrupted.
     """
-    async for audio_chunk in generate_tts_audio(text, config):
+    while not sink.interrupted:
         try:
-            # Read the audio chunk into a format playable by sounddevice
-            data, samplerate = sf.read(audio_chunk, dtype='float32')
-            sd.play(data, samplerate)
-            await asyncio.sleep(len(data) / samplerate)  # Wait for playback to finish
-        except Exception as e:
-            queue_message(f"ERROR: Failed to play audio chunk: {e}")
\ No newline at end of file
+            return chunks.get(timeout=0.05)
+        except queue.Empty:
+            pass
+    return None
+
+def _record_reply_stats(first_audio, gaps, count):
+    """
+    Keep and log the timing of one spoken reply.
+
+    Parameters:
+    - first_audio (float): Seconds from the request to the start of the first sentence, or None.
+    - gaps (list): Seconds of silence between consecutive sentences.
+    - count (int): Sentences played.
+    """
+    if first_audio is None:
+        return
+    stats = {
+        "first_audio_ms": first_audio * 1000,
+        "gap_ms": [gap * 1000 for gap in gaps],
+        "sentences": count,
+    }
+    _reply_stats.append(stats)
+    message = f"INFO: TTS first audio after {stats['first_audio_ms']:.0f} ms"
+    if gaps:
+        message += f", gap between sentences avg {np.mean(stats['gap_ms']):.0f} ms / max {max(stats['gap_ms']):.0f} ms"
+    queue_message(message + f" ({count} sentences).")
+
+def get_tts_stats():
+    """
+    Summarize TTS timing over recent replies.
+
+    Returns:
+    - dict: Replies measured, average and worst time to first audio, and average
+      and worst gap between sentences, in milliseconds.
+    """
+    replies = list(_reply_stats)
+    if not replies:
+        return {"replies": 0}
+    first_audio = [reply["first_audio_ms"] for reply in replies]
+    gaps = [gap for reply in replies for gap in reply["gap_ms"]]
+    return {
+        "replies": len(replies),
+        "first_audio_avg_ms": round(float(np.mean(first_audio)), 1),
+        "first_audio_max_ms": round(float(max(first_audio)), 1),
+        "gap_avg_ms": round(float(np.mean(gaps)), 1) if gaps else 0.0,
+        "gap_max_ms": round(float(max(gaps)), 1) if gaps else 0.0,
+    }
+
+async def play_audio_chunks(text, config, lookahead=2):
+    """
+    Speak `text` sentence by sentence. A worker thread synthesizes up to
+    `lookahead` sentences ahead while the current one plays, so each sentence
+    follows the last without waiting for synthesis.
+    Stops synthesizing as soon as the sink is interrupted (the user barged in).
+
+    Parameters:
+    - text (str): The text to speak.
+    - config (str): The TTS system to use (ttsoption).
+    - lookahead (int): Decoded sentences buffered ahead of playback.
+    """
+    sink = get_audio_sink()
+    requested = time.monotonic()
+    chunks = queue.Queue(maxsize=max(1, lookahead))
+    stop = threading.Event()
+    producer = threading.Thread(target=_synthesize_ahead, args=(text, config, chunks, stop, sink),
+                                name="TTSSynthesis", daemon=True)
+    producer.start()
+
+    first_audio = None
+    gaps = []
+    count = 0
+    last_end = None
+    try:
+        while True:
+            chunk = await asyncio.to_thread(_next_chunk, chunks, sink)
+            if chunk is None or sink.interrupted:
+                break
+            data, samplerate = chunk
+            started = time.monotonic()
+            if first_audio is None:
+                first_audio = started - requested
+            else:
+                gaps.append(started - last_end)
+            try:
+                await asyncio.to_thread(sink.play, data, samplerate)  # Returns when playback finishes
+            except Exception as e:
+                queue_message(f"ERROR: Failed to play audio chunk: {e}")
+            last_end = time.monotonic()
+            count += 1
+        if not sink.interrupted:
+            await asyncio.to_thread(sink.drain)  # play() returns just before the end of its audio
+    finally:
+        stop.set()
+        if not sink.interrupted:
+            _record_reply_stats(first_audio, gaps, count)
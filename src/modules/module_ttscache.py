@@ -0,0 +1,263 @@
+"""
+module_ttscache.py
+
+Persistent cache of synthesized speech for TARS-AI.
+
+Much of what TARS says repeats word for word: wake responses, tool cues, error
+messages and greetings. Synthesized audio is stored under a hash of the text and
+every setting that changes how it sounds (backend, voice, effects), first in an
+in-memory LRU and then on disk, so a repeated line costs a dictionary lookup or
+a file read instead of an Azure/ElevenLabs request or a CPU-bound synthesis.
+Both tiers are bounded by size and evict the least recently used entries.
+"""
+
+# === Standard Libraries ===
+import hashlib
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+from modules.module_messageQue import queue_message
+from modules.module_config import load_config
+from modules.module_ttseffects import TARS_EFFECTS
+
+# Bump when the audio produced for the same settings changes
+CACHE_VERSION = 2
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class TTSCache:
+    """
+    Two-tier (memory, disk) cache mapping a key to the WAV chunks of one utterance.
+    """
+
+    def __init__(self, directory: str, memory_bytes: int = 16 << 20, disk_bytes: int = 200 << 20):
+        """
+        Args:
+            directory (str): Where cached utterances are stored, one file each.
+            memory_bytes (int): Size of the in-memory LRU.
+            disk_bytes (int): Size of the on-disk tier.
+        """
+        self.directory = directory
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+        self._memory = OrderedDict()  # key -> list of bytes, most recently used last
+        self._memory_size = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        self._disk = {}  # key -> file size
+        for name in os.listdir(directory):
+            if name.endswith(".tts"):
+                self._disk[name[:-4]] = os.path.getsize(os.path.join(directory, name))
+        self._disk_size = sum(self._disk.values())
+
+    @staticmethod
+    def key(text: str, settings: dict) -> str:
+        """
+        Content address of `text` spoken with `settings`.
+
+        Args:
+            text (str): The text to speak.
+            settings (dict): Everything that affects the audio (backend, voice, effects...).
+
+        Returns:
+            str: Hex digest.
+        """
+        payload = json.dumps({"v": CACHE_VERSION, "text": text.strip(), "settings": settings}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.tts")
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            return key in self._memory or key in self._disk
+
+    def get(self, key: str) -> Optional[List[bytes]]:
+        """
+        Returns:
+            list: The cached WAV chunks, or None on a miss.
+        """
+        with self._lock:
+            chunks = self._memory.get(key)
+            if chunks is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return chunks
+            on_disk = key in self._disk
+
+        chunks = self._read(key) if on_disk else None
+        with self._lock:
+            if chunks is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, chunks)
+        return chunks
+
+    def put(self, key: str, chunks: List[bytes]):
+        """
+        Store the WAV chunks of one utterance in both tiers.
+        """
+        with self._lock:
+            self.stores += 1
+            self._remember(key, chunks)
+            if key in self._disk:
+                return
+        size = self._write(key, chunks)
+        if size is None:
+            return
+        with self._lock:
+            self._disk[key] = size
+            self._disk_size += size
+            self._evict_disk()
+
+    def _remember(self, key: str, chunks: List[bytes]):
+        """Add to the memory tier (lock held)."""
+        size = sum(len(chunk) for chunk in chunks)
+        if size > self.memory_bytes:
+            return
+        if key in self._memory:
+            self._memory_size -= sum(len(chunk) for chunk in self._memory.pop(key))
+        self._memory[key] = chunks
+        self._memory_size += size
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= sum(len(chunk) for chunk in evicted)
+
+    def _evict_disk(self):
+        """Delete the least recently used files until the disk tier fits (lock held)."""
+        if self._disk_size <= self.disk_bytes:
+            return
+        by_age = sorted(self._disk, key=lambda key: self._mtime(key))
+        for key in by_age:
+            if self._disk_size <= self.disk_bytes:
+                break
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+            self._disk_size -= self._disk.pop(key)
+            self.evictions += 1
+
+    def _mtime(self, key: str) -> float:
+        try:
+            return os.path.getmtime(self._path(key))
+        except OSError:
+            return 0.0
+
+    # File layout: chunk count, then each chunk as a length and its bytes
+    def _read(self, key: str) -> Optional[List[bytes]]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            os.utime(path)  # Recently used, for eviction
+            (count,), offset, chunks = struct.unpack_from(">I", data), 4, []
+            for _ in range(count):
+                (length,) = struct.unpack_from(">I", data, offset)
+                offset += 4
+                chunks.append(data[offset:offset + length])
+                offset += length
+            return chunks
+        except (OSError, struct.error) as e:
+            queue_message(f"WARNING: Dropping unreadable TTS cache entry {key[:12]}: {e}")
+            with self._lock:
+                self._disk_size -= self._disk.pop(key, 0)
+            return None
+
+    def _write(self, key: str, chunks: List[bytes]) -> Optional[int]:
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as f:
+                f.write(struct.pack(">I", len(chunks)))
+                for chunk in chunks:
+                    f.write(struct.pack(">I", len(chunk)))
+                    f.write(chunk)
+            os.replace(temp_path, path)  # Readers never see a partial file
+            return os.path.getsize(path)
+        except OSError as e:
+            queue_message(f"ERROR: Could not write TTS cache entry: {e}")
+            return None
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: hits per tier, misses, hit rate, stores, files evicted and tier sizes.
+        """
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+                "memory_entries": len(self._memory),
+                "memory_mb": round(self._memory_size / (1 << 20), 2),
+                "disk_entries": len(self._disk),
+                "disk_mb": round(self._disk_size / (1 << 20), 2),
+            }
+
+
+def tts_settings(config, ttsoption: str) -> dict:
+    """
+    The settings that change how `ttsoption` sounds, for the cache key.
+
+    Parameters:
+    - config (dict): Configuration dictionary.
+    - ttsoption (str): The TTS backend.
+
+    Returns:
+    - dict: Backend, voice and effects settings.
+    """
+    tts = config["TTS"]
+    settings = {
+        "ttsoption": ttsoption,
+        "tts_voice": tts["tts_voice"],
+        "toggle_charvoice": tts["toggle_charvoice"],
+        "voice_id": tts["voice_id"],
+        "model_id": tts["model_id"],
+        "ttsurl": tts["ttsurl"],
+    }
+    if ttsoption in ("espeak", "silero"):
+        settings["effects"] = TARS_EFFECTS
+    return settings
+
+
+def get_tts_cache() -> Optional[TTSCache]:
+    """
+    Shared TTS cache configured in [TTS], created on first use.
+
+    Returns:
+    - TTSCache: The cache, or None if caching is disabled.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            return _cache
+        config = load_config()
+        tts = config["TTS"]
+        if not tts["cache"]:
+            return None
+        directory = tts["cache_dir"]
+        if not os.path.isabs(directory):
+            directory = os.path.join(config["BASE_DIR"], directory)
+        _cache = TTSCache(directory, int(tts["cache_memory_mb"] * (1 << 20)), int(tts["cache_disk_mb"] * (1 << 20)))
+        stats = _cache.stats()
+        queue_message(f"LOAD: TTS cache at {directory} ({stats['disk_entries']} phrases, {stats['disk_mb']} MB).")
+        return _cache
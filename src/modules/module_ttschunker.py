@@ -0,0 +1,194 @@
+"""
+module_ttschunker.py
+
+Text chunking for the TTS backends of TARS-AI.
+
+Text is synthesized one chunk at a time, so the first chunk decides how soon
+TARS starts talking. TextChunker therefore emits a deliberately short first
+chunk, cut at the first clause boundary, and after that packs whole sentences
+into chunks of similar estimated synthesis cost, splitting very long sentences
+at clauses. Sentences end at . ? ! ; ellipses and newlines, but not after
+abbreviations ("Dr.", "e.g."), initials or before a lowercase word, and decimal
+numbers are never split. Text can be fed all at once (chunk_text) or piece by
+piece as an LLM streams it; a chunk is emitted as soon as its end is certain.
+"""
+
+# === Standard Libraries ===
+import re
+from typing import List
+
+ABBREVIATIONS = {
+    "mr", "mrs", "ms", "dr", "prof", "sr", "jr", "st", "mt", "vs", "etc", "e.g", "i.e", "a.m", "p.m",
+    "u.s", "u.k", "approx", "dept", "inc", "ltd", "corp",
+    "jan", "feb", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+}
+# Only abbreviations when a number follows ("No. 5", but "I said no. Then")
+NUMBER_ABBREVIATIONS = {"no", "nos", "fig", "vol", "p", "pp"}
+
+# Sentence end: punctuation (and closing quotes/brackets) followed by whitespace and
+# more text, or a line break. The following character is needed to rule out
+# abbreviations, so a boundary at the very end of streamed text waits for more.
+_SENTENCE_END = re.compile(r"([.!?;…]+[\"')\]]*)\s+(?=(\S))|\n\s*(?=\S)")
+_CLAUSE_END = re.compile(r"[,:]\s+(?=\S)|\s+[-–—]+\s+(?=\S)")
+_WORD = re.compile(r"\S+")
+
+
+def estimate_cost(text: str) -> int:
+    """
+    Rough synthesis cost of `text`, in spoken characters; digits count extra
+    because "1987" is read as "nineteen eighty-seven".
+    """
+    digits = sum(char.isdigit() for char in text)
+    return len(text) + 3 * digits
+
+
+def _is_sentence_end(text: str, match) -> bool:
+    """False for the periods of abbreviations and initials, and for a period or ellipsis before a lowercase word."""
+    if match.group(1) is None:
+        return True  # Line break
+    punctuation = match.group(1)
+    following = match.group(2)
+    if punctuation[0] in "!?;":
+        return True
+    if following.islower():
+        return False  # "approx. five", "wait... what"
+    if punctuation.rstrip("\"')]") == ".":
+        words = text[:match.start()].split()
+        word = words[-1].lower().lstrip("(\"'") if words else ""
+        if word in ABBREVIATIONS or (word in NUMBER_ABBREVIATIONS and following.isdigit()):
+            return False
+        if len(word) == 1 and word.isalpha():
+            return False  # Initial, as in "J. R. R. Tolkien"
+    return True
+
+
+class TextChunker:
+    """
+    Cuts text into TTS chunks, incrementally or all at once.
+    """
+
+    def __init__(self, first_min_words: int = 3, target_cost: int = 120, max_cost: int = 240):
+        """
+        Args:
+            first_min_words (int): Fewest words in the first chunk when cutting it at a clause.
+            target_cost (int): Later chunks are filled with whole sentences up to this cost.
+            max_cost (int): Sentences costlier than this are split at clauses.
+        """
+        self.first_min_words = first_min_words
+        self.target_cost = target_cost
+        self.max_cost = max_cost
+        self.reset()
+
+    def reset(self):
+        self._buffer = ""
+        self._first_sent = False
+
+    def feed(self, text: str, final: bool = False) -> List[str]:
+        """
+        Add text and return the chunks that are now complete.
+
+        Args:
+            text (str): The next piece of text (e.g. LLM tokens).
+            final (bool): No more text follows; everything left is returned.
+
+        Returns:
+            list: Chunks ready to be synthesized, in order.
+        """
+        self._buffer += text
+        chunks = []
+        if not self._first_sent:
+            first = self._take_first(final)
+            if first is None:
+                return chunks
+            chunks.append(first)
+        chunks.extend(self._pack(self._take_sentences(final)))
+        if final:
+            self.reset()
+        return chunks
+
+    def finish(self) -> List[str]:
+        """Return the remaining text as chunks and start over."""
+        return self.feed("", final=True)
+
+    def _take_first(self, final: bool):
+        """
+        Cut the first chunk at its first clause (or sentence) boundary, or return
+        None while it is not known yet.
+        """
+        sentence_end = self._next_sentence_end(self._buffer)
+        limit = sentence_end.start() if sentence_end else len(self._buffer)
+        for clause in _CLAUSE_END.finditer(self._buffer, 0, limit):
+            before = self._buffer[:clause.start()]
+            if len(_WORD.findall(before)) >= self.first_min_words:
+                return self._cut(clause.end())
+        if sentence_end is not None:
+            return self._cut(sentence_end.end())
+        if final and self._buffer.strip():
+            return self._cut(len(self._buffer))
+        return None
+
+    def _next_sentence_end(self, text: str, start: int = 0):
+        for match in _SENTENCE_END.finditer(text, start):
+            if _is_sentence_end(text, match):
+                return match
+        return None
+
+    def _cut(self, end: int) -> str:
+        chunk, self._buffer = self._buffer[:end].strip(), self._buffer[end:]
+        self._first_sent = True
+        return chunk
+
+    def _take_sentences(self, final: bool) -> List[str]:
+        """Remove and return the complete sentences at the start of the buffer."""
+        sentences = []
+        position = 0
+        while True:
+            match = self._next_sentence_end(self._buffer, position)
+            if match is None:
+                break
+            sentences.append(self._buffer[position:match.end()].strip())
+            position = match.end()
+        self._buffer = self._buffer[position:]
+        if final and self._buffer.strip():
+            sentences.append(self._buffer.strip())
+            self._buffer = ""
+        return [sentence for sentence in sentences if sentence]
+
+    def _split_long(self, sentence: str) -> List[str]:
+        """Split a sentence above max_cost at clause boundaries into pieces near target_cost."""
+        if estimate_cost(sentence) <= self.max_cost:
+            return [sentence]
+        pieces, start = [], 0
+        for clause in _CLAUSE_END.finditer(sentence):
+            if estimate_cost(sentence[start:clause.start()]) >= self.target_cost:
+                pieces.append(sentence[start:clause.end()].strip())
+                start = clause.end()
+        pieces.append(sentence[start:].strip())
+        return [piece for piece in pieces if piece]
+
+    def _pack(self, sentences: List[str]) -> List[str]:
+        """Merge short sentences up to target_cost."""
+        chunks, current = [], ""
+        for sentence in sentences:
+            for piece in self._split_long(sentence):
+                if current and estimate_cost(current) + estimate_cost(piece) > self.target_cost:
+                    chunks.append(current)
+                    current = ""
+                current = f"{current} {piece}" if current else piece
+        if current:
+            chunks.append(current)
+        return chunks
+
+
+def chunk_text(text: str, **kwargs) -> List[str]:
+    """
+    Split complete text into TTS chunks.
+
+    Parameters:
+    - text (str): The text to speak.
+    - **kwargs: first_min_words, target_cost and max_cost as for TextChunker.
+
+    Returns:
+    - list: Non-empty chunks, the first one short.
+    """
+    return TextChunker(**kwargs).feed(text, final=True)
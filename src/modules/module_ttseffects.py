@@ -0,0 +1,264 @@
+"""
+module_ttseffects.py
+
+TARS voice effects for TARS-AI.
+
+The robotic TARS sound is a lowered pitch, a faster delivery and a short metallic
+echo. Each stage is a small stateful numpy processor working on float32 blocks:
+
+- PitchShift: the audio is played back as if recorded at a lower rate
+  (polyphase resampling), which lowers the pitch and stretches it in time.
+- TimeCompress: WSOLA time-scale modification that speeds speech up without
+  changing its pitch, by overlap-adding windowed frames taken from the input at a
+  faster hop, each nudged to line up with the waveform of the previous one.
+- CombEcho: a feed-forward comb filter, the input plus delayed, amplified copies.
+
+TARSEffects chains them and can be fed a whole sentence or consecutive blocks of
+a stream; apply_tars_effects() is the one-shot form used by the espeak and
+Silero backends.
+"""
+
+# === Standard Libraries ===
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from modules.module_resampler import PolyphaseResampler
+
+# Matches the original pydub chain: 0.88x rate, 1.42x speed-up, echoes at 3 and 6 ms
+# boosted by 2 and 1 dB. Part of the TTS cache key, so changing it re-renders phrases.
+TARS_EFFECTS = {
+    "pitch": 0.88,
+    "speed": 1.42,
+    "echo": [(3.0, 2.0), (6.0, 1.0)],  # (delay ms, gain dB)
+}
+
+
+def _as_float(block: np.ndarray) -> np.ndarray:
+    """int16 or float (-1..1) samples as a 1-D float32 array."""
+    block = np.asarray(block)
+    if block.dtype.kind != "f":
+        return block.reshape(-1).astype(np.float32) / 32768.0
+    return block.reshape(-1).astype(np.float32, copy=False)
+
+
+class PitchShift:
+    """
+    Resample-based pitch change: lowers (factor < 1) or raises the pitch and
+    lengthens or shortens the audio by 1 / factor.
+    """
+
+    def __init__(self, sample_rate: int, factor: float):
+        """
+        Args:
+            sample_rate (int): Sample rate of the audio.
+            factor (float): Pitch ratio, e.g. 0.88 for 12% lower.
+        """
+        self.resampler = PolyphaseResampler(int(sample_rate * factor), sample_rate)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        return self.resampler.process(block)
+
+    def flush(self) -> np.ndarray:
+        return self.resampler.flush()
+
+    def reset(self):
+        self.resampler.reset()
+
+
+class TimeCompress:
+    """
+    WSOLA time-scale modification: output duration is input duration / speed,
+    pitch unchanged.
+    """
+
+    def __init__(self, sample_rate: int, speed: float, frame_ms: float = 30.0, tolerance_ms: float = 5.0):
+        """
+        Args:
+            sample_rate (int): Sample rate of the audio.
+            speed (float): Speed-up factor, e.g. 1.42.
+            frame_ms (float): Analysis frame; frames overlap by half.
+            tolerance_ms (float): How far a frame may move to match the previous one.
+        """
+        self.speed = speed
+        self.hop = max(1, int(sample_rate * frame_ms / 2000))  # Synthesis hop
+        self.frame = 2 * self.hop
+        self.tolerance = int(sample_rate * tolerance_ms / 1000)
+        # Periodic Hann: 50% overlapped copies sum to exactly one
+        self.window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(self.frame) / self.frame)).astype(np.float32)
+        self.reset()
+
+    def reset(self):
+        self._input = np.zeros(0, dtype=np.float32)
+        self._input_start = 0  # Absolute index of _input[0]
+        self._received = 0  # Input samples seen
+        self._index = 0  # Next output frame
+        self._previous = None  # Input position of the last frame taken
+        self._overlap = np.zeros(self.frame - self.hop, dtype=np.float32)
+
+    def _frame_position(self, last_input: int) -> Optional[int]:
+        """Input position of the next frame, or None until enough input has arrived."""
+        nominal = int(round(self._index * self.hop * self.speed))
+        low = max(0, nominal - self.tolerance)
+        high = nominal + self.tolerance
+        if high + self.frame > last_input:
+            return None
+        if self._previous is None:
+            return nominal
+
+        # The frame that would naturally follow the previous one in the input
+        target_start = self._previous + self.hop
+        if target_start + self.frame > last_input:
+            return None
+        target = self._input[target_start - self._input_start:target_start - self._input_start + self.frame]
+        region = self._input[low - self._input_start:high + self.frame - self._input_start]
+        scores = np.correlate(region, target, mode="valid")
+        return low + int(np.argmax(scores))
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Compress the next block of a stream.
+
+        Returns:
+            np.ndarray: float32 output; about len(block) / speed samples, delayed
+                by up to one frame plus the search tolerance.
+        """
+        block = _as_float(block)
+        self._input = np.concatenate((self._input, block))
+        self._received += block.size
+        return self._run(self._received)
+
+    def _run(self, last_input: int) -> np.ndarray:
+        outputs = []
+        while True:
+            position = self._frame_position(last_input)
+            if position is None:
+                break
+            start = position - self._input_start
+            frame = self._input[start:start + self.frame] * self.window
+            frame[:self._overlap.size] += self._overlap
+            outputs.append(frame[:self.hop])
+            self._overlap = frame[self.hop:].copy()
+            self._previous = position
+            self._index += 1
+
+        # Keep only what later frames can still reach
+        nominal = int(round(self._index * self.hop * self.speed))
+        keep_from = max(0, nominal - self.tolerance)
+        if self._previous is not None:
+            keep_from = min(keep_from, self._previous + self.hop)
+        drop = keep_from - self._input_start
+        if drop > 0:
+            self._input = self._input[drop:]
+            self._input_start = keep_from
+        return np.concatenate(outputs) if outputs else np.zeros(0, dtype=np.float32)
+
+    def flush(self) -> np.ndarray:
+        """
+        Process the rest of the input (padded with silence) and return the final overlap.
+        """
+        end = self._received
+        padding = np.zeros(self.frame + self.tolerance + int(self.hop * self.speed) + 1, dtype=np.float32)
+        self._input = np.concatenate((self._input, padding))
+        out = [self._run(self._received + padding.size)]
+        # Frames past the real end only carried the padding
+        expected = int(round(end / self.speed))
+        produced = self._index * self.hop
+        out.append(self._overlap)
+        audio = np.concatenate(out)
+        audio = audio[:max(0, audio.size - max(0, produced + self._overlap.size - expected))]
+        self.reset()
+        return audio
+
+
+class CombEcho:
+    """
+    Feed-forward comb filter: the input plus delayed copies at fixed gains.
+    """
+
+    def __init__(self, sample_rate: int, taps: List[Tuple[float, float]]):
+        """
+        Args:
+            sample_rate (int): Sample rate of the audio.
+            taps (list): (delay ms, gain dB) per echo.
+        """
+        self.delays = [max(1, int(sample_rate * delay_ms / 1000)) for delay_ms, _ in taps]
+        self.gains = [np.float32(10 ** (gain_db / 20)) for _, gain_db in taps]
+        self.reset()
+
+    def reset(self):
+        self._history = np.zeros(max(self.delays, default=0), dtype=np.float32)
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        block = _as_float(block)
+        if not self.delays:
+            return block.copy()
+        extended = np.concatenate((self._history, block))
+        out = block.copy()
+        offset = self._history.size
+        for delay, gain in zip(self.delays, self.gains):
+            out += gain * extended[offset - delay:offset - delay + block.size]
+        self._history = extended[extended.size - self._history.size:]
+        return out
+
+    def flush(self) -> np.ndarray:
+        # Like an overlay, the echoes do not extend the audio
+        return np.zeros(0, dtype=np.float32)
+
+
+class TARSEffects:
+    """
+    Pitch shift, WSOLA speed-up and comb echo, in that order, on float32 blocks.
+    """
+
+    def __init__(self, sample_rate: int, pitch: float = TARS_EFFECTS["pitch"], speed: float = TARS_EFFECTS["speed"],
+                 echo: Optional[List[Tuple[float, float]]] = None):
+        """
+        Args:
+            sample_rate (int): Sample rate of the audio (unchanged by the effects).
+            pitch (float): Pitch ratio.
+            speed (float): Speed-up factor.
+            echo (list): (delay ms, gain dB) per echo; TARS_EFFECTS["echo"] if None.
+        """
+        self.sample_rate = sample_rate
+        self.stages = [
+            PitchShift(sample_rate, pitch),
+            TimeCompress(sample_rate, speed),
+            CombEcho(sample_rate, TARS_EFFECTS["echo"] if echo is None else echo),
+        ]
+
+    def process(self, block: np.ndarray) -> np.ndarray:
+        """
+        Process the next block of a stream (int16 or float); returns float32, clipped to -1..1.
+        """
+        block = _as_float(block)
+        for stage in self.stages:
+            block = stage.process(block)
+        return np.clip(block, -1.0, 1.0)
+
+    def flush(self) -> np.ndarray:
+        """
+        Drain the stages at the end of the stream and get ready for a new one.
+        """
+        tail = np.zeros(0, dtype=np.float32)
+        for stage in self.stages:
+            tail = np.concatenate((stage.process(tail), stage.flush())) if tail.size else stage.flush()
+        for stage in self.stages:
+            stage.reset()
+        return np.clip(tail, -1.0, 1.0)
+
+
+def apply_tars_effects(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """
+    Apply the TARS effects to one complete sentence.
+
+    Parameters:
+    - samples (np.ndarray): int16 or float (-1..1) mono audio.
+    - sample_rate (int): Sample rate of the audio.
+
+    Returns:
+    - np.ndarray: int16 audio at the same sample rate.
+    """
+    effects = TARSEffects(sample_rate)
+    audio = np.concatenate((effects.process(samples), effects.flush()))
+    return (audio * 32767).astype(np.int16)
@@ -0,0 +1,478 @@
+"""
+module_vad.py
+
+Voice Activity Detection (VAD) helpers for TARS-AI.
+
+Provides a streaming wrapper around Silero VAD that keeps the model's recurrent
+state between blocks and processes audio in the model's native 512-sample
+windows, emitting speech-start and speech-end events as they happen, a cheap
+energy gate used in front of wake word spotting, a continuously updated
+estimate of the background noise level, a frame-level endpointer, and a
+detector for the user talking over playback.
+"""
+
+# === Standard Libraries ===
+import threading
+from collections import deque
+from typing import List, Optional
+
+import numpy as np
+
+
+class EnergyGate:
+    """
+    RMS gate against an adaptive noise floor.
+
+    Opens when a block is `margin` times louder than the floor and stays open for
+    `hangover_ms` after the last loud block. The floor follows the level of the
+    blocks that do not open the gate, so it tracks slow changes in room noise.
+    """
+
+    def __init__(self, sample_rate: int, margin: float = 2.0, hangover_ms: int = 1500,
+                 floor: float = None, adapt_rate: float = 0.05, min_floor: float = 10.0):
+        """
+        Args:
+            sample_rate (int): Sample rate of the audio fed to process().
+            margin (float): RMS multiple of the noise floor that counts as voice-like energy.
+            hangover_ms (int): Time the gate stays open after the last loud block.
+            floor (float): Initial noise floor RMS (int16 scale); the first block if None.
+            adapt_rate (float): Weight of each quiet block in the floor's moving average.
+            min_floor (float): Lower bound on the floor so digital silence cannot make it 0.
+        """
+        self.sample_rate = sample_rate
+        self.margin = margin
+        self.hangover_samples = int(sample_rate * hangover_ms / 1000)
+        self.adapt_rate = adapt_rate
+        self.min_floor = min_floor
+        self.floor = max(floor, min_floor) if floor else None
+        self._hold = 0
+        self.is_open = False
+        self.last_rms = 0.0
+
+    def reset(self):
+        """Close the gate, keeping the learned noise floor."""
+        self._hold = 0
+        self.is_open = False
+
+    def process(self, data: np.ndarray) -> bool:
+        """
+        Feed one int16 block.
+
+        Returns:
+            bool: True while the gate is open.
+        """
+        samples = data.reshape(-1).astype(np.float32)
+        if samples.size == 0:
+            return self.is_open
+        rms = float(np.sqrt(np.dot(samples, samples) / samples.size))
+        self.last_rms = rms
+
+        if self.floor is None:
+            self.floor = max(rms, self.min_floor)
+
+        if rms > self.floor * self.margin:
+            self._hold = self.hangover_samples
+        else:
+            self._hold = max(0, self._hold - samples.size)
+            self.floor = max(self.min_floor, (1.0 - self.adapt_rate) * self.floor + self.adapt_rate * rms)
+
+        self.is_open = self._hold > 0
+        return self.is_open
+
+
+class NoiseFloorTracker:
+    """
+    Background noise estimate from block RMS values, robust to speech.
+
+    Minimum statistics: the floor is a low percentile of every block RMS seen in
+    the last `window_s` seconds, which follows a fan or TV turning on within one
+    window even while people talk. Blocks within `speech_ratio` of the floor are
+    treated as non-speech, and the noise `level` is a high percentile of those
+    blocks. `level` therefore plays the role of the old one-shot measurement
+    (the loudest plausible noise block).
+    """
+
+    def __init__(self, block_s: float = 0.1, window_s: float = 6.0, floor_percentile: float = 10.0,
+                 level_percentile: float = 90.0, speech_ratio: float = 3.0, min_blocks: int = 10,
+                 min_level: float = 10.0):
+        """
+        Args:
+            block_s (float): Duration of the blocks passed to update().
+            window_s (float): History used for the estimate.
+            floor_percentile (float): Percentile of all blocks taken as the noise floor.
+            level_percentile (float): Percentile of non-speech blocks reported as the level.
+            speech_ratio (float): Blocks louder than floor * speech_ratio count as speech.
+            min_blocks (int): Blocks needed before the first estimate.
+            min_level (float): Lower bound on the reported level (int16 RMS scale).
+        """
+        self.history = deque(maxlen=max(min_blocks, int(window_s / block_s)))
+        self.floor_percentile = floor_percentile
+        self.level_percentile = level_percentile
+        self.speech_ratio = speech_ratio
+        self.min_blocks = min_blocks
+        self.min_level = min_level
+        self.floor: Optional[float] = None
+        self.level: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.level is not None
+
+    def update(self, rms: float) -> Optional[float]:
+        """
+        Add one block RMS and refresh the estimate.
+
+        Returns:
+            float or None: The current noise level, or None until enough blocks were seen.
+        """
+        with self._lock:
+            self.history.append(float(rms))
+            if len(self.history) < self.min_blocks:
+                return None
+
+            values = np.fromiter(self.history, dtype=np.float64, count=len(self.history))
+            floor = max(float(np.percentile(values, self.floor_percentile)), 1.0)
+            quiet = values[values <= floor * self.speech_ratio]
+            level = float(np.percentile(quiet, self.level_percentile)) if quiet.size else floor
+            self.floor = floor
+            self.level = max(level, self.min_level)
+            return self.level
+
+    def update_block(self, data: np.ndarray) -> Optional[float]:
+        """Compute the RMS of an int16 block and pass it to update()."""
+        samples = data.reshape(-1).astype(np.float32)
+        if samples.size == 0:
+            return self.level
+        return self.update(np.sqrt(np.dot(samples, samples) / samples.size))
+
+
+def estimate_pitch(frame: np.ndarray, sample_rate: int, fmin: float = 70.0, fmax: float = 400.0,
+                   min_correlation: float = 0.3) -> float:
+    """
+    Autocorrelation pitch estimate of a short voiced frame.
+
+    Parameters:
+    - frame (np.ndarray): float32 samples, at least two periods of fmin long.
+    - sample_rate (int): Sample rate of the frame.
+    - fmin, fmax (float): Pitch search range in Hz.
+    - min_correlation (float): Normalized peak below which the frame is unvoiced.
+
+    Returns:
+    - float: Fundamental frequency in Hz, or 0.0 if unvoiced.
+    """
+    frame = frame - frame.mean()
+    n = frame.size
+    size = 1 << int(np.ceil(np.log2(2 * n)))
+    spectrum = np.fft.rfft(frame, size)
+    corr = np.fft.irfft(spectrum * np.conj(spectrum), size)[:n]
+    if corr[0] <= 0:
+        return 0.0
+
+    min_lag = max(1, int(sample_rate / fmax))
+    max_lag = min(n - 1, int(sample_rate / fmin))
+    if max_lag <= min_lag:
+        return 0.0
+    lag = min_lag + int(np.argmax(corr[min_lag:max_lag]))
+    if corr[lag] / corr[0] < min_correlation:
+        return 0.0
+    return sample_rate / lag
+
+
+class Endpointer:
+    """
+    Decides when an utterance has ended, frame by frame.
+
+    Audio is split into `frame_ms` frames. A frame is speech when its RMS is above
+    `threshold` and, if a model VAD is in use, the model agrees. Speech starts once
+    `speech_ms` of speech frames have been seen and the turn ends after
+    `hangover_ms` of silence. With `early_endpoint`, a falling pitch and energy
+    contour over the last voiced frames (a finished statement rather than a pause
+    mid-sentence) ends the turn after only `early_hangover_ms`.
+    """
+
+    CONTINUE = None
+    ENDPOINT = "endpoint"
+    EARLY = "early"
+    TIMEOUT = "timeout"
+    MAX_LENGTH = "max_length"
+
+    def __init__(self, sample_rate: int, frame_ms: int = 20, speech_ms: int = 100, hangover_ms: int = 700,
+                 timeout_ms: int = 4000, max_ms: int = 12500, early_endpoint: bool = False,
+                 early_hangover_ms: int = 300, threshold: float = 100.0):
+        """
+        Args:
+            sample_rate (int): Sample rate of the audio fed to process().
+            frame_ms (int): Frame length for speech decisions (20-30 ms).
+            speech_ms (int): Speech needed before the utterance counts as started.
+            hangover_ms (int): Silence after speech that ends the utterance.
+            timeout_ms (int): How long after reset() speech must have started.
+            max_ms (int): Longest utterance.
+            early_endpoint (bool): Enable the pitch and energy early-endpoint rule.
+            early_hangover_ms (int): Silence needed when the early rule applies.
+            threshold (float): Frame RMS (int16 scale) above which a frame may be speech.
+        """
+        self.sample_rate = sample_rate
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.frame_ms = frame_ms
+        self.speech_frames = max(1, speech_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.timeout_frames = max(1, timeout_ms // frame_ms)
+        self.max_frames = max(1, max_ms // frame_ms)
+        self.early_endpoint = early_endpoint
+        self.early_hangover_frames = max(1, early_hangover_ms // frame_ms)
+        self.threshold = threshold
+        self._contour = deque(maxlen=max(3, 300 // frame_ms))  # (rms, pitch) of recent voiced frames
+        self.reset()
+
+    def reset(self):
+        """Start a new utterance."""
+        self._pending = np.zeros(0, dtype=np.float32)
+        self._previous = np.zeros(self.frame, dtype=np.float32)
+        self._contour.clear()
+        self.frames = 0
+        self.speech_run = 0
+        self.silent_frames = 0
+        self.detected_speech = False
+        self.speech_end_sample = None  # End of the last speech frame, in samples since reset()
+        self.final_fall = False
+
+    @property
+    def silence_ms(self) -> int:
+        return self.silent_frames * self.frame_ms
+
+    def process(self, data: np.ndarray, model_speech: Optional[bool] = None) -> Optional[str]:
+        """
+        Feed int16 audio of any length.
+
+        Args:
+            data (np.ndarray): int16 samples.
+            model_speech (bool): Model VAD decision for this block, or None for energy only.
+
+        Returns:
+            str or None: ENDPOINT, EARLY, TIMEOUT or MAX_LENGTH once the turn is over.
+        """
+        audio = data.reshape(-1).astype(np.float32)
+        if self._pending.size:
+            audio = np.concatenate((self._pending, audio))
+        usable = audio.size - audio.size % self.frame
+        self._pending = audio[usable:].copy()
+
+        for start in range(0, usable, self.frame):
+            result = self._process_frame(audio[start:start + self.frame], model_speech)
+            if result is not None:
+                return result
+        return None
+
+    def _process_frame(self, frame: np.ndarray, model_speech: Optional[bool]) -> Optional[str]:
+        self.frames += 1
+        rms = float(np.sqrt(np.dot(frame, frame) / frame.size))
+        is_speech = rms > self.threshold and model_speech is not False
+
+        if is_speech:
+            self.speech_run += 1
+            self.silent_frames = 0
+            self.final_fall = False
+            if self.speech_run >= self.speech_frames:
+                self.detected_speech = True
+            if self.detected_speech:
+                self.speech_end_sample = self.frames * self.frame
+            if self.early_endpoint:
+                pitch = estimate_pitch(np.concatenate((self._previous, frame)), self.sample_rate)
+                if pitch > 0:
+                    self._contour.append((rms, pitch))
+        else:
+            if self.speech_run and self.detected_speech and self.silent_frames == 0 and self.early_endpoint:
+                self.final_fall = self._is_final_fall()
+            self.speech_run = 0
+            self.silent_frames += 1
+        self._previous = frame
+
+        if self.frames >= self.max_frames:
+            return self.MAX_LENGTH
+        if not self.detected_speech:
+            # Counted from the start of listening: short blips must not keep extending it
+            return self.TIMEOUT if self.frames >= self.timeout_frames else None
+        if self.final_fall and self.silent_frames >= self.early_hangover_frames:
+            return self.EARLY
+        if self.silent_frames >= self.hangover_frames:
+            return self.ENDPOINT
+        return None
+
+    def _is_final_fall(self) -> bool:
+        """True when pitch and energy both fall over the trailing voiced frames."""
+        if len(self._contour) < 3:
+            return False
+        contour = np.array(self._contour, dtype=np.float64)
+        third = max(1, len(contour) // 3)
+        energy_head, energy_tail = contour[:third, 0].mean(), contour[-third:, 0].mean()
+        pitch_head, pitch_tail = contour[:third, 1].mean(), contour[-third:, 1].mean()
+        return pitch_tail < 0.95 * pitch_head and energy_tail < energy_head
+
+
+class BargeInDetector:
+    """
+    Detects the user talking while TARS is speaking.
+
+    The microphone also hears the speaker, so a frame only counts as the user when
+    its RMS is above `threshold`, above `margin` times the echo expected from what
+    was just played, and the model VAD (if any) agrees. The echo path gain (mic RMS
+    per unit of played RMS) is learned from frames where playback is loud and the
+    user is not talking. Barge-in is confirmed after `confirm_ms` of such frames in
+    a row.
+    """
+
+    def __init__(self, sample_rate: int, frame_ms: int = 20, confirm_ms: int = 200, margin: float = 2.0,
+                 threshold: float = 100.0, echo_gain: float = 0.5, adapt_rate: float = 0.05):
+        """
+        Args:
+            sample_rate (int): Sample rate of the microphone frames.
+            frame_ms (int): Frame length fed to process().
+            confirm_ms (int): User speech needed to confirm a barge-in.
+            margin (float): How far above the expected echo a frame must be.
+            threshold (float): Frame RMS (int16 scale) above which a frame may be speech.
+            echo_gain (float): Initial echo path gain, refined while TARS talks.
+            adapt_rate (float): Weight of each playback-only frame in the gain's moving average.
+        """
+        self.frame = int(sample_rate * frame_ms / 1000)
+        self.confirm_frames = max(1, confirm_ms // frame_ms)
+        self.margin = margin
+        self.threshold = threshold
+        self.echo_gain = echo_gain
+        self.adapt_rate = adapt_rate
+        self.reset()
+
+    def reset(self):
+        """Start watching a new reply. The learned echo gain is kept."""
+        self.speech_run = 0
+        self.suppressed_frames = 0
+
+    @property
+    def speech_samples(self) -> int:
+        """Length of the current run of user speech, in samples."""
+        return self.speech_run * self.frame
+
+    def process(self, frame: np.ndarray, reference_rms: float, model_speech: Optional[bool] = None) -> bool:
+        """
+        Feed one microphone frame.
+
+        Args:
+            frame (np.ndarray): int16 samples, `frame` long.
+            reference_rms (float): Level (int16 scale) of the audio played around the time the frame was captured.
+            model_speech (bool): Model VAD decision for the frame, or None for energy only.
+
+        Returns:
+            bool: True once barge-in is confirmed.
+        """
+        audio = frame.reshape(-1).astype(np.float32)
+        rms = float(np.sqrt(np.dot(audio, audio) / audio.size)) if audio.size else 0.0
+        expected_echo = self.echo_gain * reference_rms
+        loud_enough = rms > self.threshold and model_speech is not False
+
+        if loud_enough and rms > self.margin * expected_echo:
+            self.speech_run += 1
+        else:
+            if loud_enough:
+                self.suppressed_frames += 1
+            self.speech_run = 0
+            if reference_rms > self.threshold:
+                # Only our own voice: follow the echo path, limiting how fast it can grow
+                ratio = min(rms / reference_rms, 2 * self.echo_gain)
+                self.echo_gain += self.adapt_rate * (ratio - self.echo_gain)
+        return self.speech_run >= self.confirm_frames
+
+
+def load_silero_vad_model(runtime: str = "torchscript"):
+    """
+    Load the Silero VAD model from the pip package.
+
+    Parameters:
+    - runtime (str): "onnx" or "torchscript".
+
+    Returns:
+    - The loaded model.
+    """
+    from silero_vad import load_silero_vad
+    return load_silero_vad(onnx=(runtime == "onnx"))
+
+
+class StreamingSileroVAD:
+    """
+    Stateful Silero VAD fed with arbitrary-sized int16 blocks.
+    """
+
+    WINDOW_SIZE = 512  # Native Silero window at 16 kHz
+
+    def __init__(self, model=None, runtime: str = "torchscript", sample_rate: int = 16000,
+                 threshold: float = 0.5, min_silence_ms: int = 100, speech_pad_ms: int = 30):
+        """
+        Args:
+            model: Preloaded Silero VAD model (loaded from `runtime` if None).
+            runtime (str): "onnx" or "torchscript".
+            sample_rate (int): Must be 16000 for 512-sample windows.
+            threshold (float): Speech probability threshold.
+            min_silence_ms (int): Silence needed before a speech-end event.
+            speech_pad_ms (int): Padding added around detected speech.
+        """
+        import torch
+        from silero_vad import VADIterator
+
+        if sample_rate != 16000:
+            raise ValueError("Streaming Silero VAD requires 16000 Hz audio.")
+
+        self.runtime = runtime
+        self.model = model if model is not None else load_silero_vad_model(runtime)
+        self.iterator = VADIterator(
+            self.model,
+            threshold=threshold,
+            sampling_rate=sample_rate,
+            min_silence_duration_ms=min_silence_ms,
+            speech_pad_ms=speech_pad_ms,
+        )
+        self._torch = torch
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.in_speech = False
+
+    def reset(self):
+        """Clear the recurrent state, e.g. at the start of a new utterance."""
+        self.iterator.reset_states()
+        self._pending = np.zeros(0, dtype=np.float32)
+        self.in_speech = False
+
+    def process(self, data: np.ndarray) -> List[dict]:
+        """
+        Feed int16 samples and return the events completed by them.
+
+        Parameters:
+        - data (np.ndarray): int16 audio at 16 kHz, any length.
+
+        Returns:
+        - list: Events such as {"start": sample} or {"end": sample}.
+        """
+        audio = data.reshape(-1).astype(np.float32) / 32768.0
+        if self._pending.size:
+            audio = np.concatenate((self._pending, audio))
+
+        events = []
+        usable = audio.size - audio.size % self.WINDOW_SIZE
+        with self._torch.no_grad():
+            for start in range(0, usable, self.WINDOW_SIZE):
+                window = self._torch.from_numpy(audio[start:start + self.WINDOW_SIZE])
+                event = self.iterator(window, return_seconds=False)
+                if not event:
+                    continue
+                if "start" in event:
+                    self.in_speech = True
+                if "end" in event:
+                    self.in_speech = False
+                events.append(event)
+
+        self._pending = audio[usable:].copy()
+        return events
+
+    def is_speech(self, data: np.ndarray) -> bool:
+        """
+        Feed a block and report whether it contained or continued speech.
+        """
+        events = self.process(data)
+        return self.in_speech or any("start" in event for event in events)
@@ -11,10 +11,8 @@ communicates with a server endpoint for remote processing.
 import subprocess
 import traceback
 from PIL import Image
-from transformers import BlipProcessor, BlipForConditionalGeneration
 from io import BytesIO
 import requests
-import torch
 import base64
 from datetime import datetime
 from pathlib import Path
@@ -22,11 +20,12 @@ from pathlib import Path
 # === Custom Modules ===
 from modules.module_config import load_config
 from modules.module_messageQue import queue_message
+from modules.module_warmup import wait_until_ready
 
 # === Constants and Globals ===
 CONFIG = load_config()
 
-DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+DEVICE = None  # Set when BLIP is loaded; torch and transformers are imported only then
 MODEL_NAME = "Salesforce/blip-image-captioning-base"
 
 # Cache directory for model
@@ -44,8 +43,11 @@ def initialize_blip():
     Initialize BLIP model and processor for detailed captions.
     Ensures the model is loaded from the cache directory.
     """
-    global PROCESSOR, MODEL
+    global PROCESSOR, MODEL, DEVICE
     if not PROCESSOR or not MODEL:
+        import torch
+        from transformers import BlipProcessor, BlipForConditionalGeneration
+        DEVICE = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         queue_message(f"INFO: Initializing BLIP model...")
         PROCESSOR = BlipProcessor.from_pretrained(MODEL_NAME, cache_dir=str(CACHE_DIR))
         MODEL = BlipForConditionalGeneration.from_pretrained(MODEL_NAME, cache_dir=str(CACHE_DIR)).to(DEVICE)
@@ -55,6 +57,23 @@ def initialize_blip():
         queue_message(f"INFO: BLIP model initialized.")
 
 
+def warm_blip():
+    """
+    Generate a caption for a blank 384x384 image with the local BLIP model.
+    """
+    image = Image.new("RGB", (384, 384))
+    inputs = PROCESSOR(image, return_tensors="pt").to(DEVICE)
+    MODEL.generate(**inputs, max_new_tokens=5)
+
+
+def ensure_blip():
+    """
+    Wait for BLIP if it is still warming up in the background, or load it now.
+    """
+    wait_until_ready("blip")
+    initialize_blip()
+
+
 def capture_image() -> BytesIO:
     """
     Capture an image using libcamera-still and return it as a BytesIO object.
@@ -136,6 +155,7 @@ def get_image_caption_from_base64(base64_str):
         raw_image = Image.open(BytesIO(img_bytes)).convert('RGB')
 
         # Prepare inputs for the BLIP model
+        ensure_blip()
         inputs = PROCESSOR(raw_image, return_tensors="pt")
         outputs = MODEL.generate(**inputs, max_new_tokens=100)
 
@@ -165,6 +185,7 @@ def describe_camera_view() -> str:
             return send_image_to_server(image_bytes)
         else:
             # Use on-device BLIP model for captioning
+            ensure_blip()
             image = Image.open(image_bytes)
             inputs = PROCESSOR(image, return_tensors="pt").to(DEVICE)
 
@@ -0,0 +1,174 @@
+"""
+module_wakeword.py
+
+Wake word engines for TARS-AI.
+
+An engine is fed consecutive blocks of 16 kHz int16 audio and returns detection
+events with a score. STTManager and the benchmark only use this interface, so
+detectors can be swapped with `wake_engine` in config.ini. Pocketsphinx keyword
+spotting is the reference implementation.
+"""
+
+# === Standard Libraries ===
+from typing import List
+
+import numpy as np
+
+from modules.module_messageQue import queue_message
+from modules.module_startup import timed_import, timed_step
+
+
+class WakeWordEngine:
+    """
+    Base class for wake word detectors.
+
+    Subclasses implement `_load`, `reset` and `_process`. Events are dicts:
+    {"keyword": str, "score": float, "sample": int}, where `sample` counts the
+    16 kHz samples fed since the last reset() up to the end of the detecting block.
+    """
+
+    name = "base"
+    modules = ()
+    SAMPLE_RATE = 16000
+
+    def __init__(self, wake_word: str, sensitivity: int = 8):
+        """
+        Args:
+            wake_word (str): Phrase to detect.
+            sensitivity (int): 1 (lenient) to 10 (strict), the scale used in config.ini.
+        """
+        self.wake_word = wake_word.lower()
+        self.sensitivity = int(sensitivity)
+        self.samples_fed = 0
+        self._loaded = False
+
+    def load(self):
+        """Import dependencies and load the model (once)."""
+        if self._loaded:
+            return
+        with timed_step(f"wake:{self.name}"):
+            for module_name in self.modules:
+                timed_import(module_name)
+            self._load()
+        self._loaded = True
+
+    def _load(self):
+        pass
+
+    def reset(self):
+        """Forget buffered audio and partial hypotheses, e.g. at the start of a sleep cycle."""
+        self.samples_fed = 0
+
+    def process(self, data: np.ndarray) -> List[dict]:
+        """
+        Feed a block of 16 kHz int16 audio.
+
+        Returns:
+            list: Detection events completed by this block.
+        """
+        data = data.reshape(-1)
+        self.samples_fed += data.size
+        return self._process(data)
+
+    def _process(self, data: np.ndarray) -> List[dict]:
+        raise NotImplementedError
+
+    def warmup(self):
+        """Run one second of silence through the detector, then reset it."""
+        self.process(np.zeros(self.SAMPLE_RATE, dtype=np.int16))
+        self.reset()
+
+    def close(self):
+        """Release the model."""
+        self._loaded = False
+
+
+class PocketSphinxWakeWord(WakeWordEngine):
+    """
+    Pocketsphinx keyword spotting with one decoder kept for the whole session.
+    """
+
+    name = "pocketsphinx"
+    modules = ("pocketsphinx",)
+
+    # config.ini sensitivity -> keyword-spotting threshold
+    THRESHOLDS = {
+        1: 1e-20,
+        2: 1e-18,
+        3: 1e-16,
+        4: 1e-14,
+        5: 1e-12,
+        6: 1e-10,
+        7: 1e-8,
+        8: 1e-6,
+        9: 1e-4,
+        10: 1e-2,
+    }
+
+    def __init__(self, wake_word: str, sensitivity: int = 8):
+        super().__init__(wake_word, sensitivity)
+        self.decoder = None
+        self._utt_active = False
+
+    def _load(self):
+        from pocketsphinx import Decoder
+        kws_threshold = self.THRESHOLDS.get(self.sensitivity, 1)
+        self.decoder = Decoder(lm=None, keyphrase=self.wake_word, kws_threshold=kws_threshold)
+
+    def reset(self):
+        super().reset()
+        self.load()
+        if self._utt_active:
+            self.decoder.end_utt()
+        self.decoder.start_utt()
+        self._utt_active = True
+
+    def _process(self, data):
+        if not self._utt_active:
+            self.load()
+            self.decoder.start_utt()
+            self._utt_active = True
+        self.decoder.process_raw(data.astype(np.int16, copy=False).tobytes(), False, False)
+        hypothesis = self.decoder.hyp()
+        if hypothesis is None or self.wake_word not in hypothesis.hypstr.lower():
+            return []
+
+        event = {"keyword": self.wake_word, "score": float(hypothesis.score), "sample": self.samples_fed}
+        # Restart so the same keyword is not reported again on the next block
+        self.decoder.end_utt()
+        self.decoder.start_utt()
+        return [event]
+
+    def close(self):
+        if self.decoder is not None and self._utt_active:
+            self.decoder.end_utt()
+        self._utt_active = False
+        self.decoder = None
+        super().close()
+
+
+# === Registry ===
+WAKE_WORD_ENGINES = {
+    "pocketsphinx": PocketSphinxWakeWord,
+}
+
+
+def create_wake_word_engine(config) -> WakeWordEngine:
+    """
+    Build and load the engine selected by `wake_engine`.
+
+    Parameters:
+    - config (dict): Configuration dictionary.
+
+    Returns:
+    - WakeWordEngine: The loaded engine.
+    """
+    engine_name = config["STT"].get("wake_engine", "pocketsphinx")
+    engine_class = WAKE_WORD_ENGINES.get(engine_name)
+    if engine_class is None:
+        queue_message(f"WARNING: Unknown wake_engine '{engine_name}', using pocketsphinx.")
+        engine_class = PocketSphinxWakeWord
+    engine = engine_class(config["STT"].get("wake_word", "hey tar"), int(config["STT"]["sensitivity"]))
+    engine.load()
+    queue_message(f"INFO: Wake word engine '{engine.name}' loaded.")
+    return engine
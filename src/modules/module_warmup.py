@@ -0,0 +1,187 @@
+"""
+module_warmup.py
+
+Background model preloading for TARS-AI.
+
+Modules register a loader (and optionally a dummy inference) per model instead
+of loading it on the main thread. start_warmup() runs the jobs on a few daemon
+threads, most urgent first, and each model gets its own readiness event, so a
+feature can start as soon as the models it needs are warm (wake word and STT
+long before BLIP is done). When every job has finished a startup timeline is
+printed.
+"""
+
+# === Standard Libraries ===
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+from modules.module_messageQue import queue_message
+from modules.module_startup import PROCESS_START, current_rss_mb, timed_step
+
+# === Constants and Globals ===
+WARMUP_JOBS = {}  # name -> job dict, in registration order
+_jobs_lock = threading.Lock()
+_queue = queue.PriorityQueue()  # (priority, sequence, job)
+_sequence = itertools.count()
+_started = False
+_pending = 0
+
+
+# === Helper Functions ===
+def register_warmup(name: str, load: Callable[[], None], warm: Optional[Callable[[], None]] = None,
+                    priority: int = 10):
+    """
+    Register a model to preload. Jobs registered after start_warmup() are queued right away.
+
+    Parameters:
+    - name (str): Model name used for readiness checks and in the timeline.
+    - load (callable): Loads the model.
+    - warm (callable): Runs one dummy inference so the first real one does not pay
+      for JIT compilation, allocation and page faults.
+    - priority (int): Lower values are loaded first (0 for the voice pipeline).
+    """
+    global _pending
+    job = {
+        "name": name,
+        "load": load,
+        "warm": warm,
+        "ready": threading.Event(),
+        "queued": time.monotonic() - PROCESS_START,
+        "start": None,
+        "load_seconds": None,
+        "warm_seconds": None,
+        "end": None,
+        "rss_mb": None,
+        "error": None,
+    }
+    with _jobs_lock:
+        if name in WARMUP_JOBS:
+            queue_message(f"WARNING: Model '{name}' is already registered for warmup.")
+            return
+        WARMUP_JOBS[name] = job
+        _pending += 1
+        _queue.put((priority, next(_sequence), job))
+
+
+def start_warmup(max_workers: int = 3):
+    """
+    Start loading every registered model in parallel threads.
+
+    Parameters:
+    - max_workers (int): Models loaded at the same time.
+    """
+    global _started
+    with _jobs_lock:
+        if _started:
+            return
+        _started = True
+        count = len(WARMUP_JOBS)
+    queue_message(f"LOAD: Warming up {count} models on {max_workers} threads...")
+    # Daemon threads, so a model still loading never holds up shutdown
+    for index in range(max_workers):
+        threading.Thread(target=_worker, name=f"WarmupThread-{index}", daemon=True).start()
+
+
+def _worker():
+    while True:
+        _, _, job = _queue.get()
+        _run_job(job)
+
+
+def _run_job(job: dict):
+    global _pending
+    job["start"] = time.monotonic() - PROCESS_START
+    try:
+        with timed_step(f"warmup:{job['name']}"):
+            started = time.monotonic()
+            job["load"]()
+            job["load_seconds"] = time.monotonic() - started
+            if job["warm"] is not None:
+                started = time.monotonic()
+                job["warm"]()
+                job["warm_seconds"] = time.monotonic() - started
+    except Exception as e:
+        job["error"] = str(e)
+        queue_message(f"ERROR: Warmup of '{job['name']}' failed: {e}")
+    finally:
+        job["end"] = time.monotonic() - PROCESS_START
+        job["rss_mb"] = current_rss_mb()
+        # Set even on failure: waiters fall back to their own error handling
+        job["ready"].set()
+        if not job["error"]:
+            queue_message(f"LOAD: {job['name']} ready after {job['end']:.1f}s.")
+
+    with _jobs_lock:
+        _pending -= 1
+        finished = _pending == 0
+    if finished:
+        report_timeline()
+
+
+def is_ready(name: str) -> bool:
+    """
+    True once the model has finished loading and warming up. Models that were
+    never registered count as ready, so callers do not depend on what is enabled.
+    """
+    job = WARMUP_JOBS.get(name)
+    return job is None or job["ready"].is_set()
+
+
+def wait_until_ready(name: str, timeout: Optional[float] = None) -> bool:
+    """
+    Block until the model is ready.
+
+    Parameters:
+    - name (str): Registered model name.
+    - timeout (float): Seconds to wait, or None to wait indefinitely.
+
+    Returns:
+    - bool: True if the model is ready (or was never registered).
+    """
+    job = WARMUP_JOBS.get(name)
+    return job is None or job["ready"].wait(timeout)
+
+
+def get_warmup_status() -> dict:
+    """
+    Readiness of every registered model.
+
+    Returns:
+    - dict: name -> "pending", "loading", "ready" or "failed".
+    """
+    status = {}
+    for name, job in list(WARMUP_JOBS.items()):
+        if job["error"]:
+            status[name] = "failed"
+        elif job["ready"].is_set():
+            status[name] = "ready"
+        elif job["start"] is not None:
+            status[name] = "loading"
+        else:
+            status[name] = "pending"
+    return status
+
+
+def report_timeline(width: int = 40):
+    """
+    Print when each model started loading, how long loading and warmup took, and
+    a bar chart of the jobs against time since process start.
+    """
+    jobs = [job for job in WARMUP_JOBS.values() if job["end"] is not None]
+    if not jobs:
+        return
+
+    total = max(job["end"] for job in jobs) or 1.0
+    queue_message(f"INFO: Startup timeline ({total:.2f}s since start, RSS {current_rss_mb():.0f} MB)")
+    for job in sorted(jobs, key=lambda j: j["start"]):
+        first = int(job["start"] / total * width)
+        last = max(first + 1, int(job["end"] / total * width))
+        bar = " " * first + "#" * (last - first) + " " * (width - last)
+        load_ms = f"{job['load_seconds'] * 1000:6.0f}" if job["load_seconds"] is not None else "     -"
+        warm_ms = f"{job['warm_seconds'] * 1000:6.0f}" if job["warm_seconds"] is not None else "     -"
+        status = f"  FAILED: {job['error']}" if job["error"] else ""
+        queue_message(f"INFO:   {job['name']:<12} |{bar}| {job['start']:6.2f}s -> {job['end']:6.2f}s  "
+                      f"load {load_ms} ms  warm {warm_ms} ms{status}")
@@ -0,0 +1,94 @@
+"""
+Barge-in during TTS: play_audio_chunks must return as soon as the sink is
+interrupted, even while a sentence is still being synthesized.
+
+The TTS backends and the config are replaced with stand-ins, so the test needs
+neither models nor a config.ini. Run from src/: python -m pytest tests
+"""
+
+import asyncio
+import io
+import sys
+import threading
+import time
+import types
+import wave
+
+import numpy as np
+import pytest
+
+SAMPLE_RATE = 22050
+BACKENDS = {
+    "modules.module_piper": "text_to_speech_with_pipelining_piper",
+    "modules.module_silero": "text_to_speech_with_pipelining_silero",
+    "modules.module_espeak": "text_to_speech_with_pipelining_espeak",
+    "modules.module_alltalk": "text_to_speech_with_pipelining_alltalk",
+    "modules.module_elevenlabs": "text_to_speech_with_pipelining_elevenlabs",
+    "modules.module_azure": "text_to_speech_with_pipelining_azure",
+}
+
+
+@pytest.fixture
+def module_tts(monkeypatch):
+    config = types.ModuleType("modules.module_config")
+    config.load_config = lambda: {"TTS": {"cache": False}}
+    monkeypatch.setitem(sys.modules, "modules.module_config", config)
+    for name, function in BACKENDS.items():
+        backend = types.ModuleType(name)
+        setattr(backend, function, None)
+        monkeypatch.setitem(sys.modules, name, backend)
+    monkeypatch.delitem(sys.modules, "modules.module_tts", raising=False)
+    monkeypatch.delitem(sys.modules, "modules.module_audioio", raising=False)
+
+    import modules.module_tts as module_tts
+    return module_tts
+
+
+def _wav(seconds):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        wav_file.writeframes(np.zeros(int(SAMPLE_RATE * seconds), dtype=np.int16).tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+def test_interrupt_during_slow_synthesis_returns_quickly(module_tts, monkeypatch):
+    from modules.module_audioio import NullSink
+
+    sink = NullSink(realtime=True)
+    synthesizing = threading.Event()
+    closed = threading.Event()
+
+    async def slow_tts(text, ttsoption, *args, **kwargs):
+        try:
+            yield _wav(0.1)
+            synthesizing.set()
+            await asyncio.to_thread(time.sleep, 3.0)  # A slow Silero / ElevenLabs sentence
+            yield _wav(0.1)
+        finally:
+            closed.set()
+
+    monkeypatch.setattr(module_tts, "generate_tts_audio", slow_tts)
+    monkeypatch.setattr(module_tts, "get_audio_sink", lambda: sink)
+
+    result = {}
+
+    def speak():
+        asyncio.run(module_tts.play_audio_chunks("First. Second.", "fake"))
+        result["returned"] = time.monotonic()
+
+    speaker = threading.Thread(target=speak, daemon=True)
+    speaker.start()
+    assert synthesizing.wait(2.0)
+    time.sleep(0.15)  # First sentence played, second still being synthesized
+
+    interrupted = time.monotonic()
+    sink.interrupt()
+    speaker.join(2.0)
+
+    assert not speaker.is_alive()
+    assert result["returned"] - interrupted < 0.1
+    assert closed.wait(0.5), "synthesis of the pending sentence was not cancelled"